@@ -0,0 +1,120 @@
+"""
+账目解码开销的微基准
+
+对比两种从字典还原 Entry 的方式:
+- 旧实现: 经过 Entry / Category / Tag 的构造函数, 每个对象都要执行 icontract 的
+  @require / @ensure 检查;
+- 新实现: from_dict 通过 __new__ 直接还原已校验过的数据。
+
+同时给出 Database 整表解码(关闭 LRU 缓存)的耗时。
+
+用法(在 exp3 目录下):
+    python benchmarks/bench_decode.py [条目数]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocket_ledger.database.database import Database
+from pocket_ledger.models.category import Category, CategoryType
+from pocket_ledger.models.entry import Entry
+from pocket_ledger.models.tag import Tag
+
+
+def legacy_from_dict(data):
+    """原 Entry.from_dict: 分类、标签、账目都经过带契约的构造函数"""
+    category_data = data['category']
+    entry = Entry(
+        user_id=uuid.UUID(data['user_id']),
+        category=Category(
+            name=category_data['name'],
+            category_type=CategoryType(category_data['type']),
+            icon=category_data.get('icon'),
+            description=category_data.get('description'),
+            category_id=uuid.UUID(category_data['category_id'])
+        ),
+        title=data['title'],
+        amount=Decimal(data['amount']),
+        currency=data['currency'],
+        note=data.get('note'),
+        timestamp=datetime.fromisoformat(data['timestamp']),
+        images=data.get('images', []),
+        entry_id=uuid.UUID(data['entry_id'])
+    )
+    entry.tags = [
+        Tag(
+            name=tag_data['name'],
+            color=tag_data.get('color'),
+            description=tag_data.get('description'),
+            tag_id=uuid.UUID(tag_data['tag_id'])
+        )
+        for tag_data in data.get('tags', [])
+    ]
+    entry.created_at = datetime.fromisoformat(data['created_at'])
+    entry.updated_at = datetime.fromisoformat(data['updated_at'])
+    return entry
+
+
+def build_rows(count):
+    """生成 to_dict 形式的账目字典"""
+    user_id = uuid.uuid4()
+    categories = [Category(f"分类{i}", CategoryType.EXPENSE) for i in range(10)]
+    tags = [Tag(f"tag{i}") for i in range(5)]
+    base = datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        entry = Entry(
+            user_id=user_id,
+            category=categories[i % len(categories)],
+            title=f"午餐 {i}",
+            amount=Decimal(i % 500 + 1) / 4,
+            timestamp=base + timedelta(minutes=37 * i),
+        )
+        entry.add_tag(tags[i % len(tags)])
+        rows.append(entry.to_dict())
+    return rows
+
+
+def best_of(func, repeat=5):
+    """多次运行取最短耗时(秒)"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(count=20000):
+    rows = build_rows(count)
+    assert [legacy_from_dict(row).to_dict() for row in rows[:100]] == \
+        [Entry.from_dict(row).to_dict() for row in rows[:100]]
+
+    legacy = best_of(lambda: [legacy_from_dict(row) for row in rows])
+    trusted = best_of(lambda: [Entry.from_dict(row) for row in rows])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = Database(os.path.join(tmp, "bench.json"), entry_cache_size=0)
+        db.save_entries(Entry.from_dict(row) for row in rows)
+        full_scan = best_of(lambda: list(db.iter_entries()), repeat=3)
+
+    print(f"条目数: {count}")
+    print(f"{'方式':<24}{'us/条':>10}{'总计 ms':>12}")
+    for name, elapsed in (
+        ("构造函数(带契约)", legacy),
+        ("from_dict(可信路径)", trusted),
+        ("Database 全表解码", full_scan),
+    ):
+        print(f"{name:<24}{elapsed / count * 1e6:>10.2f}{elapsed * 1000:>12.1f}")
+    print(f"from_dict 加速: {legacy / trusted:.1f}x")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
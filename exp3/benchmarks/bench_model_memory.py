@@ -0,0 +1,88 @@
+"""
+模型对象内存占用对比
+
+用 tracemalloc 统计解码一批账目后仍被持有的内存, 对比:
+- __slots__ 模型(当前实现);
+- 同样字段、带 __dict__ 的普通类(改造前的布局)。
+
+两种情况下分类/标签都在账目间共享, 字段值(UUID、Decimal、datetime 等)也相同,
+差异只来自实例本身的布局。
+
+用法(在 exp3 目录下):
+    python benchmarks/bench_model_memory.py [条目数]
+"""
+import gc
+import os
+import sys
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocket_ledger.models.category import Category, CategoryType
+from pocket_ledger.models.entry import Entry
+from pocket_ledger.models.tag import Tag
+
+
+class PlainEntry:
+    """与 Entry 字段相同、保留 __dict__ 的普通类"""
+
+
+def to_plain(entry):
+    """按 Entry 的字段构造一个普通类实例"""
+    plain = PlainEntry()
+    for name in Entry.__slots__:
+        setattr(plain, name, getattr(entry, name))
+    return plain
+
+
+def build_rows(count):
+    """生成账目字典以及共享的分类/标签"""
+    user_id = uuid.uuid4()
+    categories = [Category(f"分类{i}", CategoryType.EXPENSE) for i in range(10)]
+    tags = [Tag(f"tag{i}") for i in range(5)]
+    base = datetime(2024, 1, 1)
+    rows = []
+    for i in range(count):
+        entry = Entry(
+            user_id=user_id,
+            category=categories[i % len(categories)],
+            title=f"午餐 {i}",
+            amount=Decimal(i % 500 + 1) / 4,
+            timestamp=base + timedelta(minutes=37 * i),
+        )
+        entry.add_tag(tags[i % len(tags)])
+        rows.append((entry.to_dict(), entry.category, entry.tags))
+    return rows
+
+
+def measure(build):
+    """返回 build() 结果在存活期间占用的字节数"""
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def main(count=100000):
+    rows = build_rows(count)
+    decode = lambda: [Entry.from_dict(data, category=c, tags=t) for data, c, t in rows]
+    slotted = measure(decode)
+    # 先解码再转换, 只把普通类实例留在内存里
+    plain = measure(lambda: [to_plain(e) for e in decode()])
+
+    print(f"Python {sys.version.split()[0]}, 条目数: {count}")
+    print(f"{'布局':<16}{'总计 MB':>10}{'B/条':>10}")
+    for name, size in (("__dict__", plain), ("__slots__", slotted)):
+        print(f"{name:<16}{size / 2 ** 20:>10.1f}{size / count:>10.0f}")
+    print(f"节省: {(plain - slotted) / plain:.0%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,174 @@
+"""
+query_entries 逐条过滤开销的微基准
+
+对比两种实现在同一批记录上的每行开销:
+- 旧实现: 每一行都重新计算 str(user_id)、keyword.lower()、构造标签ID列表、
+  解析时间戳并比较时区形态(按原 query_entries 的内层循环原样复制);
+- 新实现: 查询条件预先编译为闭包列表, 只包含生效的条件; 作用于存储形式的记录,
+  金额按整数最小单位比较。
+
+同时给出整次查询的耗时(旧实现为全表扫描 + 排序, 新实现为 Database.query_entries)。
+
+用法(在 exp3 目录下):
+    python benchmarks/bench_query_predicates.py [条目数]
+"""
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pocket_ledger.database.database import Database, _compile_row_predicates
+from pocket_ledger.models.category import Category, CategoryType
+from pocket_ledger.models.entry import Entry
+from pocket_ledger.models.tag import Tag
+
+
+def legacy_match(entry_data, user_id, category_id, tag_ids, start_date, end_date,
+                 min_amount, max_amount, keyword):
+    """原 query_entries 内层循环的逐条判断(不含解码)"""
+    if user_id and entry_data.get('user_id') != str(user_id):
+        return False
+    if category_id:
+        cat = entry_data.get('category') or {}
+        if cat.get('category_id') != str(category_id):
+            return False
+    if tag_ids:
+        entry_tag_ids = [tag.get('tag_id') for tag in entry_data.get('tags', []) if isinstance(tag, dict)]
+        if not any(str(tag_id) in entry_tag_ids for tag_id in tag_ids):
+            return False
+    if start_date is not None or end_date is not None:
+        try:
+            entry_time = datetime.fromisoformat(entry_data['timestamp'])
+        except Exception:
+            return False
+        bound = start_date if start_date is not None else end_date
+        if (bound.tzinfo is not None) != (entry_time.tzinfo is not None):
+            return False
+        if start_date is not None and entry_time < start_date:
+            return False
+        if end_date is not None and entry_time > end_date:
+            return False
+    amt_raw = entry_data.get('amount')
+    if amt_raw is None:
+        return False
+    try:
+        entry_amount = Decimal(str(amt_raw))
+    except Exception:
+        return False
+    if min_amount is not None and entry_amount < min_amount:
+        return False
+    if max_amount is not None and entry_amount > max_amount:
+        return False
+    if keyword:
+        title = (entry_data.get('title') or "")
+        note = (entry_data.get('note') or "")
+        keyword_lower = keyword.lower()
+        if keyword_lower not in title.lower() and keyword_lower not in note.lower():
+            return False
+    return True
+
+
+def legacy_query(rows, **query):
+    """原实现: 全表逐条判断, 命中的解码后按时间倒序排序"""
+    result = [Entry.from_dict(data) for data in rows if legacy_match(data, **query)]
+    result.sort(key=lambda e: e.timestamp, reverse=True)
+    return result
+
+
+def compiled_match(rows, predicates):
+    """新实现的逐条校验: 依次调用编译好的闭包"""
+    matched = 0
+    for entry_data in rows:
+        for predicate in predicates:
+            if not predicate(entry_data):
+                break
+        else:
+            matched += 1
+    return matched
+
+
+def build_database(path, count):
+    """生成两个用户、若干分类与标签的测试数据"""
+    db = Database(path, entry_cache_size=0)
+    users = [uuid.uuid4(), uuid.uuid4()]
+    categories = [Category(f"分类{i}", CategoryType.EXPENSE) for i in range(10)]
+    tags = [Tag(f"tag{i}") for i in range(5)]
+    for category in categories:
+        db.save_category(category)
+    base = datetime(2024, 1, 1)
+    entries = []
+    for i in range(count):
+        entry = Entry(
+            user_id=users[i % 2],
+            category=categories[i % len(categories)],
+            title=f"午餐 lunch {i}",
+            amount=Decimal(i % 500 + 1) / 4,
+            note="team" if i % 7 == 0 else "",
+            timestamp=base + timedelta(minutes=37 * i),
+        )
+        entry.add_tag(tags[i % len(tags)])
+        entries.append(entry)
+    db.save_entries(entries)
+    return db, users, categories, tags
+
+
+def best_of(func, repeat=5):
+    """多次运行取最短耗时(秒)"""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main(count=20000):
+    with tempfile.TemporaryDirectory() as tmp:
+        db, users, categories, tags = build_database(os.path.join(tmp, "bench.json"), count)
+        # 旧实现面对的是内嵌分类/标签的记录格式
+        rows = [entry.to_dict() for entry in db.iter_entries()]
+        stored = list(db.data['entries'].values())
+        scenarios = {
+            "用户": dict(user_id=users[0]),
+            "用户+金额": dict(user_id=users[0], min_amount=Decimal("10"), max_amount=Decimal("80")),
+            "用户+关键词": dict(user_id=users[0], keyword="team"),
+            "用户+分类+标签+日期": dict(
+                user_id=users[0], category_id=categories[2].category_id, tag_ids=[tags[1].tag_id],
+                start_date=datetime(2024, 3, 1), end_date=datetime(2024, 6, 30),
+            ),
+        }
+
+        print(f"条目数: {count}")
+        print(f"{'场景':<20}{'旧 ns/行':>12}{'新 ns/行':>12}{'旧查询 ms':>12}{'新查询 ms':>12}")
+        for name, query in scenarios.items():
+            full = dict(
+                user_id=None, category_id=None, tag_ids=None, start_date=None, end_date=None,
+                min_amount=None, max_amount=None, keyword=None,
+            )
+            full.update(query)
+            predicates = _compile_row_predicates(full['min_amount'], full['max_amount'], full['keyword'])
+
+            legacy_row = best_of(lambda: sum(1 for data in rows if legacy_match(data, **full)))
+            compiled_row = best_of(lambda: compiled_match(stored, predicates))
+            legacy_total = best_of(lambda: legacy_query(rows, **full), repeat=3)
+            current_total = best_of(lambda: db.query_entries(**query), repeat=3)
+            assert [e.entry_id for e in legacy_query(rows, **full)] == \
+                [e.entry_id for e in db.query_entries(**query)]
+
+            print(
+                f"{name:<20}"
+                f"{legacy_row / count * 1e9:>12.0f}"
+                f"{compiled_row / count * 1e9:>12.0f}"
+                f"{legacy_total * 1000:>12.1f}"
+                f"{current_total * 1000:>12.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
@@ -1,8 +1,9 @@
 """
 应用逻辑层 - 整合各个服务
 """
+import itertools
 import uuid
-from typing import List, Optional, Tuple, Dict, Any
+from typing import List, Optional, Tuple, Dict, Any, Callable, Iterable, Iterator
 from datetime import datetime
 from decimal import Decimal
 
@@ -11,10 +12,17 @@ from .models.entry import Entry
 from .models.category import Category, CategoryType
 from .models.tag import Tag
 from .models.budget import Budget, BudgetPeriod
-from .database.database import Database
+from .database import open_database
 from .services.auth_service import AuthService
 from .services.stat_engine import StatEngine
 from .services.export_service import ExportService
+from .services.budget_tracker import BudgetTracker
+
+
+# 批量添加账目时 spec 允许的字段(与 add_entry 的参数一致)
+_ENTRY_SPEC_FIELDS = frozenset({
+    'category_id', 'title', 'amount', 'currency', 'note', 'timestamp', 'tag_ids', 'images'
+})
 
 
 class AppLogic:
@@ -26,19 +34,22 @@ class AppLogic:
         auth_service: 认证服务
         stat_engine: 统计引擎
         export_service: 导出服务
+        budget_tracker: 预算跟踪器(可通过 subscribe 订阅预算提醒事件)
     """
     
-    def __init__(self, db_path: str = "pocket_ledger.json"):
+    def __init__(self, db_path: str = "pocket_ledger.json", backend: Optional[str] = None):
         """
         初始化应用逻辑
         
         Args:
             db_path: 数据库文件路径
+            backend: 存储后端("json" / "sqlite"), 为None时按文件扩展名选择
         """
-        self.database = Database(db_path)
+        self.database = open_database(db_path, backend)
         self.auth_service = AuthService(self.database)
         self.stat_engine = StatEngine(self.database)
         self.export_service = ExportService(self.database)
+        self.budget_tracker = BudgetTracker(self.database)
     
     # ========== 用户认证相关 ==========
     
@@ -65,7 +76,11 @@ class AppLogic:
         Returns:
             (是否成功, 消息, 用户对象)
         """
-        return self.auth_service.login(email, password)
+        success, message, user = self.auth_service.login(email, password)
+        if success:
+            # 登录后即开始跟踪, 之后的账目写入立即触发预算提醒
+            self.budget_tracker.track_user(user.user_id)
+        return success, message, user
     
     def logout(self) -> Tuple[bool, str]:
         """
@@ -175,6 +190,120 @@ class AppLogic:
         else:
             return False, "添加失败", None
     
+    def add_entries(
+        self,
+        entry_specs: Iterable[Dict[str, Any]]
+    ) -> Tuple[bool, str, List[Entry], List[Tuple[int, str]]]:
+        """
+        批量添加账目(如导入历史账单)
+        
+        每条 spec 是与 add_entry 参数同名的字典(category_id, title, amount 必填)。
+        分类和标签按不同的 ID 各查询一次, 先统一校验再构造条目, 最后一次性持久化;
+        单行错误只记录下来, 不会中断整个批次。
+        
+        Returns:
+            (是否成功, 消息, 添加的条目列表, 失败行列表[(行号, 原因)]);
+            一条都没有添加时"是否成功"为 False
+        """
+        user = self.auth_service.get_current_user()
+        if not user:
+            return False, "未登录", [], []
+        
+        categories: Dict[uuid.UUID, Optional[Category]] = {}
+        tags: Dict[uuid.UUID, Optional[Tag]] = {}
+        entries: List[Entry] = []
+        errors: List[Tuple[int, str]] = []
+        
+        for index, spec in enumerate(entry_specs):
+            error = self._validate_entry_spec(spec)
+            if error:
+                errors.append((index, error))
+                continue
+            
+            category_id = spec['category_id']
+            if category_id not in categories:
+                categories[category_id] = self.database.get_category_by_id(category_id)
+            category = categories[category_id]
+            if not category:
+                errors.append((index, "分类不存在"))
+                continue
+            
+            try:
+                entry = Entry(
+                    user_id=user.user_id,
+                    category=category,
+                    title=spec['title'],
+                    amount=spec['amount'],
+                    currency=spec.get('currency', "CNY"),
+                    note=spec.get('note'),
+                    timestamp=spec.get('timestamp'),
+                    images=spec.get('images')
+                )
+            except Exception as e:
+                errors.append((index, f"数据不合法: {e}"))
+                continue
+            
+            for tag_id in spec.get('tag_ids') or []:
+                if tag_id not in tags:
+                    tags[tag_id] = self.database.get_tag_by_id(tag_id)
+                if tags[tag_id]:
+                    entry.add_tag(tags[tag_id])
+            
+            entries.append(entry)
+        
+        if not entries:
+            return False, f"没有添加任何账目, 失败 {len(errors)} 条", [], errors
+        if not self.database.save_entries(entries):
+            return False, "添加失败", [], errors
+        
+        return True, f"成功添加 {len(entries)} 条, 失败 {len(errors)} 条", entries, errors
+    
+    @staticmethod
+    def _validate_entry_spec(spec: Any) -> Optional[str]:
+        """
+        校验批量添加中的单条 spec
+        
+        Returns:
+            错误原因, 合法时为None
+        """
+        if not isinstance(spec, dict):
+            return "格式错误: 必须是字典"
+        
+        unknown = set(spec) - _ENTRY_SPEC_FIELDS
+        if unknown:
+            return f"未知字段: {', '.join(sorted(unknown))}"
+        
+        if not isinstance(spec.get('category_id'), uuid.UUID):
+            return "category_id 必须是 uuid.UUID"
+        
+        title = spec.get('title')
+        if not isinstance(title, str) or not title.strip():
+            return "标题不能为空"
+        
+        try:
+            amount = Decimal(str(spec.get('amount')))
+        except Exception:
+            return "金额格式不正确"
+        if not amount.is_finite() or amount <= 0:
+            return "金额必须大于0"
+        
+        currency = spec.get('currency', "CNY")
+        if not isinstance(currency, str) or not currency:
+            return "货币类型不能为空"
+        
+        timestamp = spec.get('timestamp')
+        if timestamp is not None and not isinstance(timestamp, datetime):
+            return "timestamp 必须是 datetime"
+        
+        tag_ids = spec.get('tag_ids')
+        if tag_ids is not None:
+            if not isinstance(tag_ids, (list, tuple)):
+                return "tag_ids 必须是列表"
+            if not all(isinstance(tag_id, uuid.UUID) for tag_id in tag_ids):
+                return "tag_ids 中的元素必须是 uuid.UUID"
+        
+        return None
+    
     def update_entry(
         self,
         entry_id: uuid.UUID,
@@ -189,6 +318,7 @@ class AppLogic:
         Returns:
             (是否成功, 消息)
         """
+        # get_entry_by_id 每次返回新对象, 修改中途失败不会影响其他读取者
         entry = self.database.get_entry_by_id(entry_id)
         if not entry:
             return False, "账目不存在"
@@ -198,11 +328,11 @@ class AppLogic:
         if not user or entry.user_id != user.user_id:
             return False, "无权限修改"
         
-        # 更新字段
-        if title:
-            entry.title = title
+        # 更新字段(带契约检查的金额最先修改, 校验失败时其余字段保持不变)
         if amount:
             entry.update_amount(amount)
+        if title:
+            entry.title = title
         if category_id:
             category = self.database.get_category_by_id(category_id)
             if category:
@@ -243,13 +373,19 @@ class AppLogic:
         tag_ids: Optional[List[uuid.UUID]] = None,
         start_date: Optional[datetime] = None,
         end_date: Optional[datetime] = None,
-        keyword: Optional[str] = None
+        keyword: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None
     ) -> List[Entry]:
         """
         查询账目
         
+        Args:
+            limit: 每页条数(可选)
+            after: 上一页最后一条的 (timestamp, entry_id), 用于翻页(可选)
+        
         Returns:
-            条目列表
+            条目列表(按时间倒序)
         """
         user = self.auth_service.get_current_user()
         if not user:
@@ -261,7 +397,9 @@ class AppLogic:
             tag_ids=tag_ids,
             start_date=start_date,
             end_date=end_date,
-            keyword=keyword
+            keyword=keyword,
+            limit=limit,
+            after=after
         )
     
     # ========== 分类管理相关 ==========
@@ -383,7 +521,7 @@ class AppLogic:
         if not user:
             return []
         
-        return self.stat_engine.check_budget_status(user.user_id)
+        return self.budget_tracker.get_status(user.user_id)
     
     # ========== 统计分析相关 ==========
     
@@ -402,18 +540,14 @@ class AppLogic:
         if not user:
             return {}
         
-        total_income = self.stat_engine.calculate_total_by_type(
-            user.user_id, CategoryType.INCOME, start_date, end_date
-        )
-        total_expense = self.stat_engine.calculate_total_by_type(
-            user.user_id, CategoryType.EXPENSE, start_date, end_date
-        )
-        balance = total_income - total_expense
+        # 只要合计与笔数: 可由按日汇总 / 列式存储回答, 不必解码账目
+        summary = self.stat_engine.compute_summary(user.user_id, start_date, end_date, breakdowns=())
         
         return {
-            'total_income': float(total_income),
-            'total_expense': float(total_expense),
-            'balance': float(balance)
+            'total_income': float(summary['income']),
+            'total_expense': float(summary['expense']),
+            'balance': float(summary['balance']),
+            'count': summary['count']
         }
     
     def get_category_statistics(
@@ -450,14 +584,18 @@ class AppLogic:
     
     # ========== 导出相关 ==========
     
-    def export_to_excel(
+    def _export_entries(
         self,
+        export: Callable[[Iterable[Entry], str], bool],
         file_path: str,
-        start_date: Optional[datetime] = None,
-        end_date: Optional[datetime] = None
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
     ) -> Tuple[bool, str]:
         """
-        导出账目到Excel
+        以流式方式导出当前用户的账目
+        
+        先取出第一条判断是否有数据, 再把其余条目连同第一条逐条交给导出函数,
+        导出过程中计数, 不在内存中保留完整的结果列表。
         
         Returns:
             (是否成功, 消息)
@@ -466,20 +604,42 @@ class AppLogic:
         if not user:
             return False, "未登录"
         
-        entries = self.database.query_entries(
+        entries = self.database.iter_entries(
             user_id=user.user_id,
             start_date=start_date,
             end_date=end_date
         )
-        
-        if not entries:
+        first = next(entries, None)
+        if first is None:
             return False, "没有数据可导出"
         
-        if self.export_service.export_to_xlsx(entries, file_path):
-            return True, f"成功导出 {len(entries)} 条记录"
+        exported = 0
+        
+        def counted() -> Iterator[Entry]:
+            nonlocal exported
+            for entry in itertools.chain((first,), entries):
+                exported += 1
+                yield entry
+        
+        if export(counted(), file_path):
+            return True, f"成功导出 {exported} 条记录"
         else:
             return False, "导出失败"
     
+    def export_to_excel(
+        self,
+        file_path: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Tuple[bool, str]:
+        """
+        导出账目到Excel
+        
+        Returns:
+            (是否成功, 消息)
+        """
+        return self._export_entries(self.export_service.export_to_xlsx, file_path, start_date, end_date)
+    
     def export_to_csv(
         self,
         file_path: str,
@@ -492,20 +652,4 @@ class AppLogic:
         Returns:
             (是否成功, 消息)
         """
-        user = self.auth_service.get_current_user()
-        if not user:
-            return False, "未登录"
-        
-        entries = self.database.query_entries(
-            user_id=user.user_id,
-            start_date=start_date,
-            end_date=end_date
-        )
-        
-        if not entries:
-            return False, "没有数据可导出"
-        
-        if self.export_service.export_to_csv(entries, file_path):
-            return True, f"成功导出 {len(entries)} 条记录"
-        else:
-            return False, "导出失败"
+        return self._export_entries(self.export_service.export_to_csv, file_path, start_date, end_date)
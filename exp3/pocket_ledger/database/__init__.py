@@ -1,7 +1,36 @@
 """
 数据库层
 """
+from typing import Optional, Union
 
-from .database import Database
+from .database import Database, validate_date_range
+from .sqlite_database import SqliteDatabase
 
-__all__ = ['Database']
+# 按扩展名识别为 SQLite 数据库的文件
+SQLITE_SUFFIXES = ('.db', '.sqlite', '.sqlite3')
+
+
+def open_database(
+    db_path: str,
+    backend: Optional[str] = None
+) -> Union[Database, SqliteDatabase]:
+    """
+    按存储后端打开数据库
+    
+    Args:
+        db_path: 数据库文件路径
+        backend: "json" 或 "sqlite"; 为None时按文件扩展名选择
+        
+    Returns:
+        数据库实例
+    """
+    if backend is None:
+        backend = 'sqlite' if db_path.lower().endswith(SQLITE_SUFFIXES) else 'json'
+    if backend == 'sqlite':
+        return SqliteDatabase(db_path)
+    if backend == 'json':
+        return Database(db_path)
+    raise ValueError(f"未知的存储后端: {backend}")
+
+
+__all__ = ['Database', 'SqliteDatabase', 'open_database', 'validate_date_range']
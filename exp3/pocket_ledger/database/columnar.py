@@ -0,0 +1,273 @@
+"""
+列式账目存储 - 为统计引擎的聚合计算提供紧凑的内存表示
+"""
+from array import array
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..models.category import CategoryType
+
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_ORDINAL = _EPOCH.toordinal()
+_DAY_US = 86400 * 1000000
+
+# 金额以整数最小单位保存: amount * 10**scale; scale 随数据按需增大, 超过上限的金额
+# 无法精确表示, 此时整个存储标记为不精确, 由调用方回退到逐条计算
+_DEFAULT_SCALE = 2
+_MAX_SCALE = 6
+# 保证按最大 scale 换算后仍能放入 64 位有符号整数
+_MINOR_LIMIT = 2 ** 63
+
+_INCOME = 1
+_EXPENSE = 0
+
+
+class _UserColumns:
+    """单个用户的列数据(各数组按行对齐, 删除只打墓碑标记)"""
+
+    def __init__(self):
+        self.category = array('l')
+        self.type = array('b')
+        self.amount = array('q')
+        self.aware = array('b')
+        self.ts_us = array('q')
+        self.tz_offset = array('l')
+        self.currency = array('l')
+        self.valid = array('b')
+        self.rows: Dict[str, int] = {}
+        self.dead = 0
+
+
+class ColumnarEntryStore:
+    """
+    列式账目存储
+
+    按用户分区, 每个分区用 array 保存平行的列: 分类序号、收支类型、金额(整数最小
+    单位)、时区形态、时间戳(微秒, aware 时间为 UTC)、时区偏移(秒)和货币序号。
+    写入时增量追加, 删除只打墓碑, 墓碑过半时压缩分区。聚合时只扫描这些整数列,
+    不需要构造 Entry 对象。
+
+    时间戳精确到微秒(而不是秒), 以保证与 query_entries 的边界判断完全一致。
+
+    Attributes:
+        scale: 金额的小数位数
+        exact: 所有金额是否都能被精确表示
+    """
+
+    def __init__(self):
+        """初始化空存储"""
+        self.scale = _DEFAULT_SCALE
+        self.exact = True
+        self._parts: Dict[str, _UserColumns] = {}
+        self._categories: Dict[str, int] = {}
+        self._currencies: Dict[str, int] = {}
+        self._unscaled: set = set()
+
+    @staticmethod
+    def _intern(table: Dict[str, int], value: Any) -> int:
+        """返回值在字典表中的序号(不存在时追加)"""
+        index = table.get(value)
+        if index is None:
+            index = table[value] = len(table)
+        return index
+
+    def _to_minor(self, minor: int, exponent: int) -> Optional[int]:
+        """把 minor * 10**exponent 换算为当前 scale 下的整数, 必要时提升 scale"""
+        needed = max(0, -exponent)
+        if needed > _MAX_SCALE:
+            return None
+        if abs(minor) * 10 ** (_MAX_SCALE + exponent) >= _MINOR_LIMIT:
+            return None
+        if needed > self.scale:
+            self._rescale(needed)
+        return minor * 10 ** (self.scale + exponent)
+
+    def _rescale(self, scale: int) -> None:
+        """提升所有已存金额的 scale"""
+        factor = 10 ** (scale - self.scale)
+        for part in self._parts.values():
+            part.amount = array('q', (value * factor for value in part.amount))
+        self.scale = scale
+
+    def add(
+        self,
+        entry_id: str,
+        entry_data: Dict[str, Any],
+        category_type: Optional[str],
+        ts_key: Tuple[int, int]
+    ) -> None:
+        """
+        追加一条账目
+
+        Args:
+            entry_id: 条目ID
+            entry_data: 账目记录(存储形式, 金额为 amount_minor / amount_exp)
+            category_type: 账目所属分类的收支类型(分类不存在时为 None)
+            ts_key: 时间索引键 (是否带时区, 微秒数)
+        """
+        amount_minor, amount_exp = entry_data.get('amount_minor'), entry_data.get('amount_exp')
+        if not isinstance(amount_minor, int) or not isinstance(amount_exp, int):
+            # 与 query_entries 一致: 金额等字段异常的脏数据不参与统计
+            return
+        if category_type is None:
+            return
+        ctype = _INCOME if category_type == CategoryType.INCOME.value else _EXPENSE
+        minor = self._to_minor(amount_minor, amount_exp)
+        if minor is None:
+            self.exact = False
+            self._unscaled.add(entry_id)
+            return
+
+        part = self._parts.get(entry_data.get('user_id'))
+        if part is None:
+            part = self._parts[entry_data.get('user_id')] = _UserColumns()
+
+        aware, ts_us = ts_key
+
+        part.rows[entry_id] = len(part.valid)
+        part.category.append(self._intern(self._categories, entry_data.get('category_id')))
+        part.type.append(ctype)
+        part.amount.append(minor)
+        part.aware.append(aware)
+        part.ts_us.append(ts_us)
+        part.tz_offset.append(entry_data.get('ts_offset') or 0)
+        part.currency.append(self._intern(self._currencies, entry_data.get('currency')))
+        part.valid.append(1)
+
+    def remove(self, user_id: Optional[str], entry_id: str) -> None:
+        """
+        删除一条账目
+
+        Args:
+            user_id: 所属用户ID
+            entry_id: 条目ID
+        """
+        if entry_id in self._unscaled:
+            self._unscaled.discard(entry_id)
+            self.exact = not self._unscaled
+            return
+        part = self._parts.get(user_id)
+        if part is None or entry_id not in part.rows:
+            return
+        part.valid[part.rows.pop(entry_id)] = 0
+        part.dead += 1
+        if not part.rows:
+            del self._parts[user_id]
+        elif part.dead * 2 > len(part.valid):
+            self._compact(user_id, part)
+
+    def _compact(self, user_id: str, part: _UserColumns) -> None:
+        """丢弃分区中的墓碑行"""
+        keep = [i for i in range(len(part.valid)) if part.valid[i]]
+        fresh = _UserColumns()
+        for name in ('category', 'type', 'amount', 'aware', 'ts_us', 'tz_offset', 'currency', 'valid'):
+            column = getattr(part, name)
+            setattr(fresh, name, array(column.typecode, (column[i] for i in keep)))
+        position = {old: new for new, old in enumerate(keep)}
+        fresh.rows = {entry_id: position[i] for entry_id, i in part.rows.items()}
+        self._parts[user_id] = fresh
+
+    # ========== 聚合 ==========
+
+    def _select(
+        self,
+        user_id: str,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> Tuple[Optional[_UserColumns], List[int]]:
+        """返回用户分区以及落在时间范围内的行号"""
+        part = self._parts.get(user_id)
+        if part is None:
+            return None, []
+
+        valid, aware, ts_us = part.valid, part.aware, part.ts_us
+        bound = start_date if start_date is not None else end_date
+        if bound is None:
+            return part, [i for i in range(len(valid)) if valid[i]]
+
+        want_aware = int(bound.tzinfo is not None)
+        lo = _bound_us(start_date) if start_date is not None else None
+        hi = _bound_us(end_date) if end_date is not None else None
+        rows = []
+        for i in range(len(valid)):
+            if not valid[i] or aware[i] != want_aware:
+                continue
+            us = ts_us[i]
+            if (lo is None or us >= lo) and (hi is None or us <= hi):
+                rows.append(i)
+        return part, rows
+
+    def _to_decimal(self, minor: int) -> Decimal:
+        """整数最小单位换算回 Decimal"""
+        return Decimal(minor).scaleb(-self.scale)
+
+    def sum_by_type(
+        self,
+        user_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Tuple[Decimal, Decimal]:
+        """
+        按收支类型汇总金额
+
+        Returns:
+            (收入合计, 支出合计)
+        """
+        income, expense, _count = self.summarize(user_id, start_date, end_date)
+        return income, expense
+
+    def summarize(
+        self,
+        user_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Tuple[Decimal, Decimal, int]:
+        """
+        按收支类型汇总金额, 同时给出笔数
+
+        Returns:
+            (收入合计, 支出合计, 笔数)
+        """
+        part, rows = self._select(user_id, start_date, end_date)
+        totals = [0, 0]
+        if part is not None:
+            ctype, amount = part.type, part.amount
+            for i in rows:
+                totals[ctype[i]] += amount[i]
+        return self._to_decimal(totals[_INCOME]), self._to_decimal(totals[_EXPENSE]), len(rows)
+
+    def sum_by_day(
+        self,
+        user_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Dict[int, Tuple[Decimal, Decimal]]:
+        """
+        按日期(账目自身时区下的日期)汇总收支
+
+        Returns:
+            {日期序数(date.toordinal()): (收入, 支出)}
+        """
+        part, rows = self._select(user_id, start_date, end_date)
+        days: Dict[int, List[int]] = {}
+        if part is not None:
+            ctype, amount, ts_us, tz_offset = part.type, part.amount, part.ts_us, part.tz_offset
+            for i in rows:
+                day = (ts_us[i] + tz_offset[i] * 1000000) // _DAY_US + _EPOCH_ORDINAL
+                totals = days.get(day)
+                if totals is None:
+                    totals = days[day] = [0, 0]
+                totals[ctype[i]] += amount[i]
+        return {
+            day: (self._to_decimal(totals[_INCOME]), self._to_decimal(totals[_EXPENSE]))
+            for day, totals in days.items()
+        }
+
+
+def _bound_us(bound: datetime) -> int:
+    """查询边界换算为与存储列可比较的微秒数"""
+    if bound.tzinfo is None:
+        return (bound - _EPOCH) // timedelta(microseconds=1)
+    return (bound.replace(tzinfo=None) - bound.utcoffset() - _EPOCH) // timedelta(microseconds=1)
@@ -1,11 +1,16 @@
 """
 数据库管理类 - 使用JSON文件存储数据
 """
+import bisect
+import heapq
 import json
 import os
+import time
 import uuid
-from typing import List, Optional, Dict, Any, Callable
-from datetime import datetime
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Callable, Iterable, Iterator, NamedTuple, Tuple, Set
+from datetime import datetime, timedelta, timezone
 from decimal import Decimal
 
 from ..models.user import User
@@ -13,6 +18,406 @@ from ..models.entry import Entry
 from ..models.category import Category, CategoryType
 from ..models.tag import Tag
 from ..models.budget import Budget
+from .text_index import TextIndex
+from .columnar import ColumnarEntryStore
+from .rollup import DailyRollupStore
+from .registry import ReferenceRegistry
+
+
+# 撤销日志中表示"修改前记录不存在"的哨兵
+_MISSING = object()
+
+_EPOCH = datetime(1970, 1, 1)
+_EPOCH_UTC = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _normalize_query_args(
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    min_amount: Any,
+    max_amount: Any,
+    keyword: Optional[str]
+) -> Tuple[Optional[Decimal], Optional[Decimal], Optional[str]]:
+    """
+    校验并归一化 query_entries 的查询参数(各存储后端共用)
+
+    Returns:
+        (min_amount, max_amount, keyword) 归一化后的值
+
+    Raises:
+        TypeError / ValueError: 参数类型错误或组合明显不合法
+    """
+    if start_date is not None and not isinstance(start_date, datetime):
+        raise TypeError("start_date 必须是 datetime 或 None")
+    if end_date is not None and not isinstance(end_date, datetime):
+        raise TypeError("end_date 必须是 datetime 或 None")
+
+    if start_date is not None and end_date is not None and start_date > end_date:
+        raise ValueError("start_date 不能晚于 end_date")
+
+    # 时区一致性：避免 naive/aware datetime 比较触发 TypeError
+    # 约束：若 start/end 任一为 aware，则另一者也必须为 aware；并且后续 entry_time 也必须可比较
+    if start_date is not None and end_date is not None:
+        start_aware = start_date.tzinfo is not None
+        end_aware = end_date.tzinfo is not None
+        if start_aware != end_aware:
+            raise ValueError("start_date 和 end_date 的 tzinfo 必须一致（要么都带时区，要么都不带）")
+
+    # 金额参数：允许 Decimal / int / float / str 等可转换值，统一转为 Decimal
+    def _to_decimal(x, name: str) -> Optional[Decimal]:
+        if x is None:
+            return None
+        if isinstance(x, Decimal):
+            return x
+        try:
+            # 用 str 包一层，避免 float 二进制表示直接进 Decimal
+            return Decimal(str(x))
+        except Exception as e:
+            raise TypeError(f"{name} 无法转换为 Decimal: {e}")
+
+    min_amount = _to_decimal(min_amount, "min_amount")
+    max_amount = _to_decimal(max_amount, "max_amount")
+    if min_amount is not None and max_amount is not None and min_amount > max_amount:
+        raise ValueError("min_amount 不能大于 max_amount")
+
+    # keyword：空字符串视为未提供
+    if keyword is not None:
+        if not isinstance(keyword, str):
+            raise TypeError("keyword 必须是 str 或 None")
+        keyword = keyword.strip()
+        if keyword == "":
+            keyword = None
+
+    return min_amount, max_amount, keyword
+
+
+def validate_date_range(start_date: Optional[datetime], end_date: Optional[datetime]) -> None:
+    """
+    校验查询的日期范围(与 query_entries 的校验一致), 供统计等绕过查询直接读取
+    聚合结构的调用方使用
+
+    Raises:
+        TypeError / ValueError: 日期类型错误、起止顺序颠倒或时区形态不一致
+    """
+    _normalize_query_args(start_date, end_date, None, None, None)
+
+
+def _normalize_page_args(
+    limit: Optional[int],
+    after: Optional[Tuple[datetime, Any]]
+) -> Optional[Tuple[int, int, str]]:
+    """
+    校验分页参数, 并把游标换算为时间索引上的排序键
+
+    Args:
+        limit: 最多返回的条数(None 表示不限)
+        after: 上一页最后一条的 (timestamp, entry_id), 结果从它之后开始
+
+    Returns:
+        游标对应的排序键 (是否带时区, 微秒数, entry_id), 未提供游标时为 None
+
+    Raises:
+        TypeError / ValueError: 参数类型错误或取值不合法
+    """
+    if limit is not None:
+        if isinstance(limit, bool) or not isinstance(limit, int):
+            raise TypeError("limit 必须是 int 或 None")
+        if limit < 0:
+            raise ValueError("limit 不能为负数")
+
+    if after is None:
+        return None
+    try:
+        timestamp, entry_id = after
+    except (TypeError, ValueError):
+        raise TypeError("after 必须是 (timestamp, entry_id) 二元组")
+    if not isinstance(timestamp, datetime):
+        raise TypeError("after 中的 timestamp 必须是 datetime")
+    return (*_timestamp_key(timestamp), str(entry_id))
+
+
+def _normalize_email(email: str) -> str:
+    """邮箱索引使用的归一化形式(去除首尾空白并转小写)"""
+    return email.strip().lower()
+
+
+def _timestamp_key(dt: datetime) -> Tuple[int, int]:
+    """
+    将 datetime 转换为可直接比较的整数键 (是否带时区, 微秒数)
+
+    naive 时间按墙上时间计算距 1970-01-01 的微秒数, aware 时间换算为 UTC 微秒数;
+    naive 与 aware 的键按第一位区分, 互相之间不做比较。
+    """
+    if dt.tzinfo is None:
+        return 0, (dt - _EPOCH) // _MICROSECOND
+    return 1, (dt - _EPOCH_UTC) // _MICROSECOND
+
+
+def _timestamp_bounds(
+    start_date: Optional[datetime],
+    end_date: Optional[datetime]
+) -> Tuple[Optional[tuple], Optional[tuple]]:
+    """
+    日期范围换算为时间索引键上的半开区间 [lo, hi)
+
+    区间只覆盖与查询条件同形态(naive/aware)的键; 未给出日期时返回 (None, None)。
+    """
+    bound = start_date if start_date is not None else end_date
+    if bound is None:
+        return None, None
+    aware = int(bound.tzinfo is not None)
+    lo = _timestamp_key(start_date) if start_date is not None else (aware,)
+    hi = (aware, _timestamp_key(end_date)[1] + 1) if end_date is not None else (aware + 1,)
+    return lo, hi
+
+
+def _encode_amount(amount: Decimal) -> Tuple[int, int]:
+    """
+    金额拆分为 (整数最小单位, 十进制指数), amount == minor * 10 ** exponent
+
+    指数取金额自身的指数(Decimal('12.50') -> (1250, -2)), 还原时精度和写法不变。
+    """
+    sign, digits, exponent = amount.as_tuple()
+    if not isinstance(exponent, int):
+        raise ValueError(f"金额无法以整数形式存储: {amount}")
+    minor = int(''.join(map(str, digits)))
+    return (-minor if sign else minor), exponent
+
+
+def _decode_amount(minor: int, exponent: int) -> Decimal:
+    """(整数最小单位, 十进制指数) 还原为 Decimal"""
+    return Decimal(f"{minor}E{exponent}")
+
+
+def _encode_datetime(dt: datetime) -> Tuple[int, Optional[int]]:
+    """
+    时间拆分为 (微秒数, 时区偏移秒数)
+
+    微秒数与 _timestamp_key 相同(naive 为墙上时间, aware 为 UTC); naive 时间的
+    时区偏移为 None。
+    """
+    offset = dt.utcoffset()
+    return _timestamp_key(dt)[1], (None if offset is None else int(offset.total_seconds()))
+
+
+# 时区偏移秒数 -> timezone 对象
+_TIMEZONES: Dict[int, timezone] = {}
+
+
+def _decode_datetime(us: int, offset: Optional[int]) -> datetime:
+    """(微秒数, 时区偏移秒数) 还原为 datetime"""
+    if offset is None:
+        return _EPOCH + timedelta(microseconds=us)
+    tz = _TIMEZONES.get(offset)
+    if tz is None:
+        tz = _TIMEZONES[offset] = timezone(timedelta(seconds=offset))
+    return (_EPOCH_UTC + timedelta(microseconds=us)).astimezone(tz)
+
+
+# 存储形式中时间字段的前缀: <前缀>_us 为微秒数, <前缀>_offset 为时区偏移(仅 aware 时间)
+_TIME_FIELDS = {'timestamp': 'ts', 'created_at': 'created', 'updated_at': 'updated'}
+
+
+def _entry_category_id(entry_data: Dict[str, Any]) -> Optional[str]:
+    """账目记录引用的分类ID"""
+    return entry_data.get('category_id')
+
+
+def _entry_tag_ids(entry_data: Dict[str, Any]) -> List[str]:
+    """账目记录引用的标签ID列表"""
+    return entry_data.get('tag_ids') or []
+
+
+def _to_stored_entry(data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Entry.to_dict() 形式的字典转换为存储形式
+
+    内嵌的分类/标签字典只保留ID(category_id / tag_ids); 金额存为 amount_minor /
+    amount_exp 两个整数, 时间存为微秒数与时区偏移(见 _TIME_FIELDS)。其余字段及
+    顺序不变; 无法解析的金额/时间按原样保留, 这样的脏数据在查询时被跳过。
+    """
+    record: Dict[str, Any] = {}
+    for field, value in data.items():
+        if field == 'category':
+            record['category_id'] = (value or {}).get('category_id')
+        elif field == 'tags':
+            record['tag_ids'] = [
+                tag['tag_id'] for tag in value or () if isinstance(tag, dict) and tag.get('tag_id')
+            ]
+        elif field == 'amount':
+            try:
+                record['amount_minor'], record['amount_exp'] = _encode_amount(Decimal(str(value)))
+            except Exception:
+                record[field] = value
+        elif field in _TIME_FIELDS:
+            try:
+                us, offset = _encode_datetime(datetime.fromisoformat(value))
+            except (TypeError, ValueError):
+                record[field] = value
+                continue
+            prefix = _TIME_FIELDS[field]
+            record[prefix + '_us'] = us
+            if offset is not None:
+                record[prefix + '_offset'] = offset
+        else:
+            record[field] = value
+    return record
+
+
+def _from_stored_entry(record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    存储形式的账目还原为 Entry.from_dict 可用的字典(金额/时间为 Decimal/datetime)
+
+    分类/标签不在其中, 由调用方另行提供。
+
+    Raises:
+        KeyError: 记录缺少必需字段
+    """
+    data = {
+        'entry_id': record['entry_id'],
+        'user_id': record['user_id'],
+        'title': record['title'],
+        'amount': _decode_amount(record['amount_minor'], record['amount_exp']),
+        'currency': record['currency'],
+        'note': record.get('note'),
+        'timestamp': _decode_datetime(record['ts_us'], record.get('ts_offset')),
+        'images': record.get('images'),
+    }
+    for field in ('created_at', 'updated_at'):
+        prefix = _TIME_FIELDS[field]
+        us = record.get(prefix + '_us')
+        if us is not None:
+            data[field] = _decode_datetime(us, record.get(prefix + '_offset'))
+    return data
+
+
+def _index_add(index: Dict[Any, Set[str]], key: Any, entry_id: str) -> None:
+    """向 key -> entry_id 集合形式的索引中加入一条"""
+    index.setdefault(key, set()).add(entry_id)
+
+
+def _index_discard(index: Dict[Any, Set[str]], key: Any, entry_id: str) -> None:
+    """从 key -> entry_id 集合形式的索引中移除一条(集合为空时删除该键)"""
+    entry_ids = index.get(key)
+    if entry_ids is not None:
+        entry_ids.discard(entry_id)
+        if not entry_ids:
+            del index[key]
+
+
+# 向变更监听器通知的表
+_LISTENED_TABLES = ('entries', 'categories', 'budgets')
+
+# 变更监听器: (表名, 键, 提交后的对象; 已删除时为 None)
+ChangeListener = Callable[[str, str, Any], None]
+
+
+def _coalesce_changes(changes: Iterable[Tuple[str, str]]) -> List[Tuple[str, str]]:
+    """合并同一条记录的多次修改, 按最后一次修改的先后排列"""
+    latest: Dict[Tuple[str, str], None] = {}
+    for change in changes:
+        latest.pop(change, None)
+        latest[change] = None
+    return list(latest)
+
+
+def _notify_listeners(listeners: List[ChangeListener], table: str, key: str, value: Any) -> None:
+    """依次调用监听器; 修改已经提交, 监听器的异常只打印, 不影响写入结果"""
+    for listener in list(listeners):
+        try:
+            listener(table, key, value)
+        except Exception as e:
+            print(f"错误: 变更监听器出错: {e}")
+
+
+def _has_amount(entry_data: Dict[str, Any]) -> bool:
+    """记录中的金额是否完整(两个整数字段都存在)"""
+    return isinstance(entry_data.get('amount_minor'), int) and \
+        isinstance(entry_data.get('amount_exp'), int)
+
+
+class _MinorBounds(dict):
+    """
+    金额边界在各个十进制指数下对应的整数最小单位(按需计算并缓存)
+
+    amount_minor * 10 ** exponent >= bound 等价于 amount_minor >= ceil(bound / 10 ** exponent),
+    上界同理取 floor, 因此逐条比较只需要整数运算。
+    """
+
+    def __init__(self, bound: Decimal, ceil: bool):
+        super().__init__()
+        self.bound = bound
+        self.ceil = ceil
+
+    def __missing__(self, exponent: int) -> Any:
+        bound = self.bound
+        if not bound.is_finite():
+            # ±Infinity 与整数直接比较即可
+            value = float(bound)
+        else:
+            minor, bound_exp = _encode_amount(bound)
+            shift = bound_exp - exponent
+            if shift >= 0:
+                value = minor * 10 ** shift
+            elif self.ceil:
+                value = -(-minor // 10 ** -shift)
+            else:
+                value = minor // 10 ** -shift
+        self[exponent] = value
+        return value
+
+
+def _compile_row_predicates(
+    min_amount: Optional[Decimal],
+    max_amount: Optional[Decimal],
+    keyword: Optional[str]
+) -> List[Callable[[Dict[str, Any]], bool]]:
+    """
+    把逐条校验的查询条件编译为闭包列表
+
+    常量(金额边界、小写关键词)在编译时计算一次, 只包含实际生效的条件;
+    金额按整数最小单位比较(见 _MinorBounds), 金额缺失或非法的记录总是被排除。
+
+    Returns:
+        按顺序调用的判断函数列表, 全部返回 True 的记录才命中
+    """
+    predicates: List[Callable[[Dict[str, Any]], bool]] = []
+
+    lows = _MinorBounds(min_amount, ceil=True) if min_amount is not None else None
+    highs = _MinorBounds(max_amount, ceil=False) if max_amount is not None else None
+    if lows is not None and highs is not None:
+        def amount_ok(entry_data: Dict[str, Any]) -> bool:
+            return _has_amount(entry_data) and \
+                lows[entry_data['amount_exp']] <= entry_data['amount_minor'] <= highs[entry_data['amount_exp']]
+    elif lows is not None:
+        def amount_ok(entry_data: Dict[str, Any]) -> bool:
+            return _has_amount(entry_data) and entry_data['amount_minor'] >= lows[entry_data['amount_exp']]
+    elif highs is not None:
+        def amount_ok(entry_data: Dict[str, Any]) -> bool:
+            return _has_amount(entry_data) and entry_data['amount_minor'] <= highs[entry_data['amount_exp']]
+    else:
+        amount_ok = _has_amount
+    predicates.append(amount_ok)
+
+    if keyword:
+        needle = keyword.lower()
+
+        # 倒排索引的候选集只保证包含全部二字组合, 仍需确认子串
+        def keyword_ok(entry_data: Dict[str, Any]) -> bool:
+            return (needle in (entry_data.get('title') or "").lower()
+                    or needle in (entry_data.get('note') or "").lower())
+        predicates.append(keyword_ok)
+
+    return predicates
+
+
+class _IndexFilter(NamedTuple):
+    """查询计划中的一个集合索引条件"""
+    name: str
+    count: int
+    contains: Callable[[str], bool]
+    members: Callable[[], Iterable[str]]
 
 
 class Database:
@@ -20,31 +425,127 @@ class Database:
     数据库类 - 负责数据的持久化存储和查询
     使用JSON文件作为存储介质
     
+    日志模式(journal=True)下, 每次修改只向 ``<db_path>.journal`` 追加一行紧凑的
+    JSON 记录, 加载时在快照之上重放日志; 完整快照只在 checkpoint 时重写,
+    单次写入的代价与记录大小成正比, 而不是与整个数据库成正比。
+    
+    ``with db.transaction():`` 内的所有 save_*/delete_* 调用只在退出时持久化一次;
+    块内抛出异常时内存中的修改会被回滚, 且不会写入磁盘。
+    
+    账目记录解码出的字段(Decimal / datetime 等不可变值)按 entry_id 缓存(LRU),
+    同一条记录重复查询时跳过解析, 但每次都构造新的 Entry 对象, 调用方修改返回的
+    对象不会影响其他读取者, 需要保存时通过 save_entry 写回; 记录被保存或删除时
+    对应的缓存失效。账目上的 Category / Tag 对象由 ReferenceRegistry 在所有
+    账目间共享, 分类或标签被保存、删除时失效。
+    
     Attributes:
         db_path: 数据库文件路径
+        journal_path: 日志文件路径
+        journal: 是否启用追加日志模式
+        checkpoint_interval: 日志累计多少条记录后自动 checkpoint(0 表示不自动)
+        entry_cache_size: 解码缓存最多保留的账目数(0 表示不缓存)
+        columnar_store: 供统计聚合使用的列式存储(columnar=False 时为None)
+        rollup_store: 按 (用户, 日期, 分类) 增量维护的汇总(rollups=False 时为None)
         data: 内存中的数据字典
     """
     
-    def __init__(self, db_path: str = "pocket_ledger.json"):
+    # 默认分类: (名称, 类型, 图标)
+    # 数据文件结构版本(保存在 data['meta'] 中):
+    # 1 - 账目内嵌完整的分类/标签字典; 2 - 账目只保存 category_id / tag_ids;
+    # 3 - 金额存为整数最小单位 + 指数, 时间存为微秒数 + 时区偏移
+    SCHEMA_VERSION = 3
+    
+    DEFAULT_CATEGORIES = [
+        # 支出分类
+        ('餐饮', CategoryType.EXPENSE, '🍔'),
+        ('购物', CategoryType.EXPENSE, '🛍️'),
+        ('交通', CategoryType.EXPENSE, '🚗'),
+        ('娱乐', CategoryType.EXPENSE, '🎮'),
+        ('医疗', CategoryType.EXPENSE, '💊'),
+        ('教育', CategoryType.EXPENSE, '📚'),
+        ('住房', CategoryType.EXPENSE, '🏠'),
+        ('通讯', CategoryType.EXPENSE, '📱'),
+        ('其他支出', CategoryType.EXPENSE, '💸'),
+        # 收入分类
+        ('工资', CategoryType.INCOME, '💰'),
+        ('奖金', CategoryType.INCOME, '🎁'),
+        ('投资收益', CategoryType.INCOME, '📈'),
+        ('兼职', CategoryType.INCOME, '💼'),
+        ('其他收入', CategoryType.INCOME, '💵'),
+    ]
+    
+    def __init__(
+        self,
+        db_path: str = "pocket_ledger.json",
+        journal: bool = False,
+        checkpoint_interval: int = 1000,
+        entry_cache_size: int = 10000,
+        columnar: bool = True,
+        rollups: bool = True
+    ):
         """
         初始化数据库
         
         Args:
             db_path: 数据库文件路径
+            journal: 是否启用追加日志模式
+            checkpoint_interval: 自动 checkpoint 的日志记录数阈值
+            entry_cache_size: 解码缓存容量
+            columnar: 是否维护列式存储
+            rollups: 是否维护按日汇总
         """
+        if checkpoint_interval < 0:
+            raise ValueError("checkpoint_interval 不能为负数")
+        if entry_cache_size < 0:
+            raise ValueError("entry_cache_size 不能为负数")
+        
         self.db_path = db_path
+        self.journal_path = db_path + ".journal"
+        self.journal = journal
+        self.checkpoint_interval = checkpoint_interval
+        self.entry_cache_size = entry_cache_size
+        # entry_id -> _from_stored_entry 解码出的字段
+        self._entry_cache: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+        self._references = ReferenceRegistry()
+        self._columnar = columnar
+        self.columnar_store: Optional[ColumnarEntryStore] = None
+        self._rollups = rollups
+        self.rollup_store: Optional[DailyRollupStore] = None
         self.data: Dict[str, Any] = {
+            'meta': {'schema_version': self.SCHEMA_VERSION},
             'users': {},
             'entries': {},
             'categories': {},
             'tags': {},
             'budgets': {}
         }
+        # 尚未持久化的修改记录 / 日志中已累计的记录数
+        self._pending: List[Dict[str, Any]] = []
+        self._journal_records = 0
+        # 事务嵌套深度 / 事务内的撤销日志 (table, key, 修改前的记录)
+        self._batch_depth = 0
+        self._undo: List[Tuple[str, str, Any]] = []
+        # 变更监听器(见 add_listener)
+        self._listeners: List[ChangeListener] = []
+        # 二级索引: user_id / category_id / tag_id -> entry_id 集合
+        self._user_entries: Dict[str, Set[str]] = {}
+        self._category_entries: Dict[str, Set[str]] = {}
+        self._tag_entries: Dict[str, Set[str]] = {}
+        # 时间索引: user_id -> 按 (时区形态, 微秒数, entry_id) 升序排列的列表
+        self._user_timeline: Dict[str, List[Tuple[int, int, str]]] = {}
+        self._entry_ts_keys: Dict[str, Tuple[int, int]] = {}
+        # 全文索引: 标题/备注的字符二元组 -> entry_id 集合
+        self._text_index = TextIndex()
+        # 邮箱索引: 归一化邮箱 -> user_id 列表(历史数据可能有重复邮箱, 先注册的在前)
+        self._email_index: Dict[str, List[str]] = {}
         self._load_from_file()
+        self._rebuild_indexes()
         self._init_default_categories()
+        if self.journal and not os.path.exists(self.db_path):
+            self.checkpoint()
     
     def _load_from_file(self) -> None:
-        """从文件加载数据"""
+        """从文件加载数据(快照 + 日志重放)"""
         if os.path.exists(self.db_path):
             try:
                 with open(self.db_path, 'r', encoding='utf-8') as f:
@@ -53,43 +554,597 @@ class Database:
                 print(f"警告: 无法解析数据库文件 {self.db_path}, 使用空数据库")
             except Exception as e:
                 print(f"警告: 加载数据库文件时出错: {e}")
+        
+        self._journal_records = self._replay_journal()
+        migrated = self._migrate()
+        
+        # 非日志模式下打开了带日志的数据库: 合并进快照, 之后按整文件方式写入;
+        # 结构升级后同样立即写出新快照, 升级只发生一次
+        if migrated or (self._journal_records and not self.journal):
+            self.checkpoint()
+    
+    def _migrate(self) -> bool:
+        """
+        把旧版本的数据升级到当前结构
+        
+        Returns:
+            是否进行了升级
+        """
+        meta = self.data.setdefault('meta', {})
+        version = meta.get('schema_version', 1)
+        if version >= self.SCHEMA_VERSION:
+            return False
+        
+        entries = self.data.setdefault('entries', {})
+        if version < 2:
+            # 账目中内嵌的分类/标签移入共享表(表中已有同ID记录时以表中为准)
+            categories = self.data.setdefault('categories', {})
+            tags = self.data.setdefault('tags', {})
+            for entry_data in entries.values():
+                category = entry_data.get('category')
+                if isinstance(category, dict) and category.get('category_id'):
+                    categories.setdefault(category['category_id'], category)
+                for tag in entry_data.get('tags') or ():
+                    if isinstance(tag, dict) and tag.get('tag_id'):
+                        tags.setdefault(tag['tag_id'], tag)
+        # 内嵌引用改为ID、金额/时间字符串改为整数(已转换的字段原样保留)
+        for entry_id, entry_data in entries.items():
+            entries[entry_id] = _to_stored_entry(entry_data)
+        
+        meta['schema_version'] = self.SCHEMA_VERSION
+        return True
+    
+    def _replay_journal(self) -> int:
+        """
+        在内存数据上重放日志文件
+        
+        遇到损坏的行(通常是写入中途崩溃留下的半行, 包括没有换行结尾的最后一行)
+        时停止重放, 并把日志截断到最后一条完好记录的末尾; 否则之后追加的记录会
+        接在损坏的行后面, 下次加载时被一并丢弃。
+        
+        Returns:
+            成功重放的记录数
+        """
+        if not os.path.exists(self.journal_path):
+            return 0
+        
+        count = 0
+        good_offset = 0
+        torn = False
+        with open(self.journal_path, 'rb') as f:
+            for line_no, raw in enumerate(f, 1):
+                if not raw.endswith(b'\n'):
+                    torn = True
+                elif raw.strip():
+                    try:
+                        record = json.loads(raw.decode('utf-8'))
+                    except (UnicodeDecodeError, json.JSONDecodeError):
+                        torn = True
+                if torn:
+                    print(f"警告: 日志文件 {self.journal_path} 第 {line_no} 行损坏, 已丢弃其后的内容")
+                    break
+                good_offset += len(raw)
+                if not raw.strip():
+                    continue
+                table = self.data.setdefault(record['table'], {})
+                if record['op'] == 'put':
+                    table[record['key']] = record['value']
+                else:
+                    table.pop(record['key'], None)
+                count += 1
+        if torn:
+            os.truncate(self.journal_path, good_offset)
+        return count
+    
+    def _apply(self, table: str, key: str, value: Any) -> Any:
+        """
+        修改内存中的一条记录(value 为 _MISSING 表示删除)
+        
+        Returns:
+            修改前的记录, 不存在时为 _MISSING
+        """
+        rows = self.data[table]
+        old = rows.get(key, _MISSING)
+        if value is _MISSING:
+            rows.pop(key, None)
+        else:
+            rows[key] = value
+        if table == 'entries':
+            self._entry_cache.pop(key, None)
+            if old is not _MISSING:
+                self._unindex_entry(key, old)
+            if value is not _MISSING:
+                self._index_entry(key, value)
+        elif table in ('categories', 'tags'):
+            self._on_reference_change(table, key, old, value)
+        elif table == 'users':
+            if old is not _MISSING and value is not _MISSING and \
+                    _normalize_email(old['email']) == _normalize_email(value['email']):
+                return old  # 邮箱未变化, 索引无需调整
+            if old is not _MISSING:
+                self._unindex_user(key, old)
+            if value is not _MISSING:
+                self._index_user(key, value)
+        return old
+    
+    def _on_reference_change(self, table: str, key: str, old: Any, value: Any) -> None:
+        """
+        分类/标签变化后, 使它的共享实例失效
+        
+        账目只保存ID, 解码时才取分类/标签的当前内容, 因此改名无需改写账目;
+        分类的收支类型变化时还需重建这些账目的列式统计数据和按日累计数组。
+        """
+        self._references.discard(table, key)
+        index = self._category_entries if table == 'categories' else self._tag_entries
+        entry_ids = index.get(key)
+        if not entry_ids:
+            return
+        
+        old_type = old.get('type') if old is not _MISSING else None
+        new_type = value.get('type') if value is not _MISSING else None
+        if table != 'categories' or old_type == new_type:
+            return
+        if self.rollup_store is not None:
+            self.rollup_store.invalidate()
+        if self.columnar_store is not None:
+            rows = self.data['entries']
+            for entry_id in list(entry_ids):
+                self._unindex_entry(entry_id, rows[entry_id])
+                self._index_entry(entry_id, rows[entry_id])
+    
+    def _category_type(self, category_id: str) -> Optional[str]:
+        """分类当前的收支类型(CategoryType 的值), 分类不存在时为 None"""
+        category = self.data['categories'].get(category_id)
+        return category.get('type') if category is not None else None
+    
+    def _rebuild_indexes(self) -> None:
+        """根据内存数据重建全部二级索引(加载后调用)"""
+        self._user_entries = {}
+        self._category_entries = {}
+        self._tag_entries = {}
+        self._user_timeline = {}
+        self._entry_ts_keys = {}
+        self._text_index = TextIndex()
+        self._email_index = {}
+        self._entry_cache.clear()
+        self._references.clear()
+        self.columnar_store = ColumnarEntryStore() if self._columnar else None
+        self.rollup_store = DailyRollupStore(self._category_type) if self._rollups else None
+        for entry_id, entry_data in self.data['entries'].items():
+            self._index_entry(entry_id, entry_data)
+        for user_id, user_data in self.data['users'].items():
+            self._index_user(user_id, user_data)
+    
+    def _index_user(self, user_id: str, user_data: Dict[str, Any]) -> None:
+        """将用户加入邮箱索引"""
+        self._email_index.setdefault(_normalize_email(user_data['email']), []).append(user_id)
+    
+    def _unindex_user(self, user_id: str, user_data: Dict[str, Any]) -> None:
+        """将用户移出邮箱索引"""
+        email = _normalize_email(user_data['email'])
+        user_ids = self._email_index.get(email)
+        if user_ids is not None and user_id in user_ids:
+            user_ids.remove(user_id)
+            if not user_ids:
+                del self._email_index[email]
+    
+    def _index_entry(self, entry_id: str, entry_data: Dict[str, Any]) -> None:
+        """将一条账目加入二级索引"""
+        user_id = entry_data.get('user_id')
+        _index_add(self._user_entries, user_id, entry_id)
+        _index_add(self._category_entries, _entry_category_id(entry_data), entry_id)
+        for tag_id in set(_entry_tag_ids(entry_data)):
+            _index_add(self._tag_entries, tag_id, entry_id)
+        self._text_index.add(entry_id, (entry_data.get('title'), entry_data.get('note')))
+        
+        # 时间戳缺失或非法的脏数据不进入时间索引, 查询时自然被跳过
+        ts_us = entry_data.get('ts_us')
+        if not isinstance(ts_us, int):
+            return
+        ts_key = (int(entry_data.get('ts_offset') is not None), ts_us)
+        self._entry_ts_keys[entry_id] = ts_key
+        bisect.insort(self._user_timeline.setdefault(user_id, []), (*ts_key, entry_id))
+        if self.columnar_store is not None:
+            category = self.data['categories'].get(_entry_category_id(entry_data)) or {}
+            self.columnar_store.add(entry_id, entry_data, category.get('type'), ts_key)
+        if self.rollup_store is not None and _has_amount(entry_data):
+            self.rollup_store.add(
+                user_id, _entry_category_id(entry_data),
+                _decode_amount(entry_data['amount_minor'], entry_data['amount_exp']),
+                ts_us, entry_data.get('ts_offset')
+            )
+    
+    def _unindex_entry(self, entry_id: str, entry_data: Dict[str, Any]) -> None:
+        """将一条账目移出二级索引"""
+        user_id = entry_data.get('user_id')
+        _index_discard(self._user_entries, user_id, entry_id)
+        _index_discard(self._category_entries, _entry_category_id(entry_data), entry_id)
+        for tag_id in set(_entry_tag_ids(entry_data)):
+            _index_discard(self._tag_entries, tag_id, entry_id)
+        self._text_index.remove(entry_id)
+        if self.columnar_store is not None:
+            self.columnar_store.remove(user_id, entry_id)
+        
+        ts_key = self._entry_ts_keys.pop(entry_id, None)
+        if ts_key is None:
+            return
+        if self.rollup_store is not None and _has_amount(entry_data):
+            self.rollup_store.remove(
+                user_id, _entry_category_id(entry_data),
+                _decode_amount(entry_data['amount_minor'], entry_data['amount_exp']),
+                ts_key[1], entry_data.get('ts_offset')
+            )
+        timeline = self._user_timeline[user_id]
+        del timeline[bisect.bisect_left(timeline, (*ts_key, entry_id))]
+        if not timeline:
+            del self._user_timeline[user_id]
+    
+    def _put_entry(self, entry: Entry) -> None:
+        """
+        写入一条账目(存储形式)
+        
+        账目引用的分类/标签在共享表中不存在时一并写入; 已存在时以表中内容为准,
+        不会被账目对象上可能过期的副本覆盖。
+        """
+        category_id = str(entry.category.category_id)
+        if category_id not in self.data['categories']:
+            self._put('categories', category_id, entry.category.to_dict())
+        for tag in entry.tags:
+            tag_id = str(tag.tag_id)
+            if tag_id not in self.data['tags']:
+                self._put('tags', tag_id, tag.to_dict())
+        self._put('entries', str(entry.entry_id), _to_stored_entry(entry.to_dict()))
+    
+    def _decode_entry(self, entry_id: str, entry_data: Dict[str, Any]) -> Entry:
+        """
+        解码一条账目记录, 每次返回新的 Entry 对象
+        
+        解析出的字段优先取 LRU 缓存, 分类/标签取共享实例。
+        """
+        categories, tags = self.data['categories'], self.data['tags']
+        category_id = entry_data.get('category_id')
+        if category_id not in categories:
+            raise KeyError(f"账目 {entry_id} 引用的分类 {category_id} 不存在")
+        
+        cache = self._entry_cache
+        fields = cache.get(entry_id)
+        if fields is not None:
+            cache.move_to_end(entry_id)
+        else:
+            fields = _from_stored_entry(entry_data)
+            if self.entry_cache_size:
+                cache[entry_id] = fields
+                if len(cache) > self.entry_cache_size:
+                    cache.popitem(last=False)
+        
+        references = self._references
+        return Entry.from_dict(
+            fields,
+            category=references.category(category_id, lambda: categories[category_id]),
+            # 已被删除的标签直接略去
+            tags=[
+                references.tag(tag_id, lambda: tags[tag_id])
+                for tag_id in entry_data.get('tag_ids') or () if tag_id in tags
+            ]
+        )
+    
+    def _timeline_ranges(
+        self,
+        user_id: Optional[uuid.UUID],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        before: Optional[Tuple[int, int, str]] = None
+    ) -> List[Tuple[List[Tuple[int, int, str]], int, int]]:
+        """
+        在时间索引上定位落在日期范围内的区间
+        
+        日期范围通过二分查找定位; 带时区/不带时区的条目只与同形态的查询条件比较。
+        给出 before 时只保留排序键严格小于它的条目(即分页游标之后的部分)。
+        
+        Returns:
+            [(时间索引列表, lo, hi)], 每个用户一项
+        """
+        if user_id:
+            timeline = self._user_timeline.get(str(user_id))
+            timelines = [timeline] if timeline else []
+        else:
+            timelines = list(self._user_timeline.values())
+        
+        lo_key, hi_key = _timestamp_bounds(start_date, end_date)
+        ranges = []
+        for timeline in timelines:
+            lo, hi = 0, len(timeline)
+            if lo_key is not None:
+                lo = bisect.bisect_left(timeline, lo_key)
+                hi = bisect.bisect_left(timeline, hi_key, lo)
+            if before is not None:
+                hi = bisect.bisect_left(timeline, before, lo, hi)
+            if lo < hi:
+                ranges.append((timeline, lo, hi))
+        return ranges
+    
+    @staticmethod
+    def _iter_timeline(ranges: List[Tuple[List[Tuple[int, int, str]], int, int]]) -> Iterator[str]:
+        """按时间倒序(新的在前)产生各区间内的 entry_id, 多个用户的区间归并成一个序列"""
+        keys = [map(timeline.__getitem__, range(hi - 1, lo - 1, -1)) for timeline, lo, hi in ranges]
+        if len(keys) != 1:
+            keys = [heapq.merge(*keys, reverse=True)]
+        for key in keys[0]:
+            yield key[2]
+    
+    def _iter_index_candidates(
+        self,
+        driver: _IndexFilter,
+        filters: List[_IndexFilter],
+        user_id: Optional[uuid.UUID],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        before: Optional[Tuple[int, int, str]]
+    ) -> Iterator[str]:
+        """
+        集合驱动: 在驱动索引的候选集上做其余索引、用户和日期判断, 再按时间倒序产生
+        """
+        user_entries = self._user_entries.get(str(user_id), set()) if user_id else None
+        lo_key, hi_key = _timestamp_bounds(start_date, end_date)
+        ts_keys = self._entry_ts_keys
+        checks = [f.contains for f in filters]
+        keys = []
+        for entry_id in driver.members():
+            ts_key = ts_keys.get(entry_id)
+            if ts_key is None:
+                continue
+            if user_entries is not None and entry_id not in user_entries:
+                continue
+            if lo_key is not None and not lo_key <= ts_key < hi_key:
+                continue
+            key = (*ts_key, entry_id)
+            if before is not None and key >= before:
+                continue
+            for check in checks:
+                if not check(entry_id):
+                    break
+            else:
+                keys.append(key)
+        keys.sort(reverse=True)
+        for key in keys:
+            yield key[2]
+    
+    def _plan_query(
+        self,
+        user_id: Optional[uuid.UUID],
+        category_id: Optional[uuid.UUID],
+        tag_ids: Optional[List[uuid.UUID]],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        keyword: Optional[str],
+        before: Optional[Tuple[int, int, str]]
+    ) -> Dict[str, Any]:
+        """
+        为一次查询选择驱动索引
+        
+        先估算各索引给出的候选数: 时间索引(用户 + 日期范围 + 游标, 二分即可得到)、
+        分类索引、标签索引(各标签条目数之和, 是并集大小的上界)和关键词倒排索引。
+        候选最少的索引作为驱动, 其余索引按候选数从小到大做成员判断。时间索引驱动时
+        结果天然有序、凑满一页即可停止; 集合索引驱动时先过滤再按时间排序。
+        
+        Returns:
+            {'driver': 驱动索引名, 'steps': 执行步骤说明, 'candidates': 各索引候选数,
+             'ids': 按时间倒序产生满足全部索引条件的 entry_id 的迭代器}
+        """
+        ranges = self._timeline_ranges(user_id, start_date, end_date, before)
+        candidates = {'timeline': sum(hi - lo for _, lo, hi in ranges)}
+        
+        filters: List[_IndexFilter] = []
+        if category_id:
+            members = self._category_entries.get(str(category_id), set())
+            filters.append(_IndexFilter('category', len(members), members.__contains__, lambda: members))
+        if tag_ids:
+            tag_sets = [
+                self._tag_entries[key] for key in {str(tag_id) for tag_id in tag_ids}
+                if key in self._tag_entries
+            ]
+            filters.append(_IndexFilter(
+                'tags',
+                sum(len(entry_ids) for entry_ids in tag_sets),
+                lambda entry_id: any(entry_id in entry_ids for entry_ids in tag_sets),
+                lambda: set().union(*tag_sets)
+            ))
+        if keyword:
+            matches = self._text_index.search(keyword)
+            filters.append(_IndexFilter('keyword', len(matches), matches.__contains__, lambda: matches))
+        for f in filters:
+            candidates[f.name] = f.count
+        filters.sort(key=lambda f: f.count)
+        
+        if not filters or candidates['timeline'] <= filters[0].count:
+            steps = [f"按时间索引倒序扫描 (候选 {candidates['timeline']})"]
+            steps += [f"索引过滤 {f.name} (候选 {f.count})" for f in filters]
+            ids = self._iter_timeline(ranges)
+            # 最具选择性的条件在最内层, 最先被判断
+            for f in filters:
+                ids = filter(f.contains, ids)
+            driver = 'timeline'
+        else:
+            driver_filter, filters = filters[0], filters[1:]
+            steps = [f"取 {driver_filter.name} 索引候选集 (候选 {driver_filter.count})"]
+            steps += [f"索引过滤 {f.name} (候选 {f.count})" for f in filters]
+            steps.append("按用户/日期过滤并按时间倒序排序")
+            ids = self._iter_index_candidates(driver_filter, filters, user_id, start_date, end_date, before)
+            driver = driver_filter.name
+        return {'driver': driver, 'steps': steps, 'candidates': candidates, 'ids': ids}
+    
+    def _put(self, table: str, key: str, value: Dict[str, Any]) -> None:
+        """写入一条记录到内存, 并登记待持久化的修改"""
+        old = self._apply(table, key, value)
+        if self._batch_depth:
+            self._undo.append((table, key, old))
+        self._pending.append({'op': 'put', 'table': table, 'key': key, 'value': value})
+    
+    def _delete(self, table: str, key: str) -> None:
+        """从内存删除一条记录, 并登记待持久化的修改"""
+        old = self._apply(table, key, _MISSING)
+        if old is _MISSING:
+            raise KeyError(key)
+        if self._batch_depth:
+            self._undo.append((table, key, old))
+        self._pending.append({'op': 'del', 'table': table, 'key': key})
+    
+    @contextmanager
+    def transaction(self) -> Iterator['Database']:
+        """
+        批量修改的上下文管理器
+        
+        块内的修改只在最外层事务正常退出时持久化一次; 抛出异常时回滚块内的
+        内存修改并继续抛出。支持嵌套, 内层事务异常只回滚内层的修改。
+        
+        Yields:
+            数据库自身
+        """
+        undo_mark = len(self._undo)
+        pending_mark = len(self._pending)
+        self._batch_depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._batch_depth -= 1
+            self._rollback(undo_mark, pending_mark)
+            raise
+        
+        self._batch_depth -= 1
+        if self._batch_depth == 0:
+            self._undo = []
+            self._flush()
+    
+    # 与 transaction 等价的别名, 用于只关心"合并写入"的场景
+    batch = transaction
+    
+    def _rollback(self, undo_mark: int, pending_mark: int) -> None:
+        """撤销到指定位置之后的所有修改"""
+        while len(self._undo) > undo_mark:
+            table, key, old = self._undo.pop()
+            self._apply(table, key, old)
+        del self._pending[pending_mark:]
+    
+    def _flush(self) -> None:
+        """持久化所有待写入的修改(事务内推迟到最外层事务结束)"""
+        if self._batch_depth or not self._pending:
+            return
+        # 写入成功后才清空: 写入失败时修改仍留在 _pending 中, 下次持久化时重试
+        records = self._pending
+        if not self.journal:
+            self._save_to_file()
+            self._pending = []
+        else:
+            self._append_to_journal(records)
+            self._pending = []
+            if self.checkpoint_interval and self._journal_records >= self.checkpoint_interval:
+                self.checkpoint()
+        
+        if self._listeners:
+            self._notify(
+                (record['table'], record['key']) for record in records
+                if record['table'] in _LISTENED_TABLES
+            )
+    
+    # ========== 变更监听 ==========
+    
+    def add_listener(self, listener: ChangeListener) -> None:
+        """
+        注册变更监听器
+        
+        账目、分类、预算的修改持久化之后(事务内推迟到最外层事务提交之后, 回滚的
+        修改不会通知), 以 listener(表名, 键, 对象) 的形式逐条通知; 表名为
+        'entries' / 'categories' / 'budgets', 对象为提交后的 Entry / Category /
+        Budget, 记录已删除时为 None。同一事务内多次修改同一条记录只通知一次。
+        
+        Args:
+            listener: 监听函数
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: ChangeListener) -> None:
+        """
+        注销变更监听器(未注册时忽略)
+        
+        Args:
+            listener: 监听函数
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def _notify(self, changes: Iterable[Tuple[str, str]]) -> None:
+        """读取修改后的记录并通知监听器"""
+        for table, key in _coalesce_changes(changes):
+            record = self.data[table].get(key)
+            value = None
+            if record is not None:
+                try:
+                    if table == 'entries':
+                        value = self._decode_entry(key, record)
+                    elif table == 'categories':
+                        value = Category.from_dict(record)
+                    else:
+                        value = Budget.from_dict(record)
+                except Exception:
+                    # 无法解码的脏数据按不存在处理
+                    value = None
+            _notify_listeners(self._listeners, table, key, value)
+    
+    def _append_to_journal(self, records: Iterable[Dict[str, Any]]) -> None:
+        """向日志文件追加记录(每条一行); 写入失败时截掉本次写出的部分"""
+        lines = [
+            json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+            for record in records
+        ]
+        size = os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+        try:
+            with open(self.journal_path, 'a', encoding='utf-8') as f:
+                f.writelines(lines)
+        except Exception as e:
+            print(f"错误: 写入日志文件时出错: {e}")
+            try:
+                os.truncate(self.journal_path, size)
+            except OSError:
+                pass
+            raise
+        self._journal_records += len(lines)
+    
+    def checkpoint(self) -> None:
+        """
+        将内存数据写成完整快照并清空日志
+        
+        快照先写入临时文件再原子替换(见 _save_to_file), 写入中途崩溃时旧快照
+        保持完好; 替换完成后才截断日志, 两步之间崩溃时重放的日志记录都是幂等的
+        覆盖/删除, 不会破坏数据。
+        """
+        self._save_to_file()
+        if os.path.exists(self.journal_path):
+            open(self.journal_path, 'w', encoding='utf-8').close()
+        self._journal_records = 0
     
     def _save_to_file(self) -> None:
-        """保存数据到文件"""
+        """保存数据到文件(写入同目录的临时文件, fsync 后替换原文件)"""
+        tmp_path = self.db_path + ".tmp"
         try:
-            with open(self.db_path, 'w', encoding='utf-8') as f:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 json.dump(self.data, f, ensure_ascii=False, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.db_path)
         except Exception as e:
             print(f"错误: 保存数据库文件时出错: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
             raise
     
     def _init_default_categories(self) -> None:
         """初始化默认分类"""
         if not self.data['categories']:
-            default_categories = [
-                # 支出分类
-                ('餐饮', CategoryType.EXPENSE, '🍔'),
-                ('购物', CategoryType.EXPENSE, '🛍️'),
-                ('交通', CategoryType.EXPENSE, '🚗'),
-                ('娱乐', CategoryType.EXPENSE, '🎮'),
-                ('医疗', CategoryType.EXPENSE, '💊'),
-                ('教育', CategoryType.EXPENSE, '📚'),
-                ('住房', CategoryType.EXPENSE, '🏠'),
-                ('通讯', CategoryType.EXPENSE, '📱'),
-                ('其他支出', CategoryType.EXPENSE, '💸'),
-                # 收入分类
-                ('工资', CategoryType.INCOME, '💰'),
-                ('奖金', CategoryType.INCOME, '🎁'),
-                ('投资收益', CategoryType.INCOME, '📈'),
-                ('兼职', CategoryType.INCOME, '💼'),
-                ('其他收入', CategoryType.INCOME, '💵'),
-            ]
-            
-            for name, cat_type, icon in default_categories:
+            for name, cat_type, icon in self.DEFAULT_CATEGORIES:
                 category = Category(name=name, category_type=cat_type, icon=icon)
-                self.data['categories'][str(category.category_id)] = category.to_dict()
+                self._put('categories', str(category.category_id), category.to_dict())
             
-            self._save_to_file()
+            self._flush()
     
     # ========== 用户相关操作 ==========
     
@@ -104,8 +1159,8 @@ class Database:
             是否保存成功
         """
         try:
-            self.data['users'][str(user.user_id)] = user.to_dict()
-            self._save_to_file()
+            self._put('users', str(user.user_id), user.to_dict())
+            self._flush()
             return True
         except Exception as e:
             print(f"保存用户失败: {e}")
@@ -128,7 +1183,7 @@ class Database:
     
     def get_user_by_email(self, email: str) -> Optional[User]:
         """
-        通过邮箱获取用户
+        通过邮箱获取用户(不区分大小写, 忽略首尾空白)
         
         Args:
             email: 邮箱地址
@@ -136,10 +1191,10 @@ class Database:
         Returns:
             用户对象或None
         """
-        for user_data in self.data['users'].values():
-            if user_data['email'] == email:
-                return User.from_dict(user_data)
-        return None
+        user_ids = self._email_index.get(_normalize_email(email))
+        if not user_ids:
+            return None
+        return User.from_dict(self.data['users'][user_ids[0]])
     
     def delete_user(self, user_id: uuid.UUID) -> bool:
         """
@@ -156,15 +1211,12 @@ class Database:
             return False
 
         # 删除用户记录
-        del self.data['users'][user_id_str]
+        self._delete('users', user_id_str)
 
-        # 收集并删除该用户的所有账目条目
-        entries_to_delete = [
-            eid for eid, ed in self.data['entries'].items()
-            if ed.get('user_id') == user_id_str
-        ]
+        # 通过用户索引收集并删除该用户的所有账目条目
+        entries_to_delete = list(self._user_entries.get(user_id_str, ()))
         for eid in entries_to_delete:
-            del self.data['entries'][eid]
+            self._delete('entries', eid)
 
         # 删除该用户的预算
         budgets_to_delete = [
@@ -172,10 +1224,10 @@ class Database:
             if bd.get('user_id') == user_id_str
         ]
         for bid in budgets_to_delete:
-            del self.data['budgets'][bid]
+            self._delete('budgets', bid)
 
         # 持久化并返回成功
-        self._save_to_file()
+        self._flush()
         return True
     
     # ========== 账目条目相关操作 ==========
@@ -191,13 +1243,32 @@ class Database:
             是否保存成功
         """
         try:
-            self.data['entries'][str(entry.entry_id)] = entry.to_dict()
-            self._save_to_file()
+            with self.transaction():
+                self._put_entry(entry)
             return True
         except Exception as e:
             print(f"保存账目失败: {e}")
             return False
     
+    def save_entries(self, entries: Iterable[Entry]) -> bool:
+        """
+        批量保存账目条目, 所有条目只持久化一次
+        
+        Args:
+            entries: 账目条目对象序列
+            
+        Returns:
+            是否保存成功(失败时不会写入任何条目)
+        """
+        try:
+            with self.transaction():
+                for entry in entries:
+                    self._put_entry(entry)
+            return True
+        except Exception as e:
+            print(f"批量保存账目失败: {e}")
+            return False
+    
     def get_entry_by_id(self, entry_id: uuid.UUID) -> Optional[Entry]:
         """
         通过ID获取账目条目
@@ -208,9 +1279,10 @@ class Database:
         Returns:
             条目对象或None
         """
-        entry_data = self.data['entries'].get(str(entry_id))
+        entry_id_str = str(entry_id)
+        entry_data = self.data['entries'].get(entry_id_str)
         if entry_data:
-            return Entry.from_dict(entry_data)
+            return self._decode_entry(entry_id_str, entry_data)
         return None
     
     def delete_entry(self, entry_id: uuid.UUID) -> bool:
@@ -225,8 +1297,8 @@ class Database:
         """
         entry_id_str = str(entry_id)
         if entry_id_str in self.data['entries']:
-            del self.data['entries'][entry_id_str]
-            self._save_to_file()
+            self._delete('entries', entry_id_str)
+            self._flush()
             return True
         return False
     
@@ -239,7 +1311,9 @@ class Database:
         end_date: Optional[datetime] = None,
         min_amount: Optional[Decimal] = None,
         max_amount: Optional[Decimal] = None,
-        keyword: Optional[str] = None
+        keyword: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None
     ) -> List[Entry]:
         """
         查询账目条目（带输入校验）
@@ -247,120 +1321,143 @@ class Database:
         设计原则：
         - 对“参数组合明显不合法”的情况（如 start_date > end_date）直接抛 ValueError，避免静默返回空结果。
         - 对存量数据中单条记录字段异常（如 timestamp 无法解析）采取跳过，避免整个查询崩溃。
+
+        分页：
+        - 结果按 (是否带时区, 时间, entry_id) 倒序排列，带时区的条目排在前面。
+        - limit 限制返回条数，凑满一页即停止扫描和解码。
+        - after 为上一页最后一条的 (timestamp, entry_id)，本次从它之后继续。
         """
-        # -------- 参数校验 / 归一化（建议放在最前面） --------
-        if start_date is not None and not isinstance(start_date, datetime):
-            raise TypeError("start_date 必须是 datetime 或 None")
-        if end_date is not None and not isinstance(end_date, datetime):
-            raise TypeError("end_date 必须是 datetime 或 None")
-
-        if start_date is not None and end_date is not None and start_date > end_date:
-            raise ValueError("start_date 不能晚于 end_date")
-
-        # 时区一致性：避免 naive/aware datetime 比较触发 TypeError
-        # 约束：若 start/end 任一为 aware，则另一者也必须为 aware；并且后续 entry_time 也必须可比较
-        if start_date is not None and end_date is not None:
-            start_aware = start_date.tzinfo is not None
-            end_aware = end_date.tzinfo is not None
-            if start_aware != end_aware:
-                raise ValueError("start_date 和 end_date 的 tzinfo 必须一致（要么都带时区，要么都不带）")
-
-        # 金额参数：允许 Decimal / int / float / str 等可转换值，统一转为 Decimal
-        def _to_decimal(x, name: str) -> Optional[Decimal]:
-            if x is None:
-                return None
-            if isinstance(x, Decimal):
-                return x
-            try:
-                # 用 str 包一层，避免 float 二进制表示直接进 Decimal
-                return Decimal(str(x))
-            except Exception as e:
-                raise TypeError(f"{name} 无法转换为 Decimal: {e}")
-
-        min_amount = _to_decimal(min_amount, "min_amount")
-        max_amount = _to_decimal(max_amount, "max_amount")
-        if min_amount is not None and max_amount is not None and min_amount > max_amount:
-            raise ValueError("min_amount 不能大于 max_amount")
-
-        # keyword：空字符串视为未提供
-        if keyword is not None:
-            if not isinstance(keyword, str):
-                raise TypeError("keyword 必须是 str 或 None")
-            keyword = keyword.strip()
-            if keyword == "":
-                keyword = None
-
-        results: List[Entry] = []
-
-        for entry_data in self.data['entries'].values():
-            # -------- 用户ID过滤 --------
-            if user_id and entry_data.get('user_id') != str(user_id):
-                continue
+        return list(self.iter_entries(
+            user_id=user_id,
+            category_id=category_id,
+            tag_ids=tag_ids,
+            start_date=start_date,
+            end_date=end_date,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            keyword=keyword,
+            limit=limit,
+            after=after
+        ))
 
-            # -------- 分类ID过滤 --------
-            if category_id:
-                cat = entry_data.get('category') or {}
-                if cat.get('category_id') != str(category_id):
-                    continue
+    def iter_entries(
+        self,
+        user_id: Optional[uuid.UUID] = None,
+        category_id: Optional[uuid.UUID] = None,
+        tag_ids: Optional[List[uuid.UUID]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        min_amount: Optional[Decimal] = None,
+        max_amount: Optional[Decimal] = None,
+        keyword: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None
+    ) -> Iterator[Entry]:
+        """
+        逐条产生账目条目(参数、顺序与 query_entries 相同)
 
-            # -------- 标签过滤（任一匹配即可）--------
-            if tag_ids:
-                entry_tag_ids = [tag.get('tag_id') for tag in entry_data.get('tags', []) if isinstance(tag, dict)]
-                # entry_tag_ids 里可能有 None，直接用 membership 判断即可
-                if not any(str(tag_id) in entry_tag_ids for tag_id in tag_ids):
-                    continue
+        参数在调用时立即校验; 条目在迭代时才逐条过滤和解码, 不会一次性构造结果列表。
+        迭代期间不应修改账目(需要边读边改时先用 query_entries 取出列表)。
+        """
+        # -------- 参数校验 / 归一化（建议放在最前面） --------
+        min_amount, max_amount, keyword = _normalize_query_args(
+            start_date, end_date, min_amount, max_amount, keyword
+        )
+        cursor = _normalize_page_args(limit, after)
+        return self._iter_matches(
+            user_id, category_id, tag_ids, start_date, end_date,
+            min_amount, max_amount, keyword, limit, cursor
+        )
 
-            # -------- 日期过滤 --------
-            ts = entry_data.get('timestamp')
-            if not ts:
-                # 脏数据：没有时间戳，跳过
-                continue
-            try:
-                entry_time = datetime.fromisoformat(ts)
-            except ValueError:
-                # 脏数据：timestamp 非法，跳过（也可改为 raise）
-                continue
+    def _iter_matches(
+        self,
+        user_id: Optional[uuid.UUID],
+        category_id: Optional[uuid.UUID],
+        tag_ids: Optional[List[uuid.UUID]],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        min_amount: Optional[Decimal],
+        max_amount: Optional[Decimal],
+        keyword: Optional[str],
+        limit: Optional[int],
+        cursor: Optional[Tuple[int, int, str]],
+        stats: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Entry]:
+        """
+        iter_entries 的生成器主体(参数已归一化)
 
-            # 若查询条件是 aware datetime，但 entry_time 是 naive（或反之），比较会 TypeError
-            if start_date is not None:
-                if (start_date.tzinfo is not None) != (entry_time.tzinfo is not None):
-                    # 数据与条件时区形态不一致：跳过该条（也可改为 raise，视项目策略）
-                    continue
-                if entry_time < start_date:
-                    continue
-            if end_date is not None:
-                if (end_date.tzinfo is not None) != (entry_time.tzinfo is not None):
-                    continue
-                if entry_time > end_date:
-                    continue
+        用户、日期、分类、标签和关键词候选由查询计划通过索引完成, 这里只对
+        候选记录执行编译好的金额与关键词子串校验。给出 stats 时记录计划与扫描计数。
+        """
+        if limit == 0:
+            return
 
-            # -------- 金额过滤 --------
-            amt_raw = entry_data.get('amount')
-            if amt_raw is None:
-                continue
-            try:
-                entry_amount = Decimal(str(amt_raw))
-            except Exception:
-                continue
+        # -------- 索引过滤：由查询计划选出候选最少的索引驱动，结果按时间倒序 --------
+        plan = self._plan_query(user_id, category_id, tag_ids, start_date, end_date, keyword, cursor)
+        if stats is not None:
+            stats.update(driver=plan['driver'], steps=plan['steps'], candidates=plan['candidates'], scanned=0)
 
-            if min_amount is not None and entry_amount < min_amount:
-                continue
-            if max_amount is not None and entry_amount > max_amount:
-                continue
+        # -------- 逐条校验：金额、关键词子串，编译为只含生效条件的闭包列表 --------
+        predicates = _compile_row_predicates(min_amount, max_amount, keyword)
+        rows = self.data['entries']
+        decode = self._decode_entry
+        produced = 0
+        for entry_id in plan['ids']:
+            entry_data = rows[entry_id]
+            if stats is not None:
+                stats['scanned'] += 1
+            for predicate in predicates:
+                if not predicate(entry_data):
+                    break
+            else:
+                yield decode(entry_id, entry_data)
+                produced += 1
+                if limit is not None and produced >= limit:
+                    return
 
-            # -------- 关键词搜索（标题或备注）--------
-            if keyword:
-                title = (entry_data.get('title') or "")
-                note = (entry_data.get('note') or "")
-                keyword_lower = keyword.lower()
-                if (keyword_lower not in title.lower() and keyword_lower not in note.lower()):
-                    continue
+    def explain_query(
+        self,
+        user_id: Optional[uuid.UUID] = None,
+        category_id: Optional[uuid.UUID] = None,
+        tag_ids: Optional[List[uuid.UUID]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        min_amount: Optional[Decimal] = None,
+        max_amount: Optional[Decimal] = None,
+        keyword: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None
+    ) -> Dict[str, Any]:
+        """
+        说明一次查询的执行计划(参数与 query_entries 相同)
 
-            results.append(Entry.from_dict(entry_data))
+        会实际执行一遍查询(不保留结果)。
 
-        # 按时间倒序排序
-        results.sort(key=lambda e: e.timestamp, reverse=True)
-        return results
+        Returns:
+            {
+                'driver': 驱动索引(timeline/category/tags/keyword),
+                'steps': 执行步骤说明,
+                'candidates': 各索引的候选数,
+                'scanned': 经索引过滤后逐条校验的记录数,
+                'matched': 最终命中的条目数,
+                'elapsed_ms': 耗时(毫秒)
+            }
+        """
+        started = time.perf_counter()
+        min_amount, max_amount, keyword = _normalize_query_args(
+            start_date, end_date, min_amount, max_amount, keyword
+        )
+        cursor = _normalize_page_args(limit, after)
+        stats: Dict[str, Any] = {'driver': None, 'steps': [], 'candidates': {}, 'scanned': 0}
+        matched = 0
+        for _ in self._iter_matches(
+            user_id, category_id, tag_ids, start_date, end_date,
+            min_amount, max_amount, keyword, limit, cursor, stats
+        ):
+            matched += 1
+        stats['matched'] = matched
+        stats['elapsed_ms'] = (time.perf_counter() - started) * 1000
+        return stats
     
     # ========== 分类相关操作 ==========
     
@@ -375,8 +1472,8 @@ class Database:
             是否保存成功
         """
         try:
-            self.data['categories'][str(category.category_id)] = category.to_dict()
-            self._save_to_file()
+            self._put('categories', str(category.category_id), category.to_dict())
+            self._flush()
             return True
         except Exception as e:
             print(f"保存分类失败: {e}")
@@ -424,7 +1521,7 @@ class Database:
     
     def delete_category(self, category_id: uuid.UUID) -> bool:
         """
-        删除分类
+        删除分类(仍有账目引用该分类时拒绝删除)
         
         Args:
             category_id: 分类ID
@@ -433,9 +1530,11 @@ class Database:
             是否删除成功
         """
         category_id_str = str(category_id)
+        if self._category_entries.get(category_id_str):
+            return False
         if category_id_str in self.data['categories']:
-            del self.data['categories'][category_id_str]
-            self._save_to_file()
+            self._delete('categories', category_id_str)
+            self._flush()
             return True
         return False
     
@@ -452,8 +1551,8 @@ class Database:
             是否保存成功
         """
         try:
-            self.data['tags'][str(tag.tag_id)] = tag.to_dict()
-            self._save_to_file()
+            self._put('tags', str(tag.tag_id), tag.to_dict())
+            self._flush()
             return True
         except Exception as e:
             print(f"保存标签失败: {e}")
@@ -485,7 +1584,7 @@ class Database:
     
     def delete_tag(self, tag_id: uuid.UUID) -> bool:
         """
-        删除标签
+        删除标签(同时从引用它的账目中移除)
         
         Args:
             tag_id: 标签ID
@@ -494,11 +1593,16 @@ class Database:
             是否删除成功
         """
         tag_id_str = str(tag_id)
-        if tag_id_str in self.data['tags']:
-            del self.data['tags'][tag_id_str]
-            self._save_to_file()
-            return True
-        return False
+        if tag_id_str not in self.data['tags']:
+            return False
+        with self.transaction():
+            rows = self.data['entries']
+            for entry_id in list(self._tag_entries.get(tag_id_str, ())):
+                entry_data = dict(rows[entry_id])
+                entry_data['tag_ids'] = [t for t in entry_data['tag_ids'] if t != tag_id_str]
+                self._put('entries', entry_id, entry_data)
+            self._delete('tags', tag_id_str)
+        return True
     
     # ========== 预算相关操作 ==========
     
@@ -513,8 +1617,8 @@ class Database:
             是否保存成功
         """
         try:
-            self.data['budgets'][str(budget.budget_id)] = budget.to_dict()
-            self._save_to_file()
+            self._put('budgets', str(budget.budget_id), budget.to_dict())
+            self._flush()
             return True
         except Exception as e:
             print(f"保存预算失败: {e}")
@@ -563,19 +1667,28 @@ class Database:
         """
         budget_id_str = str(budget_id)
         if budget_id_str in self.data['budgets']:
-            del self.data['budgets'][budget_id_str]
-            self._save_to_file()
+            self._delete('budgets', budget_id_str)
+            self._flush()
             return True
         return False
     
     def clear_all_data(self) -> None:
         """清空所有数据(危险操作!)"""
+        removed = [
+            (table, key) for table in _LISTENED_TABLES for key in self.data[table]
+        ] if self._listeners else []
         self.data = {
+            'meta': {'schema_version': self.SCHEMA_VERSION},
             'users': {},
             'entries': {},
             'categories': {},
             'tags': {},
             'budgets': {}
         }
-        self._save_to_file()
+        self._pending = []
+        self._undo = []
+        self._rebuild_indexes()
+        self.checkpoint()
+        if removed:
+            self._notify(removed)
         self._init_default_categories()
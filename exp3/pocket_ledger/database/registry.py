@@ -0,0 +1,117 @@
+"""
+引用对象注册表 - 解码账目时共享 Category / Tag 实例
+"""
+from typing import Any, Callable, Dict, Type, TypeVar
+
+from ..models.category import Category
+from ..models.tag import Tag
+
+
+_T = TypeVar('_T', Category, Tag)
+
+
+class _SharedCategory(Category):
+    """只读的共享分类实例(复制得到可修改的 Category)"""
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("账目上的分类是共享的只读实例, 请通过 get_category_by_id 取得副本再修改")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("账目上的分类是共享的只读实例")
+
+    def __reduce__(self):
+        return Category.from_dict, (self.to_dict(),)
+
+
+class _SharedTag(Tag):
+    """只读的共享标签实例(复制得到可修改的 Tag)"""
+
+    __slots__ = ()
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError("账目上的标签是共享的只读实例, 请通过 get_tag_by_id 取得副本再修改")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError("账目上的标签是共享的只读实例")
+
+    def __reduce__(self):
+        return Tag.from_dict, (self.to_dict(),)
+
+
+def _freeze(source: _T, shared_cls: Type[_T]) -> _T:
+    """把刚解码的对象转成只读的共享实例"""
+    shared = shared_cls.__new__(shared_cls)
+    for name in type(source).__slots__:
+        object.__setattr__(shared, name, getattr(source, name))
+    return shared
+
+
+class ReferenceRegistry:
+    """
+    分类与标签的享元表
+
+    同一个 category_id / tag_id 在解码账目时只构造一次, 之后所有账目引用同一个
+    实例。分类或标签被保存、删除时由数据库使对应项失效, 下次解码重新构造。
+
+    这些实例被多条账目共享, 因此是只读的: 修改属性(包括 rename 等方法)会抛出
+    AttributeError, 避免通过一条账目改动其他账目。需要修改时通过
+    get_category_by_id / get_tag_by_id 取得独立副本(或 copy.copy)再保存。
+
+    Attributes:
+        categories: category_id -> Category
+        tags: tag_id -> Tag
+    """
+
+    def __init__(self):
+        """初始化空注册表"""
+        self.categories: Dict[str, Category] = {}
+        self.tags: Dict[str, Tag] = {}
+
+    def category(self, category_id: str, load: Callable[[], Dict[str, Any]]) -> Category:
+        """
+        取分类的共享只读实例
+
+        Args:
+            category_id: 分类ID
+            load: 实例不存在时提供分类字典的函数
+
+        Returns:
+            Category 对象
+        """
+        category = self.categories.get(category_id)
+        if category is None:
+            category = self.categories[category_id] = _freeze(Category.from_dict(load()), _SharedCategory)
+        return category
+
+    def tag(self, tag_id: str, load: Callable[[], Dict[str, Any]]) -> Tag:
+        """
+        取标签的共享只读实例
+
+        Args:
+            tag_id: 标签ID
+            load: 实例不存在时提供标签字典的函数
+
+        Returns:
+            Tag 对象
+        """
+        tag = self.tags.get(tag_id)
+        if tag is None:
+            tag = self.tags[tag_id] = _freeze(Tag.from_dict(load()), _SharedTag)
+        return tag
+
+    def discard(self, table: str, key: str) -> None:
+        """
+        使一个分类或标签的共享实例失效
+
+        Args:
+            table: 'categories' 或 'tags'
+            key: 分类ID或标签ID
+        """
+        (self.categories if table == 'categories' else self.tags).pop(key, None)
+
+    def clear(self) -> None:
+        """清空全部共享实例"""
+        self.categories.clear()
+        self.tags.clear()
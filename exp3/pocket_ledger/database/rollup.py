@@ -0,0 +1,328 @@
+"""
+按日汇总 - 为统计引擎维护增量更新的 (用户, 日期, 分类) 聚合
+"""
+from datetime import datetime, time
+from decimal import Decimal
+from typing import Callable, Dict, List, Optional, Tuple
+
+from ..models.category import CategoryType
+
+
+_EPOCH_ORDINAL = datetime(1970, 1, 1).toordinal()
+_DAY_US = 86400 * 1000000
+
+# 日期序数 -> {category_id: [金额合计, 笔数]}
+DayBuckets = Dict[int, Dict[str, List]]
+
+_ZERO = Decimal('0')
+
+
+class _DailySeries:
+    """单个用户、单个时区偏移下按日累计的收入/支出/笔数(下标 i 对应日期 base + i)"""
+
+    def __init__(self, base: int, end: int):
+        self.base = base
+        self.end = end
+        self.income: List[Decimal] = []
+        self.expense: List[Decimal] = []
+        self.count: List[int] = []
+        # 从该下标起累计值已过期, 查询前重新计算
+        self.dirty = 0
+
+    def totals(self, lo: Optional[int], hi: Optional[int]) -> Tuple[Decimal, Decimal, int]:
+        """日期序数闭区间 [lo, hi] 内的 (收入, 支出, 笔数), 两次查表一次相减"""
+        first = 0 if lo is None else max(lo - self.base, 0)
+        last = len(self.income) - 1 if hi is None else min(hi - self.base, len(self.income) - 1)
+        if first > last:
+            return _ZERO, _ZERO, 0
+        if first == 0:
+            return self.income[last], self.expense[last], self.count[last]
+        return (self.income[last] - self.income[first - 1],
+                self.expense[last] - self.expense[first - 1],
+                self.count[last] - self.count[first - 1])
+
+
+class DailyRollupStore:
+    """
+    按日汇总存储
+
+    以 (用户, 时区偏移, 日期, 分类) 为键保存金额合计与笔数, 保存/删除账目时 O(1)
+    增减; 收支类型不入键, 查询时按分类的当前类型归类, 分类改类型无需重算。
+
+    日期取账目自身时区下的日期; naive 账目的时区偏移记为 None。整天对齐的日期范围
+    可以完全由汇总回答, 不需要读取账目。
+
+    在此之上按 (用户, 时区偏移) 维护逐日累计的收入/支出/笔数数组(前缀和), 任意整天
+    范围的合计只需两次查表和一次相减。账目增删时只记录数组从哪一天起过期,
+    下次查询时从该处向后重算; 分类改变收支类型时调用 invalidate 全部重建。
+    """
+
+    def __init__(self, category_type: Callable[[str], Optional[str]]):
+        """
+        初始化空存储
+
+        Args:
+            category_type: 由 category_id 取分类当前收支类型(CategoryType 的值)的函数,
+                分类不存在时返回 None
+        """
+        self._category_type = category_type
+        # user_id -> 时区偏移秒数(naive 为 None) -> 日期序数 -> {category_id: [合计, 笔数]}
+        self._users: Dict[str, Dict[Optional[int], DayBuckets]] = {}
+        # (user_id, 时区偏移) -> 逐日累计数组(首次查询时建立)
+        self._series: Dict[Tuple[str, Optional[int]], _DailySeries] = {}
+
+    @staticmethod
+    def _day(ts_us: int, offset: Optional[int]) -> int:
+        """账目所在日期(账目自身时区)的序数"""
+        return (ts_us + (offset or 0) * 1000000) // _DAY_US + _EPOCH_ORDINAL
+
+    def add(
+        self,
+        user_id: str,
+        category_id: str,
+        amount: Decimal,
+        ts_us: int,
+        offset: Optional[int]
+    ) -> None:
+        """
+        计入一条账目
+
+        Args:
+            user_id: 用户ID
+            category_id: 分类ID
+            amount: 金额
+            ts_us: 时间戳微秒数(naive 为墙上时间, aware 为 UTC)
+            offset: 时区偏移秒数(naive 为 None)
+        """
+        day = self._day(ts_us, offset)
+        days = self._users.setdefault(user_id, {}).setdefault(offset, {})
+        categories = days.setdefault(day, {})
+        cell = categories.get(category_id)
+        if cell is None:
+            categories[category_id] = [amount, 1]
+        else:
+            cell[0] += amount
+            cell[1] += 1
+        self._touch(user_id, offset, day)
+
+    def remove(
+        self,
+        user_id: str,
+        category_id: str,
+        amount: Decimal,
+        ts_us: int,
+        offset: Optional[int]
+    ) -> None:
+        """
+        扣除一条账目(参数与 add 时相同)
+        """
+        zones = self._users.get(user_id)
+        days = zones.get(offset) if zones is not None else None
+        day = self._day(ts_us, offset)
+        categories = days.get(day) if days is not None else None
+        cell = categories.get(category_id) if categories is not None else None
+        if cell is None:
+            return
+        cell[0] -= amount
+        cell[1] -= 1
+        self._touch(user_id, offset, day)
+        if cell[1]:
+            return
+        # 笔数归零时逐级删除空键, 不留下 0 金额的桶
+        del categories[category_id]
+        if not categories:
+            del days[day]
+            if not days:
+                del zones[offset]
+                self._series.pop((user_id, offset), None)
+                if not zones:
+                    del self._users[user_id]
+
+    def _touch(self, user_id: str, offset: Optional[int], day: int) -> None:
+        """记录某一天的汇总发生变化, 对应累计数组从这一天起过期"""
+        series = self._series.get((user_id, offset))
+        if series is None:
+            return
+        if day < series.base:
+            # 早于数组起点: 下次查询时整体重建
+            del self._series[(user_id, offset)]
+            return
+        series.dirty = min(series.dirty, day - series.base)
+        series.end = max(series.end, day)
+
+    def invalidate(self) -> None:
+        """丢弃全部累计数组(分类收支类型变化后调用)"""
+        self._series.clear()
+
+    def _split(self, categories: Dict[str, List]) -> Tuple[Decimal, Decimal, int]:
+        """一天内各分类的合计按当前收支类型归为 (收入, 支出, 笔数); 分类不存在时忽略"""
+        income = expense = _ZERO
+        total = 0
+        for category_id, (amount, count) in categories.items():
+            category_type = self._category_type(category_id)
+            if category_type is None:
+                continue
+            if category_type == CategoryType.INCOME.value:
+                income += amount
+            else:
+                expense += amount
+            total += count
+        return income, expense, total
+
+    def _series_for(self, user_id: str, offset: Optional[int]) -> Optional[_DailySeries]:
+        """取最新的累计数组: 必要时建立, 或从过期处向后重算"""
+        days = self._users.get(user_id, {}).get(offset)
+        if not days:
+            return None
+        series = self._series.get((user_id, offset))
+        if series is None:
+            series = self._series[(user_id, offset)] = _DailySeries(min(days), max(days))
+        length = series.end - series.base + 1
+        if series.dirty >= length:
+            return series
+
+        income, expense, count = series.income, series.expense, series.count
+        del income[series.dirty:], expense[series.dirty:], count[series.dirty:]
+        running_income = income[-1] if income else _ZERO
+        running_expense = expense[-1] if expense else _ZERO
+        running_count = count[-1] if count else 0
+        for day in range(series.base + series.dirty, series.end + 1):
+            categories = days.get(day)
+            if categories:
+                day_income, day_expense, day_count = self._split(categories)
+                running_income += day_income
+                running_expense += day_expense
+                running_count += day_count
+            income.append(running_income)
+            expense.append(running_expense)
+            count.append(running_count)
+        series.dirty = length
+        return series
+
+    def _resolve(
+        self,
+        zones: Dict[Optional[int], DayBuckets],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> Optional[Tuple[List[Optional[int]], Optional[int], Optional[int]]]:
+        """
+        把查询范围换算为 (参与的时区偏移列表, 起始日期序数, 结束日期序数)
+
+        与 query_entries 的边界语义一致: 未给出日期时包含全部账目; 否则只包含与
+        查询条件同形态(naive/aware)的账目。范围必须整天对齐(起点为 00:00:00,
+        终点为 23:59:59.999999); aware 范围还要求用户的 aware 账目都与查询处于
+        同一时区偏移。不满足时返回 None。
+        """
+        if start_date is None and end_date is None:
+            return list(zones), None, None
+        if start_date is not None and start_date.time() != time.min:
+            return None
+        if end_date is not None and end_date.time() != time.max:
+            return None
+
+        bound = start_date if start_date is not None else end_date
+        if bound.tzinfo is None:
+            offset = None
+        else:
+            if start_date is not None and end_date is not None and \
+                    start_date.utcoffset() != end_date.utcoffset():
+                return None
+            offset = int(bound.utcoffset().total_seconds())
+            if any(key is not None and key != offset for key in zones):
+                return None
+        lo = start_date.toordinal() if start_date is not None else None
+        hi = end_date.toordinal() if end_date is not None else None
+        return [offset], lo, hi
+
+    def totals(
+        self,
+        user_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Optional[Tuple[Decimal, Decimal, int]]:
+        """
+        日期范围内的收支合计与笔数(范围要求同 collect)
+
+        Returns:
+            (收入合计, 支出合计, 笔数), 无法回答时返回 None
+        """
+        resolved = self._resolve(self._users.get(user_id, {}), start_date, end_date)
+        if resolved is None:
+            return None
+        offsets, lo, hi = resolved
+        income = expense = _ZERO
+        count = 0
+        for offset in offsets:
+            series = self._series_for(user_id, offset)
+            if series is not None:
+                zone_income, zone_expense, zone_count = series.totals(lo, hi)
+                income += zone_income
+                expense += zone_expense
+                count += zone_count
+        return income, expense, count
+
+    def daily(
+        self,
+        user_id: str,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Optional[Dict[int, Tuple[Decimal, Decimal]]]:
+        """
+        日期范围内有账目的各天收支(范围要求同 collect, 起止日期都必须给出)
+
+        Returns:
+            {日期序数: (收入, 支出)}, 无法回答时返回 None
+        """
+        zones = self._users.get(user_id, {})
+        resolved = self._resolve(zones, start_date, end_date)
+        if resolved is None:
+            return None
+        (offset,), lo, hi = resolved
+        series = self._series_for(user_id, offset)
+        if series is None:
+            return {}
+        days = zones[offset]
+        income, expense = series.income, series.expense
+        result = {}
+        for day in range(max(lo, series.base), min(hi, series.end) + 1):
+            if day in days:
+                i = day - series.base
+                if i == 0:
+                    result[day] = (income[0], expense[0])
+                else:
+                    result[day] = (income[i] - income[i - 1], expense[i] - expense[i - 1])
+        return result
+
+    def collect(
+        self,
+        user_id: str,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None
+    ) -> Optional[List[Tuple[int, Dict[str, List]]]]:
+        """
+        取日期范围内的汇总
+
+        与 query_entries 的边界语义一致: 未给出日期时包含全部账目; 否则只包含与
+        查询条件同形态(naive/aware)的账目。范围必须整天对齐(起点为 00:00:00,
+        终点为 23:59:59.999999); aware 范围还要求用户的 aware 账目都与查询处于
+        同一时区偏移, 否则无法只靠按日汇总回答。
+
+        Returns:
+            [(日期序数, {category_id: [合计, 笔数]})], 无法回答时返回 None
+        """
+        zones = self._users.get(user_id, {})
+        resolved = self._resolve(zones, start_date, end_date)
+        if resolved is None:
+            return None
+        offsets, lo, hi = resolved
+        if len(offsets) != 1:
+            return [item for days in zones.values() for item in days.items()]
+
+        days = zones.get(offsets[0], {})
+        if lo is not None and hi is not None and hi - lo < len(days):
+            # 范围比已有日期数少时按日期逐日取
+            return [(day, days[day]) for day in range(lo, hi + 1) if day in days]
+        return [
+            (day, categories) for day, categories in days.items()
+            if (lo is None or day >= lo) and (hi is None or day <= hi)
+        ]
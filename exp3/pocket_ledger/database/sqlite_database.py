@@ -0,0 +1,932 @@
+"""
+SQLite 数据库 - 与 Database 相同的接口, 使用标准库 sqlite3 存储数据
+"""
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Sequence, Tuple
+from datetime import datetime
+from decimal import Decimal
+
+from ..models.user import User
+from ..models.entry import Entry
+from ..models.category import Category, CategoryType
+from ..models.tag import Tag
+from ..models.budget import Budget
+from .database import (
+    ChangeListener, Database, _coalesce_changes, _normalize_page_args, _normalize_query_args,
+    _notify_listeners, _timestamp_key
+)
+from .registry import ReferenceRegistry
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id       TEXT PRIMARY KEY,
+    email         TEXT NOT NULL,
+    phone         TEXT NOT NULL,
+    password_hash TEXT NOT NULL,
+    nickname      TEXT NOT NULL,
+    avatar_path   TEXT,
+    created_at    TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_users_email ON users (email COLLATE NOCASE);
+
+CREATE TABLE IF NOT EXISTS categories (
+    category_id TEXT PRIMARY KEY,
+    name        TEXT NOT NULL,
+    type        TEXT NOT NULL,
+    icon        TEXT,
+    description TEXT
+);
+
+CREATE TABLE IF NOT EXISTS tags (
+    tag_id      TEXT PRIMARY KEY,
+    name        TEXT NOT NULL,
+    color       TEXT,
+    description TEXT
+);
+
+CREATE TABLE IF NOT EXISTS entries (
+    entry_id    TEXT PRIMARY KEY,
+    user_id     TEXT NOT NULL,
+    category_id TEXT NOT NULL,
+    title       TEXT NOT NULL,
+    amount      TEXT NOT NULL,
+    currency    TEXT NOT NULL,
+    note        TEXT NOT NULL,
+    timestamp   TEXT NOT NULL,
+    ts_aware    INTEGER NOT NULL,
+    ts_key      INTEGER NOT NULL,
+    images      TEXT NOT NULL,
+    created_at  TEXT NOT NULL,
+    updated_at  TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_entries_user_ts ON entries (user_id, ts_aware, ts_key, entry_id);
+CREATE INDEX IF NOT EXISTS idx_entries_user_category ON entries (user_id, category_id);
+
+CREATE TABLE IF NOT EXISTS entry_tags (
+    entry_id TEXT NOT NULL,
+    tag_id   TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (entry_id, tag_id)
+);
+CREATE INDEX IF NOT EXISTS idx_entry_tags_tag ON entry_tags (tag_id);
+
+CREATE TABLE IF NOT EXISTS budgets (
+    budget_id         TEXT PRIMARY KEY,
+    user_id           TEXT NOT NULL,
+    category_id       TEXT,
+    period            TEXT NOT NULL,
+    limit_amount      TEXT NOT NULL,
+    threshold_percent INTEGER NOT NULL,
+    is_active         INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_budgets_user ON budgets (user_id);
+"""
+
+_ENTRY_COLUMNS = (
+    "e.entry_id, e.user_id, e.title, e.amount, e.currency, e.note, e.timestamp, "
+    "e.images, e.created_at, e.updated_at, "
+    "c.category_id, c.name, c.type, c.icon, c.description"
+)
+
+# SQLite 单条语句允许的绑定参数个数有上限, IN (...) 查询按此大小分块
+_IN_CHUNK = 500
+
+
+def _lower(text: Optional[str]) -> str:
+    """供 SQL 调用的小写函数(SQLite 内置 lower 只处理 ASCII)"""
+    return text.lower() if text else ""
+
+
+class SqliteDatabase:
+    """
+    SQLite 数据库类 - 与 Database 保持相同的公共方法
+
+    用户、分类、标签、账目、预算各自一张表, 账目与标签的多对多关系存放在
+    entry_tags 表; 账目在 (user_id, ts_key)、(user_id, category_id) 上建索引,
+    用户在 email 上建索引, 查询时的过滤和排序都交给 SQL 完成。
+
+    账目只保存 category_id, 读取时从分类表关联出分类信息; 保存账目时若其分类或
+    标签尚未入库, 会一并写入。解码出的账目共享同一批 Category / Tag 对象
+    (ReferenceRegistry), 分类或标签被保存、删除时失效。
+
+    Attributes:
+        db_path: 数据库文件路径
+    """
+
+    def __init__(self, db_path: str = "pocket_ledger.db"):
+        """
+        初始化数据库
+
+        Args:
+            db_path: 数据库文件路径(":memory:" 表示内存数据库)
+        """
+        self.db_path = db_path
+        # isolation_level=None: 由 transaction() 通过 SAVEPOINT 显式管理事务
+        self._conn = sqlite3.connect(db_path, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.create_function("pl_lower", 1, _lower, deterministic=True)
+        self._depth = 0
+        self._references = ReferenceRegistry()
+        # 变更监听器 / 当前事务内待通知的 (表名, 键)
+        self._listeners: List[ChangeListener] = []
+        self._changes: List[Tuple[str, str]] = []
+        self._conn.executescript(_SCHEMA)
+        self._init_default_categories()
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        self._conn.close()
+
+    def checkpoint(self) -> None:
+        """与 Database 接口保持一致; SQLite 每次提交即已持久化"""
+
+    @contextmanager
+    def transaction(self) -> Iterator['SqliteDatabase']:
+        """
+        批量修改的上下文管理器
+
+        最外层事务正常退出时提交; 抛出异常时回滚块内的修改并继续抛出。
+        支持嵌套(基于 SAVEPOINT), 内层事务异常只回滚内层的修改。
+
+        Yields:
+            数据库自身
+        """
+        savepoint = f"sp{self._depth}"
+        changes_mark = len(self._changes)
+        self._conn.execute(f"SAVEPOINT {savepoint}")
+        self._depth += 1
+        try:
+            yield self
+        except BaseException:
+            self._depth -= 1
+            self._conn.execute(f"ROLLBACK TO {savepoint}")
+            self._conn.execute(f"RELEASE {savepoint}")
+            # 回滚的分类/标签修改可能已被解码进共享实例
+            self._references.clear()
+            del self._changes[changes_mark:]
+            raise
+
+        self._depth -= 1
+        self._conn.execute(f"RELEASE {savepoint}")
+        if self._depth == 0 and self._changes:
+            changes, self._changes = self._changes, []
+            self._notify(changes)
+
+    batch = transaction
+
+    # ========== 变更监听 ==========
+
+    def add_listener(self, listener: ChangeListener) -> None:
+        """
+        注册变更监听器(语义同 Database.add_listener: 最外层事务提交后通知)
+
+        Args:
+            listener: 监听函数
+        """
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: ChangeListener) -> None:
+        """
+        注销变更监听器(未注册时忽略)
+
+        Args:
+            listener: 监听函数
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
+    def _changed(self, table: str, keys: Iterable[str]) -> None:
+        """登记事务内修改过的记录(没有监听器时不登记)"""
+        if self._listeners:
+            self._changes.extend((table, key) for key in keys)
+
+    def _ids(self, sql: str, params: Sequence[Any]) -> List[str]:
+        """没有监听器时不查询; 否则返回查询结果的第一列(用于在批量删除前取得ID)"""
+        if not self._listeners:
+            return []
+        return [row[0] for row in self._conn.execute(sql, params)]
+
+    def _notify(self, changes: List[Tuple[str, str]]) -> None:
+        """读取提交后的记录并通知监听器; 账目按 ID 分块批量解码"""
+        changes = _coalesce_changes(changes)
+        entry_ids = [key for table, key in changes if table == 'entries']
+        entries: Dict[str, Entry] = {}
+        for i in range(0, len(entry_ids), _IN_CHUNK):
+            chunk = entry_ids[i:i + _IN_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            rows = self._conn.execute(
+                f"SELECT {_ENTRY_COLUMNS} FROM entries e "
+                "JOIN categories c ON c.category_id = e.category_id "
+                f"WHERE e.entry_id IN ({placeholders})",
+                chunk
+            ).fetchall()
+            for entry in self._decode_entries(rows):
+                entries[str(entry.entry_id)] = entry
+
+        for table, key in changes:
+            if table == 'entries':
+                value = entries.get(key)
+            elif table == 'categories':
+                value = self.get_category_by_id(key)
+            else:
+                value = self.get_budget_by_id(key)
+            _notify_listeners(self._listeners, table, key, value)
+
+    def _init_default_categories(self) -> None:
+        """初始化默认分类"""
+        if self._conn.execute("SELECT 1 FROM categories LIMIT 1").fetchone():
+            return
+
+        with self.transaction():
+            for name, cat_type, icon in Database.DEFAULT_CATEGORIES:
+                self._upsert_category(Category(name=name, category_type=cat_type, icon=icon))
+
+    # ========== 用户相关操作 ==========
+
+    def save_user(self, user: User) -> bool:
+        """
+        保存用户
+
+        Args:
+            user: 用户对象
+
+        Returns:
+            是否保存成功
+        """
+        try:
+            data = user.to_dict()
+            with self.transaction():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO users "
+                    "(user_id, email, phone, password_hash, nickname, avatar_path, created_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (data['user_id'], data['email'], data['phone'], data['password_hash'],
+                     data['nickname'], data['avatar_path'], data['created_at'])
+                )
+            return True
+        except Exception as e:
+            print(f"保存用户失败: {e}")
+            return False
+
+    def get_user_by_id(self, user_id: uuid.UUID) -> Optional[User]:
+        """
+        通过ID获取用户
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            用户对象或None
+        """
+        row = self._conn.execute(
+            "SELECT * FROM users WHERE user_id = ?", (str(user_id),)
+        ).fetchone()
+        return User.from_dict(dict(row)) if row else None
+
+    def get_user_by_email(self, email: str) -> Optional[User]:
+        """
+        通过邮箱获取用户(不区分大小写, 忽略首尾空白; 走 email 索引)
+
+        Args:
+            email: 邮箱地址
+
+        Returns:
+            用户对象或None
+        """
+        row = self._conn.execute(
+            "SELECT * FROM users WHERE email = ? COLLATE NOCASE ORDER BY rowid LIMIT 1",
+            (email.strip(),)
+        ).fetchone()
+        return User.from_dict(dict(row)) if row else None
+
+    def delete_user(self, user_id: uuid.UUID) -> bool:
+        """
+        删除用户(连同其账目与预算)
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            是否删除成功
+        """
+        user_id_str = str(user_id)
+        with self.transaction():
+            cur = self._conn.execute("DELETE FROM users WHERE user_id = ?", (user_id_str,))
+            if cur.rowcount == 0:
+                return False
+            self._changed('entries', self._ids(
+                "SELECT entry_id FROM entries WHERE user_id = ?", (user_id_str,)
+            ))
+            self._changed('budgets', self._ids(
+                "SELECT budget_id FROM budgets WHERE user_id = ?", (user_id_str,)
+            ))
+            self._conn.execute(
+                "DELETE FROM entry_tags WHERE entry_id IN "
+                "(SELECT entry_id FROM entries WHERE user_id = ?)",
+                (user_id_str,)
+            )
+            self._conn.execute("DELETE FROM entries WHERE user_id = ?", (user_id_str,))
+            self._conn.execute("DELETE FROM budgets WHERE user_id = ?", (user_id_str,))
+        return True
+
+    # ========== 账目条目相关操作 ==========
+
+    def _write_entry(self, entry: Entry) -> None:
+        """写入一条账目及其标签关联(需在事务内调用)"""
+        data = entry.to_dict()
+        ts_aware, ts_key = _timestamp_key(entry.timestamp)
+
+        cur = self._conn.execute(
+            "INSERT OR IGNORE INTO categories (category_id, name, type, icon, description) "
+            "VALUES (:category_id, :name, :type, :icon, :description)",
+            data['category']
+        )
+        if cur.rowcount:
+            self._changed('categories', (data['category']['category_id'],))
+        self._conn.execute(
+            "INSERT OR REPLACE INTO entries "
+            "(entry_id, user_id, category_id, title, amount, currency, note, timestamp, "
+            "ts_aware, ts_key, images, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (data['entry_id'], data['user_id'], data['category']['category_id'], data['title'],
+             data['amount'], data['currency'], data['note'], data['timestamp'],
+             ts_aware, ts_key, json.dumps(data['images'], ensure_ascii=False),
+             data['created_at'], data['updated_at'])
+        )
+        self._conn.execute("DELETE FROM entry_tags WHERE entry_id = ?", (data['entry_id'],))
+        for position, tag_data in enumerate(data['tags']):
+            self._conn.execute(
+                "INSERT OR IGNORE INTO tags (tag_id, name, color, description) "
+                "VALUES (:tag_id, :name, :color, :description)",
+                tag_data
+            )
+            self._conn.execute(
+                "INSERT OR IGNORE INTO entry_tags (entry_id, tag_id, position) VALUES (?, ?, ?)",
+                (data['entry_id'], tag_data['tag_id'], position)
+            )
+        self._changed('entries', (data['entry_id'],))
+
+    def save_entry(self, entry: Entry) -> bool:
+        """
+        保存账目条目
+
+        Args:
+            entry: 账目条目对象
+
+        Returns:
+            是否保存成功
+        """
+        try:
+            with self.transaction():
+                self._write_entry(entry)
+            return True
+        except Exception as e:
+            print(f"保存账目失败: {e}")
+            return False
+
+    def save_entries(self, entries: Iterable[Entry]) -> bool:
+        """
+        批量保存账目条目, 在同一个事务内提交
+
+        Args:
+            entries: 账目条目对象序列
+
+        Returns:
+            是否保存成功(失败时不会写入任何条目)
+        """
+        try:
+            with self.transaction():
+                for entry in entries:
+                    self._write_entry(entry)
+            return True
+        except Exception as e:
+            print(f"批量保存账目失败: {e}")
+            return False
+
+    def get_entry_by_id(self, entry_id: uuid.UUID) -> Optional[Entry]:
+        """
+        通过ID获取账目条目
+
+        Args:
+            entry_id: 条目ID
+
+        Returns:
+            条目对象或None
+        """
+        rows = self._conn.execute(
+            f"SELECT {_ENTRY_COLUMNS} FROM entries e "
+            "JOIN categories c ON c.category_id = e.category_id WHERE e.entry_id = ?",
+            (str(entry_id),)
+        ).fetchall()
+        entries = self._decode_entries(rows)
+        return entries[0] if entries else None
+
+    def delete_entry(self, entry_id: uuid.UUID) -> bool:
+        """
+        删除账目条目
+
+        Args:
+            entry_id: 条目ID
+
+        Returns:
+            是否删除成功
+        """
+        entry_id_str = str(entry_id)
+        with self.transaction():
+            cur = self._conn.execute("DELETE FROM entries WHERE entry_id = ?", (entry_id_str,))
+            self._conn.execute("DELETE FROM entry_tags WHERE entry_id = ?", (entry_id_str,))
+            if cur.rowcount:
+                self._changed('entries', (entry_id_str,))
+        return cur.rowcount > 0
+
+    def query_entries(
+        self,
+        user_id: Optional[uuid.UUID] = None,
+        category_id: Optional[uuid.UUID] = None,
+        tag_ids: Optional[List[uuid.UUID]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        min_amount: Optional[Decimal] = None,
+        max_amount: Optional[Decimal] = None,
+        keyword: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None
+    ) -> List[Entry]:
+        """
+        查询账目条目(参数校验、排序与分页语义与 Database.query_entries 一致)
+        """
+        return list(self.iter_entries(
+            user_id=user_id,
+            category_id=category_id,
+            tag_ids=tag_ids,
+            start_date=start_date,
+            end_date=end_date,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            keyword=keyword,
+            limit=limit,
+            after=after
+        ))
+
+    def iter_entries(
+        self,
+        user_id: Optional[uuid.UUID] = None,
+        category_id: Optional[uuid.UUID] = None,
+        tag_ids: Optional[List[uuid.UUID]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        min_amount: Optional[Decimal] = None,
+        max_amount: Optional[Decimal] = None,
+        keyword: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None
+    ) -> Iterator[Entry]:
+        """
+        逐条产生账目条目(参数、顺序与 query_entries 相同)
+
+        用户、分类、标签、日期、关键词过滤与排序在 SQL 中完成; 结果按块取回并解码,
+        金额以字符串保存以保证精度, 范围过滤在取回时按 Decimal 比较, 凑满 limit 即停止。
+        """
+        min_amount, max_amount, keyword = _normalize_query_args(
+            start_date, end_date, min_amount, max_amount, keyword
+        )
+        cursor = _normalize_page_args(limit, after)
+        sql, params = self._entry_query(
+            user_id, category_id, tag_ids, start_date, end_date, min_amount, max_amount, keyword, limit, cursor
+        )
+        return self._iter_rows(sql, params, min_amount, max_amount, limit)
+
+    def explain_query(
+        self,
+        user_id: Optional[uuid.UUID] = None,
+        category_id: Optional[uuid.UUID] = None,
+        tag_ids: Optional[List[uuid.UUID]] = None,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        min_amount: Optional[Decimal] = None,
+        max_amount: Optional[Decimal] = None,
+        keyword: Optional[str] = None,
+        limit: Optional[int] = None,
+        after: Optional[Tuple[datetime, uuid.UUID]] = None
+    ) -> Dict[str, Any]:
+        """
+        说明一次查询的执行计划(返回结构与 Database.explain_query 相同)
+
+        执行计划由 SQLite 选择, steps 为 EXPLAIN QUERY PLAN 的输出; SQLite 不提供
+        各索引的候选数估计, candidates 为空。
+        """
+        started = time.perf_counter()
+        min_amount, max_amount, keyword = _normalize_query_args(
+            start_date, end_date, min_amount, max_amount, keyword
+        )
+        cursor = _normalize_page_args(limit, after)
+        sql, params = self._entry_query(
+            user_id, category_id, tag_ids, start_date, end_date, min_amount, max_amount, keyword, limit, cursor
+        )
+        steps = [row['detail'] for row in self._conn.execute("EXPLAIN QUERY PLAN " + sql, params)]
+        stats: Dict[str, Any] = {'driver': 'sqlite', 'steps': steps, 'candidates': {}, 'scanned': 0}
+        stats['matched'] = sum(1 for _ in self._iter_rows(sql, params, min_amount, max_amount, limit, stats))
+        stats['elapsed_ms'] = (time.perf_counter() - started) * 1000
+        return stats
+
+    @staticmethod
+    def _entry_query(
+        user_id: Optional[uuid.UUID],
+        category_id: Optional[uuid.UUID],
+        tag_ids: Optional[List[uuid.UUID]],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        min_amount: Optional[Decimal],
+        max_amount: Optional[Decimal],
+        keyword: Optional[str],
+        limit: Optional[int],
+        cursor: Optional[Tuple[int, int, str]]
+    ) -> Tuple[str, List[Any]]:
+        """生成账目查询的 SQL 与参数(参数已归一化, 金额范围不在 SQL 中过滤)"""
+        where: List[str] = []
+        params: List[Any] = []
+
+        if user_id:
+            where.append("e.user_id = ?")
+            params.append(str(user_id))
+        if category_id:
+            where.append("e.category_id = ?")
+            params.append(str(category_id))
+        if tag_ids:
+            placeholders = ", ".join("?" for _ in tag_ids)
+            where.append(
+                "EXISTS (SELECT 1 FROM entry_tags t WHERE t.entry_id = e.entry_id "
+                f"AND t.tag_id IN ({placeholders}))"
+            )
+            params.extend(str(tag_id) for tag_id in tag_ids)
+        # 与 Database 一致: 带时区/不带时区的时间互不比较, 形态不一致的条目被跳过
+        for bound, op in ((start_date, ">="), (end_date, "<=")):
+            if bound is not None:
+                aware, key = _timestamp_key(bound)
+                where.append(f"e.ts_aware = ? AND e.ts_key {op} ?")
+                params.extend((aware, key))
+        if keyword:
+            where.append("(instr(pl_lower(e.title), ?) > 0 OR instr(pl_lower(e.note), ?) > 0)")
+            params.extend((keyword.lower(), keyword.lower()))
+        if cursor is not None:
+            where.append("(e.ts_aware, e.ts_key, e.entry_id) < (?, ?, ?)")
+            params.extend(cursor)
+
+        amount_filter = min_amount is not None or max_amount is not None
+        sql = (
+            f"SELECT {_ENTRY_COLUMNS} FROM entries e "
+            "JOIN categories c ON c.category_id = e.category_id"
+        )
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY e.ts_aware DESC, e.ts_key DESC, e.entry_id DESC"
+        if limit is not None and not amount_filter:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return sql, params
+
+    def _iter_rows(
+        self,
+        sql: str,
+        params: List[Any],
+        min_amount: Optional[Decimal],
+        max_amount: Optional[Decimal],
+        limit: Optional[int],
+        stats: Optional[Dict[str, Any]] = None
+    ) -> Iterator[Entry]:
+        """按块执行账目查询并解码(iter_entries 的生成器主体), 给出 stats 时累计取回行数"""
+        if limit == 0:
+            return
+        remaining = limit
+        rows_cursor = self._conn.execute(sql, params)
+        while True:
+            rows = rows_cursor.fetchmany(_IN_CHUNK)
+            if not rows:
+                return
+            if stats is not None:
+                stats['scanned'] += len(rows)
+            if min_amount is not None or max_amount is not None:
+                rows = [
+                    row for row in rows
+                    if (min_amount is None or Decimal(row['amount']) >= min_amount)
+                    and (max_amount is None or Decimal(row['amount']) <= max_amount)
+                ]
+            if remaining is not None:
+                rows = rows[:remaining]
+                remaining -= len(rows)
+            yield from self._decode_entries(rows)
+            if remaining == 0:
+                return
+
+    def _decode_entries(self, rows: Sequence[sqlite3.Row]) -> List[Entry]:
+        """将账目行(已关联分类)解码为 Entry 对象, 标签按条目批量查询, 分类/标签取共享实例"""
+        references = self._references
+        tags_by_entry: Dict[str, List[Tag]] = {}
+        entry_ids = [row['entry_id'] for row in rows]
+        for i in range(0, len(entry_ids), _IN_CHUNK):
+            chunk = entry_ids[i:i + _IN_CHUNK]
+            placeholders = ", ".join("?" for _ in chunk)
+            for tag_row in self._conn.execute(
+                "SELECT et.entry_id, t.tag_id, t.name, t.color, t.description "
+                "FROM entry_tags et JOIN tags t ON t.tag_id = et.tag_id "
+                f"WHERE et.entry_id IN ({placeholders}) ORDER BY et.position",
+                chunk
+            ):
+                tag = references.tag(tag_row['tag_id'], lambda: {
+                    'tag_id': tag_row['tag_id'],
+                    'name': tag_row['name'],
+                    'color': tag_row['color'],
+                    'description': tag_row['description'],
+                })
+                tags_by_entry.setdefault(tag_row['entry_id'], []).append(tag)
+
+        entries = []
+        for row in rows:
+            category = references.category(row['category_id'], lambda: {
+                'category_id': row['category_id'],
+                'name': row['name'],
+                'type': row['type'],
+                'icon': row['icon'],
+                'description': row['description'],
+            })
+            entries.append(Entry.from_dict(
+                {
+                    'entry_id': row['entry_id'],
+                    'user_id': row['user_id'],
+                    'title': row['title'],
+                    'amount': row['amount'],
+                    'currency': row['currency'],
+                    'note': row['note'],
+                    'timestamp': row['timestamp'],
+                    'images': json.loads(row['images']),
+                    'created_at': row['created_at'],
+                    'updated_at': row['updated_at'],
+                },
+                category=category,
+                tags=tags_by_entry.get(row['entry_id'], [])
+            ))
+        return entries
+
+    # ========== 分类相关操作 ==========
+
+    def _upsert_category(self, category: Category) -> None:
+        """写入或覆盖一个分类(需在事务内调用)"""
+        self._conn.execute(
+            "INSERT OR REPLACE INTO categories (category_id, name, type, icon, description) "
+            "VALUES (:category_id, :name, :type, :icon, :description)",
+            category.to_dict()
+        )
+        self._references.discard('categories', str(category.category_id))
+        self._changed('categories', (str(category.category_id),))
+
+    def save_category(self, category: Category) -> bool:
+        """
+        保存分类
+
+        Args:
+            category: 分类对象
+
+        Returns:
+            是否保存成功
+        """
+        try:
+            with self.transaction():
+                self._upsert_category(category)
+            return True
+        except Exception as e:
+            print(f"保存分类失败: {e}")
+            return False
+
+    def get_category_by_id(self, category_id: uuid.UUID) -> Optional[Category]:
+        """
+        通过ID获取分类
+
+        Args:
+            category_id: 分类ID
+
+        Returns:
+            分类对象或None
+        """
+        row = self._conn.execute(
+            "SELECT * FROM categories WHERE category_id = ?", (str(category_id),)
+        ).fetchone()
+        return Category.from_dict(dict(row)) if row else None
+
+    def get_all_categories(self) -> List[Category]:
+        """
+        获取所有分类
+
+        Returns:
+            分类列表
+        """
+        rows = self._conn.execute("SELECT * FROM categories ORDER BY rowid").fetchall()
+        return [Category.from_dict(dict(row)) for row in rows]
+
+    def get_categories_by_type(self, category_type: CategoryType) -> List[Category]:
+        """
+        获取指定类型的分类
+
+        Args:
+            category_type: 分类类型
+
+        Returns:
+            分类列表
+        """
+        rows = self._conn.execute(
+            "SELECT * FROM categories WHERE type = ? ORDER BY rowid", (category_type.value,)
+        ).fetchall()
+        return [Category.from_dict(dict(row)) for row in rows]
+
+    def delete_category(self, category_id: uuid.UUID) -> bool:
+        """
+        删除分类
+
+        账目只引用分类ID, 仍被账目引用的分类不允许删除。
+
+        Args:
+            category_id: 分类ID
+
+        Returns:
+            是否删除成功
+        """
+        category_id_str = str(category_id)
+        with self.transaction():
+            if self._conn.execute(
+                "SELECT 1 FROM entries WHERE category_id = ? LIMIT 1", (category_id_str,)
+            ).fetchone():
+                return False
+            cur = self._conn.execute(
+                "DELETE FROM categories WHERE category_id = ?", (category_id_str,)
+            )
+            self._references.discard('categories', category_id_str)
+            if cur.rowcount:
+                self._changed('categories', (category_id_str,))
+        return cur.rowcount > 0
+
+    # ========== 标签相关操作 ==========
+
+    def save_tag(self, tag: Tag) -> bool:
+        """
+        保存标签
+
+        Args:
+            tag: 标签对象
+
+        Returns:
+            是否保存成功
+        """
+        try:
+            with self.transaction():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO tags (tag_id, name, color, description) "
+                    "VALUES (:tag_id, :name, :color, :description)",
+                    tag.to_dict()
+                )
+                self._references.discard('tags', str(tag.tag_id))
+            return True
+        except Exception as e:
+            print(f"保存标签失败: {e}")
+            return False
+
+    def get_tag_by_id(self, tag_id: uuid.UUID) -> Optional[Tag]:
+        """
+        通过ID获取标签
+
+        Args:
+            tag_id: 标签ID
+
+        Returns:
+            标签对象或None
+        """
+        row = self._conn.execute(
+            "SELECT * FROM tags WHERE tag_id = ?", (str(tag_id),)
+        ).fetchone()
+        return Tag.from_dict(dict(row)) if row else None
+
+    def get_all_tags(self) -> List[Tag]:
+        """
+        获取所有标签
+
+        Returns:
+            标签列表
+        """
+        rows = self._conn.execute("SELECT * FROM tags ORDER BY rowid").fetchall()
+        return [Tag.from_dict(dict(row)) for row in rows]
+
+    def delete_tag(self, tag_id: uuid.UUID) -> bool:
+        """
+        删除标签(同时解除它与账目的关联)
+
+        Args:
+            tag_id: 标签ID
+
+        Returns:
+            是否删除成功
+        """
+        tag_id_str = str(tag_id)
+        with self.transaction():
+            cur = self._conn.execute("DELETE FROM tags WHERE tag_id = ?", (tag_id_str,))
+            self._changed('entries', self._ids(
+                "SELECT entry_id FROM entry_tags WHERE tag_id = ?", (tag_id_str,)
+            ))
+            self._conn.execute("DELETE FROM entry_tags WHERE tag_id = ?", (tag_id_str,))
+            self._references.discard('tags', tag_id_str)
+        return cur.rowcount > 0
+
+    # ========== 预算相关操作 ==========
+
+    def save_budget(self, budget: Budget) -> bool:
+        """
+        保存预算
+
+        Args:
+            budget: 预算对象
+
+        Returns:
+            是否保存成功
+        """
+        try:
+            data = budget.to_dict()
+            data['is_active'] = int(data['is_active'])
+            with self.transaction():
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO budgets "
+                    "(budget_id, user_id, category_id, period, limit_amount, threshold_percent, is_active) "
+                    "VALUES (:budget_id, :user_id, :category_id, :period, :limit_amount, "
+                    ":threshold_percent, :is_active)",
+                    data
+                )
+                self._changed('budgets', (data['budget_id'],))
+            return True
+        except Exception as e:
+            print(f"保存预算失败: {e}")
+            return False
+
+    @staticmethod
+    def _budget_from_row(row: sqlite3.Row) -> Budget:
+        """将预算行转换为 Budget 对象"""
+        data = dict(row)
+        data['is_active'] = bool(data['is_active'])
+        return Budget.from_dict(data)
+
+    def get_budget_by_id(self, budget_id: uuid.UUID) -> Optional[Budget]:
+        """
+        通过ID获取预算
+
+        Args:
+            budget_id: 预算ID
+
+        Returns:
+            预算对象或None
+        """
+        row = self._conn.execute(
+            "SELECT * FROM budgets WHERE budget_id = ?", (str(budget_id),)
+        ).fetchone()
+        return self._budget_from_row(row) if row else None
+
+    def get_budgets_by_user(self, user_id: uuid.UUID) -> List[Budget]:
+        """
+        获取用户的所有预算
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            预算列表
+        """
+        rows = self._conn.execute(
+            "SELECT * FROM budgets WHERE user_id = ? ORDER BY rowid", (str(user_id),)
+        ).fetchall()
+        return [self._budget_from_row(row) for row in rows]
+
+    def delete_budget(self, budget_id: uuid.UUID) -> bool:
+        """
+        删除预算
+
+        Args:
+            budget_id: 预算ID
+
+        Returns:
+            是否删除成功
+        """
+        with self.transaction():
+            cur = self._conn.execute("DELETE FROM budgets WHERE budget_id = ?", (str(budget_id),))
+            if cur.rowcount:
+                self._changed('budgets', (str(budget_id),))
+        return cur.rowcount > 0
+
+    def clear_all_data(self) -> None:
+        """清空所有数据(危险操作!)"""
+        with self.transaction():
+            self._changed('entries', self._ids("SELECT entry_id FROM entries", ()))
+            self._changed('categories', self._ids("SELECT category_id FROM categories", ()))
+            self._changed('budgets', self._ids("SELECT budget_id FROM budgets", ()))
+            for table in ('entry_tags', 'entries', 'budgets', 'tags', 'categories', 'users'):
+                self._conn.execute(f"DELETE FROM {table}")
+        self._references.clear()
+        self._init_default_categories()
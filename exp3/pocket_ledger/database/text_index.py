@@ -0,0 +1,98 @@
+"""
+倒排索引 - 为账目标题/备注的关键词搜索提供候选集
+"""
+from typing import Dict, Iterable, Optional, Set
+
+
+def _grams(text: str) -> Set[str]:
+    """
+    文本的单字与相邻二字组合(已转小写)
+
+    按字符切分, 不依赖分词, 中文和英文都适用。
+    """
+    grams = set(text)
+    grams.update(text[i:i + 2] for i in range(len(text) - 1))
+    return grams
+
+
+class TextIndex:
+    """
+    字符二元组倒排索引
+
+    每个文档(账目)的每个文本字段分别切成单字和二字组合, 记录 gram -> 文档ID 的
+    倒排表。查询时取关键词的所有二字组合(单字关键词取其本身)对应的倒排表求交集,
+    得到的是候选集: 包含全部二字组合并不保证关键词连续出现, 调用方仍需做一次子串
+    校验。
+
+    Attributes:
+        postings: gram -> 文档ID集合
+    """
+
+    def __init__(self):
+        """初始化空索引"""
+        self.postings: Dict[str, Set[str]] = {}
+        self._doc_grams: Dict[str, Set[str]] = {}
+
+    def add(self, doc_id: str, texts: Iterable[Optional[str]]) -> None:
+        """
+        索引一个文档(已存在时先移除旧内容)
+
+        Args:
+            doc_id: 文档ID
+            texts: 文档的各个文本字段
+        """
+        self.remove(doc_id)
+        grams: Set[str] = set()
+        for text in texts:
+            if text:
+                grams |= _grams(text.lower())
+        if not grams:
+            return
+        self._doc_grams[doc_id] = grams
+        for gram in grams:
+            self.postings.setdefault(gram, set()).add(doc_id)
+
+    def remove(self, doc_id: str) -> None:
+        """
+        从索引中移除一个文档
+
+        Args:
+            doc_id: 文档ID
+        """
+        for gram in self._doc_grams.pop(doc_id, ()):
+            doc_ids = self.postings[gram]
+            doc_ids.discard(doc_id)
+            if not doc_ids:
+                del self.postings[gram]
+
+    def search(self, keyword: str) -> Set[str]:
+        """
+        查询可能包含关键词的文档
+
+        Args:
+            keyword: 关键词(不区分大小写)
+
+        Returns:
+            候选文档ID集合(需再做子串校验)
+        """
+        keyword = keyword.lower()
+        if len(keyword) < 2:
+            query_grams = {keyword}
+        else:
+            query_grams = {keyword[i:i + 2] for i in range(len(keyword) - 1)}
+
+        postings = []
+        for gram in query_grams:
+            doc_ids = self.postings.get(gram)
+            if not doc_ids:
+                return set()
+            postings.append(doc_ids)
+
+        # 从最短的倒排表开始求交集
+        postings.sort(key=len)
+        result = set(postings[0])
+        for doc_ids in postings[1:]:
+            result &= doc_ids
+            if not result:
+                break
+        return result
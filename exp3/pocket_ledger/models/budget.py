@@ -20,6 +20,11 @@ class Budget:
     预算类 - 管理用户预算和提醒
     """
 
+    __slots__ = (
+        'budget_id', 'user_id', 'category_id', 'period', 'limit_amount',
+        'threshold_percent', 'is_active'
+    )
+
     def __init__(
         self,
         user_id: uuid.UUID,
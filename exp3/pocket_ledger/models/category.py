@@ -23,6 +23,8 @@ class Category:
         description: 分类描述(可选)
     """
     
+    __slots__ = ('category_id', 'name', 'type', 'icon', 'description')
+    
     @require(lambda name: len(name.strip()) > 0)
     @ensure(lambda self: self.category_id is not None)
     @ensure(lambda self: len(self.name.strip()) > 0)
@@ -97,7 +99,7 @@ class Category:
     @classmethod
     def from_dict(cls, data: dict) -> 'Category':
         """
-        从字典创建分类对象
+        从字典创建分类对象(还原已校验的数据, 不经过构造函数的契约检查)
         
         Args:
             data: 分类信息字典
@@ -105,13 +107,13 @@ class Category:
         Returns:
             Category对象
         """
-        return cls(
-            name=data['name'],
-            category_type=CategoryType(data['type']),
-            icon=data.get('icon'),
-            description=data.get('description'),
-            category_id=uuid.UUID(data['category_id'])
-        )
+        category = cls.__new__(cls)
+        category.category_id = uuid.UUID(data['category_id'])
+        category.name = data['name']
+        category.type = CategoryType(data['type'])
+        category.icon = data.get('icon')
+        category.description = data.get('description')
+        return category
     
     def __repr__(self) -> str:
         """返回分类对象的字符串表示"""
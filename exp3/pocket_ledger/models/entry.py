@@ -9,6 +9,16 @@ from .category import Category
 from .tag import Tag
 
 
+def _as_decimal(value) -> Decimal:
+    """字符串或 Decimal 统一为 Decimal"""
+    return value if isinstance(value, Decimal) else Decimal(value)
+
+
+def _as_datetime(value) -> datetime:
+    """ISO 字符串或 datetime 统一为 datetime"""
+    return value if isinstance(value, datetime) else datetime.fromisoformat(value)
+
+
 class Entry:
     """
     账目条目类 - 管理单条收支记录
@@ -26,6 +36,12 @@ class Entry:
         tags: 标签列表
     """
     
+    # 查询结果与缓存中可能同时持有大量账目, 用 __slots__ 省去每个实例的 __dict__
+    __slots__ = (
+        'entry_id', 'user_id', 'category', 'title', 'amount', 'currency', 'note',
+        'timestamp', 'images', 'tags', 'created_at', 'updated_at'
+    )
+    
     @require(lambda title: len(title.strip()) > 0)
     @require(lambda amount: Decimal(str(amount)) > 0)
     @require(lambda currency: len(currency) > 0)
@@ -188,12 +204,22 @@ class Entry:
         }
     
     @classmethod
-    def from_dict(cls, data: dict) -> 'Entry':
+    def from_dict(
+        cls,
+        data: dict,
+        category: Optional[Category] = None,
+        tags: Optional[List[Tag]] = None
+    ) -> 'Entry':
         """
         从字典创建账目条目对象
         
+        用于还原数据库中已校验过的数据: 与 User.from_dict 一样通过 __new__ 构造,
+        不再经过 __init__ 上的契约检查。用户输入仍应通过构造函数创建。
+        
         Args:
-            data: 条目信息字典
+            data: 条目信息字典(金额/时间可以是字符串, 也可以已是 Decimal/datetime)
+            category: 已构造的分类对象(可选, 给出时不再解析 data['category'])
+            tags: 已构造的标签列表(可选, 给出时不再解析 data['tags'])
             
         Returns:
             Entry对象
@@ -201,27 +227,28 @@ class Entry:
         from .category import Category
         from .tag import Tag
         
-        entry = cls(
-            user_id=uuid.UUID(data['user_id']),
-            category=Category.from_dict(data['category']),
-            title=data['title'],
-            amount=Decimal(data['amount']),
-            currency=data['currency'],
-            note=data.get('note'),
-            timestamp=datetime.fromisoformat(data['timestamp']),
-            images=data.get('images', []),
-            entry_id=uuid.UUID(data['entry_id'])
-        )
+        entry = cls.__new__(cls)
+        entry.entry_id = uuid.UUID(data['entry_id'])
+        entry.user_id = uuid.UUID(data['user_id'])
+        entry.category = category if category is not None else Category.from_dict(data['category'])
+        entry.title = data['title']
+        entry.amount = _as_decimal(data['amount'])
+        entry.currency = data['currency']
+        entry.note = data.get('note') or ""
+        entry.timestamp = _as_datetime(data['timestamp'])
+        entry.images = list(data.get('images') or ())
         
         # 恢复标签
-        if 'tags' in data:
-            entry.tags = [Tag.from_dict(tag_data) for tag_data in data['tags']]
+        if tags is not None:
+            entry.tags = list(tags)
+        else:
+            entry.tags = [Tag.from_dict(tag_data) for tag_data in data.get('tags', [])]
         
         # 恢复时间戳
-        if 'created_at' in data:
-            entry.created_at = datetime.fromisoformat(data['created_at'])
-        if 'updated_at' in data:
-            entry.updated_at = datetime.fromisoformat(data['updated_at'])
+        created_at = data.get('created_at')
+        updated_at = data.get('updated_at')
+        entry.created_at = _as_datetime(created_at) if created_at else datetime.now()
+        entry.updated_at = _as_datetime(updated_at) if updated_at else datetime.now()
         
         return entry
     
@@ -15,6 +15,8 @@ class Tag:
         description: 标签描述(可选)
     """
     
+    __slots__ = ('tag_id', 'name', 'color', 'description')
+    
     @require(lambda name: len(name.strip()) > 0)
     @ensure(lambda self: self.tag_id is not None)
     @ensure(lambda self: self.color is not None)
@@ -90,7 +92,7 @@ class Tag:
     @classmethod
     def from_dict(cls, data: dict) -> 'Tag':
         """
-        从字典创建标签对象
+        从字典创建标签对象(还原已校验的数据, 不经过构造函数的契约检查)
         
         Args:
             data: 标签信息字典
@@ -98,12 +100,12 @@ class Tag:
         Returns:
             Tag对象
         """
-        return cls(
-            name=data['name'],
-            color=data.get('color'),
-            description=data.get('description'),
-            tag_id=uuid.UUID(data['tag_id'])
-        )
+        tag = cls.__new__(cls)
+        tag.tag_id = uuid.UUID(data['tag_id'])
+        tag.name = data['name']
+        tag.color = data.get('color') or "#808080"
+        tag.description = data.get('description')
+        return tag
     
     def __repr__(self) -> str:
         """返回标签对象的字符串表示"""
@@ -20,6 +20,10 @@ class User:
         created_at: 账户创建时间
     """
     
+    __slots__ = (
+        'user_id', 'email', 'phone', 'password_hash', 'nickname', 'avatar_path', 'created_at'
+    )
+    
     @require(lambda email: '@' in email and len(email) > 3)
     @require(lambda phone: len(phone) >= 8)
     @require(lambda password: len(password) >= 6)
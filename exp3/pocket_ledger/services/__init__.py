@@ -5,5 +5,7 @@
 from .auth_service import AuthService
 from .stat_engine import StatEngine
 from .export_service import ExportService
+from .budget_tracker import BudgetTracker, BudgetEvent
+from .budget_index import BudgetIndex
 
-__all__ = ['AuthService', 'StatEngine', 'ExportService']
+__all__ = ['AuthService', 'StatEngine', 'ExportService', 'BudgetTracker', 'BudgetEvent', 'BudgetIndex']
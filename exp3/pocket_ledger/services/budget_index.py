@@ -0,0 +1,114 @@
+"""
+预算索引 - 由账目的 (用户, 分类, 时间) 直接找到它计入的预算及周期
+"""
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from ..models.budget import Budget, BudgetPeriod
+from .budget_periods import period_range
+
+
+# (user_id, category_id; 总预算为 None)
+BudgetKey = Tuple[str, Optional[str]]
+
+
+class BudgetIndex:
+    """
+    预算索引
+
+    启用的预算按 (user_id, category_id 或 None) 分组, 组内再按周期分组。一条账目
+    只可能计入 (用户, None) 与 (用户, 账目分类) 两组的预算; 同一周期的各个窗口按
+    日历对齐且互不重叠, 包含某个时间点的窗口可以由时间点直接算出。因此查找一条
+    账目影响的预算只与这两组中的周期数有关, 与预算总数、账目时间距今多远无关,
+    补录的历史账目同样适用。
+    """
+
+    def __init__(self):
+        """初始化空索引"""
+        # (user_id, category_id) -> 周期 -> {budget_id: Budget}
+        self._groups: Dict[BudgetKey, Dict[BudgetPeriod, Dict[str, Budget]]] = {}
+        # budget_id -> (所在分组, 周期)
+        self._locations: Dict[str, Tuple[BudgetKey, BudgetPeriod]] = {}
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+    def __contains__(self, budget_id: object) -> bool:
+        return str(budget_id) in self._locations
+
+    def add(self, budget: Budget) -> None:
+        """
+        加入或更新一个预算(未启用的预算只会被移除)
+
+        Args:
+            budget: 预算对象
+        """
+        budget_id = str(budget.budget_id)
+        self.remove(budget_id)
+        if not budget.is_active:
+            return
+        key = (str(budget.user_id), str(budget.category_id) if budget.category_id else None)
+        periods = self._groups.setdefault(key, {})
+        periods.setdefault(budget.period, {})[budget_id] = budget
+        self._locations[budget_id] = (key, budget.period)
+
+    def remove(self, budget_id) -> None:
+        """
+        移除一个预算(不存在时忽略)
+
+        Args:
+            budget_id: 预算ID
+        """
+        location = self._locations.pop(str(budget_id), None)
+        if location is None:
+            return
+        key, period = location
+        periods = self._groups[key]
+        budgets = periods[period]
+        del budgets[str(budget_id)]
+        if not budgets:
+            del periods[period]
+            if not periods:
+                del self._groups[key]
+
+    def clear(self) -> None:
+        """清空索引"""
+        self._groups.clear()
+        self._locations.clear()
+
+    def affected(
+        self,
+        user_id: uuid.UUID,
+        category_id: Optional[uuid.UUID],
+        timestamp: datetime
+    ) -> List[Tuple[Budget, datetime, datetime]]:
+        """
+        找出某个时间点的账目计入的预算及对应周期窗口
+
+        窗口与 budget_periods.period_range 一致(包括历史周期); 周期范围是 naive
+        时间, 与 query_entries 一致不匹配带时区的时间点。
+
+        Args:
+            user_id: 用户ID
+            category_id: 账目的分类ID(为 None 时只查总预算)
+            timestamp: 账目时间
+
+        Returns:
+            [(预算, 窗口起始时间, 窗口结束时间)]
+        """
+        if timestamp.tzinfo is not None:
+            return []
+        user_key = str(user_id)
+        keys = [(user_key, None)]
+        if category_id is not None:
+            keys.append((user_key, str(category_id)))
+
+        result = []
+        for key in keys:
+            for period, budgets in self._groups.get(key, {}).items():
+                start, end = period_range(period, timestamp)
+                # 窗口结束于 xx:59:59, 落在最后一秒之内的时间点不属于任何窗口
+                if start <= timestamp <= end:
+                    result.extend((budget, start, end) for budget in budgets.values())
+        return result
@@ -0,0 +1,70 @@
+"""
+预算周期 - 周期时间窗口与预算状态的公共计算
+"""
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Any, Dict, Optional, Tuple
+
+from ..models.budget import Budget, BudgetPeriod
+
+
+def period_range(period: BudgetPeriod, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
+    """
+    获取包含某个时间点的预算周期时间范围
+
+    同一周期的各个窗口按日历对齐且互不重叠; 传入历史时间点得到的是当时的窗口。
+    窗口结束于 xx:59:59, 落在最后一秒之内的时间点不属于任何窗口。
+
+    Args:
+        period: 预算周期
+        now: 时间点(可选, 默认 datetime.now())
+
+    Returns:
+        (起始时间, 结束时间)
+    """
+    now = now or datetime.now()
+
+    if period == BudgetPeriod.DAILY:
+        start = datetime(now.year, now.month, now.day, 0, 0, 0)
+        end = datetime(now.year, now.month, now.day, 23, 59, 59)
+    elif period == BudgetPeriod.WEEKLY:
+        # 本周一到周日
+        weekday = now.weekday()
+        start = now - timedelta(days=weekday)
+        start = datetime(start.year, start.month, start.day, 0, 0, 0)
+        end = start + timedelta(days=6, hours=23, minutes=59, seconds=59)
+    elif period == BudgetPeriod.MONTHLY:
+        start = datetime(now.year, now.month, 1, 0, 0, 0)
+        # 下个月的第一天减一天
+        if now.month == 12:
+            end = datetime(now.year + 1, 1, 1, 0, 0, 0) - timedelta(seconds=1)
+        else:
+            end = datetime(now.year, now.month + 1, 1, 0, 0, 0) - timedelta(seconds=1)
+    else:  # YEARLY
+        start = datetime(now.year, 1, 1, 0, 0, 0)
+        end = datetime(now.year, 12, 31, 23, 59, 59)
+
+    return start, end
+
+
+def budget_status(budget: Budget, current_amount: Decimal) -> Dict[str, Any]:
+    """
+    单个预算的状态字典(StatEngine.check_budget_status / BudgetTracker.get_status 的元素)
+
+    Args:
+        budget: 预算对象
+        current_amount: 当前周期内的支出合计
+
+    Returns:
+        预算状态
+    """
+    return {
+        'budget_id': str(budget.budget_id),
+        'period': budget.period.value,
+        'limit_amount': float(budget.limit_amount),
+        'current_amount': float(current_amount),
+        'remaining': float(budget.get_remaining_amount(current_amount)),
+        'percentage': budget.get_usage_percentage(current_amount),
+        'is_exceeded': budget.is_exceeded(current_amount),
+        'is_threshold_reached': budget.is_threshold_reached(current_amount)
+    }
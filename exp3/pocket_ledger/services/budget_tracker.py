@@ -0,0 +1,350 @@
+"""
+预算跟踪器 - 随账目写入增量维护各预算当前周期的支出
+"""
+import uuid
+from datetime import datetime
+from decimal import Decimal
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Set
+
+from ..models.budget import Budget
+from ..models.category import Category, CategoryType
+from ..models.entry import Entry
+from .budget_periods import budget_status, period_range
+from .budget_index import BudgetIndex
+
+
+_ZERO = Decimal('0')
+
+
+class BudgetEvent(NamedTuple):
+    """
+    预算提醒事件
+
+    Attributes:
+        kind: 'threshold'(达到提醒阈值) 或 'exceeded'(超出预算)
+        budget: 预算对象
+        current_amount: 触发时当前周期内的支出合计
+        period_start: 当前周期起始时间
+        period_end: 当前周期结束时间
+    """
+    kind: str
+    budget: Budget
+    current_amount: Decimal
+    period_start: datetime
+    period_end: datetime
+
+
+class _BudgetState:
+    """单个预算在当前周期内的运行状态"""
+
+    __slots__ = ('budget', 'start', 'end', 'entries', 'spent', 'threshold_reached', 'exceeded')
+
+    def __init__(self, budget: Budget):
+        self.budget = budget
+        self.start: Optional[datetime] = None
+        self.end: Optional[datetime] = None
+        # entry_id -> 计入的金额(账目被修改或删除时据此扣回)
+        self.entries: Dict[str, Decimal] = {}
+        self.spent = _ZERO
+        self.threshold_reached = False
+        self.exceeded = False
+
+    def counts(self, entry: Entry) -> bool:
+        """账目是否计入该预算的当前周期(口径与 StatEngine.check_budget_status 一致)"""
+        category = entry.category
+        if category.type != CategoryType.EXPENSE:
+            return False
+        if self.budget.category_id is not None and category.category_id != self.budget.category_id:
+            return False
+        # 周期范围是 naive 时间, 与 query_entries 一致只匹配 naive 账目
+        timestamp = entry.timestamp
+        return timestamp.tzinfo is None and self.start <= timestamp <= self.end
+
+
+class BudgetTracker:
+    """
+    预算跟踪器 - 监听数据库的账目/预算/分类变更, 增量维护每个启用预算当前周期的支出
+
+    开始跟踪一个用户时扫描一次其预算周期内的账目; 之后每次账目写入通过 BudgetIndex
+    只取出它计入的预算并增减对应合计, get_status 只需 O(预算数)。某个预算的
+    is_threshold_reached / is_exceeded 由否变为是时立即向订阅者发出 BudgetEvent。
+
+    周期在访问时按 clock 的当前时间滚动: 周期变化的预算重新扫描一次新周期。
+    分类被修改(可能改变收支类型)时, 重新扫描可能受影响的预算。
+    事件在一次变更的状态全部更新之后才发出, 订阅者的异常只打印, 不影响跟踪状态。
+
+    Attributes:
+        database: 数据库实例(Database 或 SqliteDatabase)
+    """
+
+    def __init__(self, database, clock: Optional[Callable[[], datetime]] = None):
+        """
+        初始化预算跟踪器并注册为数据库的变更监听器
+
+        Args:
+            database: 数据库实例
+            clock: 返回当前时间的函数(可选, 默认 datetime.now)
+        """
+        self.database = database
+        self._clock = clock or datetime.now
+        # budget_id -> 运行状态
+        self._states: Dict[str, _BudgetState] = {}
+        # 已跟踪的 user_id -> 该用户启用预算的 budget_id(与 get_budgets_by_user 顺序一致)
+        self._users: Dict[str, Dict[str, None]] = {}
+        # entry_id -> 计入了该账目的 budget_id 集合
+        self._entry_budgets: Dict[str, Set[str]] = {}
+        # 已跟踪的预算按 (用户, 分类) 建立的索引
+        self._index = BudgetIndex()
+        self._handlers: List[Callable[[BudgetEvent], None]] = []
+        database.add_listener(self._on_change)
+
+    def close(self) -> None:
+        """停止监听数据库变更"""
+        self.database.remove_listener(self._on_change)
+
+    def subscribe(self, handler: Callable[[BudgetEvent], None]) -> None:
+        """
+        订阅预算提醒事件
+
+        Args:
+            handler: 事件处理函数
+        """
+        self._handlers.append(handler)
+
+    def unsubscribe(self, handler: Callable[[BudgetEvent], None]) -> None:
+        """
+        取消订阅(未订阅时忽略)
+
+        Args:
+            handler: 事件处理函数
+        """
+        if handler in self._handlers:
+            self._handlers.remove(handler)
+
+    def track_user(self, user_id: uuid.UUID) -> None:
+        """
+        开始跟踪用户的预算(已跟踪时忽略); 初始状态不发出事件
+
+        Args:
+            user_id: 用户ID
+        """
+        user_key = str(user_id)
+        if user_key in self._users:
+            return
+        self._users[user_key] = {}
+        states = [
+            self._add_state(budget)
+            for budget in self.database.get_budgets_by_user(user_id)
+            if budget.is_active
+        ]
+        self._fill(states, self._clock())
+
+    def untrack_user(self, user_id: uuid.UUID) -> None:
+        """
+        停止跟踪用户的预算
+
+        Args:
+            user_id: 用户ID
+        """
+        for budget_id in list(self._users.pop(str(user_id), ())):
+            self._drop_state(budget_id)
+
+    def get_status(self, user_id: uuid.UUID) -> List[Dict[str, Any]]:
+        """
+        获取用户各启用预算的状态(格式同 StatEngine.check_budget_status)
+
+        Args:
+            user_id: 用户ID
+
+        Returns:
+            预算状态列表
+        """
+        self.track_user(user_id)
+        user_key = str(user_id)
+        events: List[BudgetEvent] = []
+        self._roll_over(user_key, events)
+        self._emit(events)
+        return [
+            budget_status(self._states[budget_id].budget, self._states[budget_id].spent)
+            for budget_id in self._users[user_key]
+        ]
+
+    # ========== 状态维护 ==========
+
+    def _add_state(self, budget: Budget) -> _BudgetState:
+        """为预算建立空的运行状态"""
+        budget_id = str(budget.budget_id)
+        state = self._states[budget_id] = _BudgetState(budget)
+        self._users[str(budget.user_id)][budget_id] = None
+        self._index.add(budget)
+        return state
+
+    def _drop_state(self, budget_id: str) -> Optional[_BudgetState]:
+        """移除预算的运行状态, 返回被移除的状态"""
+        state = self._states.pop(budget_id, None)
+        if state is not None:
+            self._reset(budget_id, state)
+            self._users.get(str(state.budget.user_id), {}).pop(budget_id, None)
+            self._index.remove(budget_id)
+        return state
+
+    def _reset(self, budget_id: str, state: _BudgetState) -> None:
+        """清空预算已计入的账目"""
+        for entry_id in state.entries:
+            budget_ids = self._entry_budgets.get(entry_id)
+            if budget_ids is not None:
+                budget_ids.discard(budget_id)
+                if not budget_ids:
+                    del self._entry_budgets[entry_id]
+        state.entries = {}
+        state.spent = _ZERO
+
+    def _count(self, budget_id: str, state: _BudgetState, entry_id: str, amount: Decimal) -> None:
+        """把一条账目计入预算"""
+        state.entries[entry_id] = amount
+        state.spent += amount
+        self._entry_budgets.setdefault(entry_id, set()).add(budget_id)
+
+    def _fill(
+        self,
+        states: List[_BudgetState],
+        now: datetime,
+        events: Optional[List[BudgetEvent]] = None
+    ) -> None:
+        """
+        把同一用户的若干预算切换到 now 所在的周期, 扫描一次覆盖这些周期的时间范围
+        重新计算支出; 传入 events 时把需要发出的事件追加到其中
+        """
+        if not states:
+            return
+        for state in states:
+            self._reset(str(state.budget.budget_id), state)
+            state.start, state.end = period_range(state.budget.period, now)
+
+        entries = self.database.iter_entries(
+            user_id=states[0].budget.user_id,
+            start_date=min(state.start for state in states),
+            end_date=max(state.end for state in states)
+        )
+        for entry in entries:
+            entry_id = str(entry.entry_id)
+            for state in states:
+                if state.counts(entry):
+                    self._count(str(state.budget.budget_id), state, entry_id, entry.amount)
+
+        for state in states:
+            self._update_flags(state, events)
+
+    def _roll_over(self, user_key: str, events: List[BudgetEvent]) -> None:
+        """周期已经变化的预算切换到当前周期"""
+        now = self._clock()
+        stale = []
+        for budget_id in self._users[user_key]:
+            state = self._states[budget_id]
+            if period_range(state.budget.period, now) != (state.start, state.end):
+                stale.append(state)
+        self._fill(stale, now, events)
+
+    def _update_flags(self, state: _BudgetState, events: Optional[List[BudgetEvent]]) -> None:
+        """重新判断阈值/超支状态, 由否变为是时追加事件(events 为 None 时不发出)"""
+        budget = state.budget
+        threshold_reached = budget.is_threshold_reached(state.spent)
+        exceeded = budget.is_exceeded(state.spent)
+        if events is not None:
+            if threshold_reached and not state.threshold_reached:
+                events.append(BudgetEvent('threshold', budget, state.spent, state.start, state.end))
+            if exceeded and not state.exceeded:
+                events.append(BudgetEvent('exceeded', budget, state.spent, state.start, state.end))
+        state.threshold_reached = threshold_reached
+        state.exceeded = exceeded
+
+    def _emit(self, events: List[BudgetEvent]) -> None:
+        """依次把事件交给订阅者; 状态已经更新完毕, 订阅者的异常只打印"""
+        for event in events:
+            for handler in list(self._handlers):
+                try:
+                    handler(event)
+                except Exception as e:
+                    print(f"错误: 预算提醒处理出错: {e}")
+
+    # ========== 变更处理 ==========
+
+    def _on_change(self, table: str, key: str, value: Any) -> None:
+        """数据库变更监听器: 先更新全部状态, 再发出事件"""
+        events: List[BudgetEvent] = []
+        if table == 'entries':
+            self._on_entry(key, value, events)
+        elif table == 'budgets':
+            self._on_budget(key, value, events)
+        elif table == 'categories':
+            self._on_category(key, value, events)
+        self._emit(events)
+
+    def _on_entry(self, entry_id: str, entry: Optional[Entry], events: List[BudgetEvent]) -> None:
+        """账目保存/删除: 扣回旧的计入金额, 再按新内容计入该用户的预算"""
+        user_key = str(entry.user_id) if entry is not None else None
+        tracked = user_key in self._users
+        if tracked:
+            self._roll_over(user_key, events)
+
+        touched: Dict[str, _BudgetState] = {}
+        for budget_id in self._entry_budgets.pop(entry_id, ()):
+            state = self._states[budget_id]
+            state.spent -= state.entries.pop(entry_id)
+            touched[budget_id] = state
+        if tracked and entry.category.type == CategoryType.EXPENSE:
+            windows = self._index.affected(entry.user_id, entry.category.category_id, entry.timestamp)
+            for budget, start, end in windows:
+                budget_id = str(budget.budget_id)
+                state = self._states[budget_id]
+                # 补录到历史周期的账目不影响当前周期
+                if (start, end) == (state.start, state.end):
+                    self._count(budget_id, state, entry_id, entry.amount)
+                    touched[budget_id] = state
+
+        for state in touched.values():
+            self._update_flags(state, events)
+
+    def _on_budget(self, budget_id: str, budget: Optional[Budget], events: List[BudgetEvent]) -> None:
+        """预算保存/删除: 原地更新该预算的运行状态(沿用已有的阈值/超支状态)"""
+        state = self._states.get(budget_id)
+        user_key = str(budget.user_id) if budget is not None else None
+        if budget is None or not budget.is_active or user_key not in self._users:
+            self._drop_state(budget_id)
+            return
+        if state is not None and str(state.budget.user_id) != user_key:
+            self._drop_state(budget_id)
+            state = None
+        if state is None:
+            state = self._add_state(budget)
+        else:
+            state.budget = budget
+            self._index.add(budget)
+        # 重新保存可能改变预算在数据库中的顺序(SQLite 的 INSERT OR REPLACE 会换 rowid)
+        self._sort_budgets(user_key, budget.user_id)
+        self._fill([state], self._clock(), events)
+
+    def _sort_budgets(self, user_key: str, user_id: uuid.UUID) -> None:
+        """按 get_budgets_by_user 的顺序重排用户已跟踪的预算"""
+        tracked = self._users[user_key]
+        self._users[user_key] = {
+            str(budget.budget_id): None
+            for budget in self.database.get_budgets_by_user(user_id)
+            if str(budget.budget_id) in tracked
+        }
+
+    def _on_category(
+        self,
+        category_id: str,
+        category: Optional[Category],
+        events: List[BudgetEvent]
+    ) -> None:
+        """分类变化可能改变其收支类型: 重新计算总预算和该分类的预算"""
+        by_user: Dict[str, List[_BudgetState]] = {}
+        for state in self._states.values():
+            budget = state.budget
+            if budget.category_id is None or str(budget.category_id) == category_id:
+                by_user.setdefault(str(budget.user_id), []).append(state)
+        now = self._clock()
+        for states in by_user.values():
+            self._fill(states, now, events)
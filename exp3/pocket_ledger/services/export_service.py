@@ -2,7 +2,7 @@
 导出服务 - 处理数据导出为Excel
 """
 import uuid
-from typing import List, Optional
+from typing import Iterable, Optional
 from datetime import datetime
 from decimal import Decimal
 
@@ -29,7 +29,7 @@ class ExportService:
     
     def export_to_xlsx(
         self,
-        entries: List[Entry],
+        entries: Iterable[Entry],
         file_path: str,
         include_tags: bool = True,
         include_images: bool = True
@@ -37,8 +37,10 @@ class ExportService:
         """
         导出账目到Excel文件
         
+        使用 openpyxl 的只写模式逐行写出, entries 可以是生成器。
+        
         Args:
-            entries: 要导出的账目列表
+            entries: 要导出的账目(列表或迭代器)
             file_path: 导出文件路径
             include_tags: 是否包含标签信息
             include_images: 是否包含图片信息
@@ -49,11 +51,20 @@ class ExportService:
         try:
             import openpyxl
             from openpyxl.styles import Font, Alignment, PatternFill
+            from openpyxl.cell import WriteOnlyCell
             
-            # 创建工作簿
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = "账目明细"
+            # 创建工作簿(只写模式, 行写出后即不再保留在内存中)
+            wb = openpyxl.Workbook(write_only=True)
+            ws = wb.create_sheet("账目明细")
+            
+            # 调整列宽(只写模式下需在写入数据之前设置)
+            ws.column_dimensions['A'].width = 20  # 日期
+            ws.column_dimensions['B'].width = 25  # 标题
+            ws.column_dimensions['C'].width = 12  # 分类
+            ws.column_dimensions['D'].width = 10  # 类型
+            ws.column_dimensions['E'].width = 12  # 金额
+            ws.column_dimensions['F'].width = 8   # 货币
+            ws.column_dimensions['G'].width = 30  # 备注
             
             # 设置表头
             headers = ['日期', '标题', '分类', '类型', '金额', '货币', '备注']
@@ -66,39 +77,31 @@ class ExportService:
             header_fill = PatternFill(start_color="4472C4", end_color="4472C4", fill_type="solid")
             header_font = Font(bold=True, color="FFFFFF")
             
-            for col, header in enumerate(headers, 1):
-                cell = ws.cell(row=1, column=col, value=header)
+            header_cells = []
+            for header in headers:
+                cell = WriteOnlyCell(ws, value=header)
                 cell.fill = header_fill
                 cell.font = header_font
                 cell.alignment = Alignment(horizontal='center', vertical='center')
+                header_cells.append(cell)
+            ws.append(header_cells)
             
             # 写入数据
-            for row, entry in enumerate(entries, 2):
-                ws.cell(row=row, column=1, value=entry.timestamp.strftime('%Y-%m-%d %H:%M:%S'))
-                ws.cell(row=row, column=2, value=entry.title)
-                ws.cell(row=row, column=3, value=entry.category.name)
-                ws.cell(row=row, column=4, value=entry.category.type.value)
-                ws.cell(row=row, column=5, value=float(entry.amount))
-                ws.cell(row=row, column=6, value=entry.currency)
-                ws.cell(row=row, column=7, value=entry.note)
-                
-                col = 8
+            for entry in entries:
+                row = [
+                    entry.timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+                    entry.title,
+                    entry.category.name,
+                    entry.category.type.value,
+                    float(entry.amount),
+                    entry.currency,
+                    entry.note
+                ]
                 if include_tags:
-                    tags_str = ', '.join(tag.name for tag in entry.tags)
-                    ws.cell(row=row, column=col, value=tags_str)
-                    col += 1
-                
+                    row.append(', '.join(tag.name for tag in entry.tags))
                 if include_images:
-                    ws.cell(row=row, column=col, value=len(entry.images))
-            
-            # 调整列宽
-            ws.column_dimensions['A'].width = 20  # 日期
-            ws.column_dimensions['B'].width = 25  # 标题
-            ws.column_dimensions['C'].width = 12  # 分类
-            ws.column_dimensions['D'].width = 10  # 类型
-            ws.column_dimensions['E'].width = 12  # 金额
-            ws.column_dimensions['F'].width = 8   # 货币
-            ws.column_dimensions['G'].width = 30  # 备注
+                    row.append(len(entry.images))
+                ws.append(row)
             
             # 保存文件
             wb.save(file_path)
@@ -114,7 +117,7 @@ class ExportService:
     
     def export_to_csv(
         self,
-        entries: List[Entry],
+        entries: Iterable[Entry],
         file_path: str,
         include_tags: bool = True
     ) -> bool:
@@ -122,7 +125,7 @@ class ExportService:
         导出账目到CSV文件
         
         Args:
-            entries: 要导出的账目列表
+            entries: 要导出的账目(列表或迭代器, 逐条写出)
             file_path: 导出文件路径
             include_tags: 是否包含标签信息
             
@@ -189,7 +192,6 @@ class ExportService:
             from openpyxl.chart import PieChart, Reference
             
             from ..services.stat_engine import StatEngine
-            from ..models.category import CategoryType
             
             stat_engine = StatEngine(self.database)
             
@@ -203,28 +205,20 @@ class ExportService:
             ws_summary = wb.create_sheet("汇总")
             ws_summary.append(['统计项', '金额'])
             
-            # 计算总收入、总支出、余额
-            total_income = stat_engine.calculate_total_by_type(
-                user_id, CategoryType.INCOME, start_date, end_date
+            # 总收入、总支出、余额与分类统计一次得到(整天对齐时由按日汇总回答)
+            summary = stat_engine.compute_summary(
+                user_id, start_date, end_date, breakdowns=('by_category',)
             )
-            total_expense = stat_engine.calculate_total_by_type(
-                user_id, CategoryType.EXPENSE, start_date, end_date
-            )
-            balance = total_income - total_expense
             
-            ws_summary.append(['总收入', float(total_income)])
-            ws_summary.append(['总支出', float(total_expense)])
-            ws_summary.append(['余额', float(balance)])
+            ws_summary.append(['总收入', float(summary['income'])])
+            ws_summary.append(['总支出', float(summary['expense'])])
+            ws_summary.append(['余额', float(summary['balance'])])
             
             # 创建分类统计工作表
             ws_category = wb.create_sheet("分类统计")
             ws_category.append(['分类', '金额', '次数', '百分比'])
             
-            category_stats = stat_engine.get_statistics_by_category(
-                user_id, start_date, end_date
-            )
-            
-            for category_name, stats in category_stats.items():
+            for category_name, stats in summary['by_category'].items():
                 ws_category.append([
                     category_name,
                     float(stats['amount']),
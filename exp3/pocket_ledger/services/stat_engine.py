@@ -1,15 +1,17 @@
 """
 统计引擎 - 处理数据统计和分析
 """
+import heapq
 import uuid
-from typing import List, Dict, Optional, Tuple, Any
-from datetime import datetime, timedelta, time
+from typing import List, Dict, Iterable, Optional, Tuple, Any
+from datetime import date, datetime, timedelta, time
 from decimal import Decimal
 from collections import defaultdict
 
 from ..models.entry import Entry
 from ..models.category import Category, CategoryType
-from ..database.database import Database
+from ..database.database import Database, validate_date_range
+from .budget_periods import budget_status, period_range
 
 
 class StatEngine:
@@ -29,6 +31,71 @@ class StatEngine:
         """
         self.database = database
     
+    def _columnar(self, user_id: Optional[uuid.UUID]):
+        """
+        返回可用于聚合的列式存储
+        
+        仅在后端提供列式存储、且全部金额都能被精确表示时可用; 否则返回 None,
+        调用方回退到逐条查询计算。
+        """
+        store = getattr(self.database, 'columnar_store', None)
+        if store is None or not store.exact or user_id is None:
+            return None
+        return store
+    
+    def _rollup_totals(
+        self,
+        user_id: Optional[uuid.UUID],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> Optional[Tuple[Decimal, Decimal, int]]:
+        """
+        由按日累计数组取 (收入, 支出, 笔数) 合计, 不读取账目
+        
+        仅在后端维护按日汇总、且日期范围整天对齐(或未给出)时可用; 否则返回 None,
+        调用方改用列式存储或逐条计算。
+        """
+        store = getattr(self.database, 'rollup_store', None)
+        if store is None or user_id is None:
+            return None
+        validate_date_range(start_date, end_date)
+        return store.totals(str(user_id), start_date, end_date)
+    
+    def _rollup_by_day(
+        self,
+        user_id: Optional[uuid.UUID],
+        start_date: datetime,
+        end_date: datetime
+    ) -> Optional[Dict[int, Tuple[Decimal, Decimal]]]:
+        """由按日累计数组取每日收支 {日期序数: (收入, 支出)}, 不可用时返回 None"""
+        store = getattr(self.database, 'rollup_store', None)
+        if store is None or user_id is None:
+            return None
+        validate_date_range(start_date, end_date)
+        return store.daily(str(user_id), start_date, end_date)
+    
+    def _rollup(
+        self,
+        user_id: Optional[uuid.UUID],
+        start_date: Optional[datetime],
+        end_date: Optional[datetime]
+    ) -> Optional[List[Tuple[int, Dict[str, list]]]]:
+        """取按日汇总中的 (日期序数, {category_id: [合计, 笔数]}), 不可用时返回 None"""
+        store = getattr(self.database, 'rollup_store', None)
+        if store is None or user_id is None:
+            return None
+        validate_date_range(start_date, end_date)
+        return store.collect(str(user_id), start_date, end_date)
+    
+    def _categories_of(self, days: List[Tuple[int, Dict[str, list]]]) -> Dict[str, Category]:
+        """汇总中出现的分类(按当前内容, 已删除的分类不在结果中)"""
+        categories = {}
+        for category_id in {category_id for _day, cells in days for category_id in cells}:
+            category = self.database.get_category_by_id(uuid.UUID(category_id)) if category_id else None
+            if category is not None:
+                categories[category_id] = category
+        return categories
+    
     def calculate_total_by_type(
         self,
         user_id: uuid.UUID,
@@ -48,7 +115,17 @@ class StatEngine:
         Returns:
             总金额
         """
-        entries = self.database.query_entries(
+        totals = self._rollup_totals(user_id, start_date, end_date)
+        if totals is not None:
+            return totals[0] if category_type == CategoryType.INCOME else totals[1]
+        
+        store = self._columnar(user_id)
+        if store is not None:
+            validate_date_range(start_date, end_date)
+            income, expense = store.sum_by_type(str(user_id), start_date, end_date)
+            return income if category_type == CategoryType.INCOME else expense
+        
+        entries = self.database.iter_entries(
             user_id=user_id,
             start_date=start_date,
             end_date=end_date
@@ -78,13 +155,171 @@ class StatEngine:
         Returns:
             平衡金额
         """
-        income = self.calculate_total_by_type(
-            user_id, CategoryType.INCOME, start_date, end_date
-        )
-        expense = self.calculate_total_by_type(
-            user_id, CategoryType.EXPENSE, start_date, end_date
+        totals = self._rollup_totals(user_id, start_date, end_date)
+        if totals is not None:
+            return totals[0] - totals[1]
+        
+        store = self._columnar(user_id)
+        if store is not None:
+            validate_date_range(start_date, end_date)
+            income, expense = store.sum_by_type(str(user_id), start_date, end_date)
+            return income - expense
+        
+        # 没有可用的聚合结构时一次扫描同时得到收入和支出
+        return self.compute_summary(user_id, start_date, end_date, breakdowns=())['balance']
+    
+    # compute_summary 可选的分项统计
+    SUMMARY_BREAKDOWNS = ('by_category', 'by_tag', 'by_currency')
+    
+    def compute_summary(
+        self,
+        user_id: uuid.UUID,
+        start_date: Optional[datetime] = None,
+        end_date: Optional[datetime] = None,
+        breakdowns: Optional[Iterable[str]] = None
+    ) -> Dict[str, Any]:
+        """
+        计算汇总统计
+        
+        只需要收支合计、笔数和分类统计时, 优先由按日汇总(日期范围整天对齐或未给出)
+        或列式存储回答, 不读取账目; 需要标签或货币分项时一次扫描全部算出。
+        
+        Args:
+            user_id: 用户ID
+            start_date: 起始日期(可选)
+            end_date: 结束日期(可选)
+            breakdowns: 需要的分项(SUMMARY_BREAKDOWNS 的子集, 默认全部)
+            
+        Returns:
+            {
+                'income' / 'expense' / 'balance': 收入、支出、平衡金额,
+                'count': 条目数,
+                'by_category': {分类名称: {总金额, 次数, 百分比}}(同 get_statistics_by_category),
+                'by_tag': {标签名称: {总金额, 次数}}(同 get_statistics_by_tag),
+                'by_currency': {货币: {收入, 支出, 次数}}
+            }
+            分项只包含 breakdowns 中要求的键
+        """
+        wanted = set(self.SUMMARY_BREAKDOWNS if breakdowns is None else breakdowns)
+        unknown = wanted.difference(self.SUMMARY_BREAKDOWNS)
+        if unknown:
+            raise ValueError(f"未知的分项统计: {sorted(unknown)}")
+        
+        if 'by_tag' not in wanted and 'by_currency' not in wanted:
+            summary = self._aggregate_summary(user_id, start_date, end_date, 'by_category' in wanted)
+            if summary is not None:
+                return summary
+        
+        entries = self.database.iter_entries(
+            user_id=user_id,
+            start_date=start_date,
+            end_date=end_date
         )
-        return income - expense
+        
+        income = Decimal('0')
+        expense = Decimal('0')
+        count = 0
+        by_category = defaultdict(lambda: {'amount': Decimal('0'), 'count': 0})
+        by_tag = defaultdict(lambda: {'amount': Decimal('0'), 'count': 0})
+        by_currency = defaultdict(lambda: {'income': Decimal('0'), 'expense': Decimal('0'), 'count': 0})
+        
+        for entry in entries:
+            amount = entry.amount
+            count += 1
+            kind = 'income' if entry.category.type == CategoryType.INCOME else 'expense'
+            if kind == 'income':
+                income += amount
+            else:
+                expense += amount
+            
+            stats = by_category[entry.category.name]
+            stats['amount'] += amount
+            stats['count'] += 1
+            for tag in entry.tags:
+                stats = by_tag[tag.name]
+                stats['amount'] += amount
+                stats['count'] += 1
+            stats = by_currency[entry.currency]
+            stats[kind] += amount
+            stats['count'] += 1
+        
+        summary = {
+            'income': income,
+            'expense': expense,
+            'balance': income - expense,
+            'count': count,
+            'by_category': self._with_percentages(by_category, income + expense),
+            'by_tag': dict(by_tag),
+            'by_currency': dict(by_currency)
+        }
+        for key in self.SUMMARY_BREAKDOWNS:
+            if key not in wanted:
+                del summary[key]
+        return summary
+    
+    def _aggregate_summary(
+        self,
+        user_id: uuid.UUID,
+        start_date: Optional[datetime],
+        end_date: Optional[datetime],
+        by_category: bool
+    ) -> Optional[Dict[str, Any]]:
+        """
+        由按日汇总或列式存储计算收支合计、笔数(以及分类统计), 不可用时返回 None
+        
+        分类统计需要逐日的分类桶, 只能由按日汇总回答; 否则前缀和 / 列式存储即可。
+        """
+        if by_category:
+            days = self._rollup(user_id, start_date, end_date)
+            if days is None:
+                return None
+            categories = self._categories_of(days)
+            income = expense = Decimal('0')
+            count = 0
+            category_stats = defaultdict(lambda: {'amount': Decimal('0'), 'count': 0})
+            for _day, cells in days:
+                for category_id, (amount, cell_count) in cells.items():
+                    category = categories.get(category_id)
+                    if category is None:
+                        continue
+                    if category.type == CategoryType.INCOME:
+                        income += amount
+                    else:
+                        expense += amount
+                    count += cell_count
+                    stats = category_stats[category.name]
+                    stats['amount'] += amount
+                    stats['count'] += cell_count
+            return {
+                'income': income,
+                'expense': expense,
+                'balance': income - expense,
+                'count': count,
+                'by_category': self._with_percentages(category_stats, income + expense)
+            }
+        
+        totals = self._rollup_totals(user_id, start_date, end_date)
+        if totals is None:
+            store = self._columnar(user_id)
+            if store is None:
+                return None
+            validate_date_range(start_date, end_date)
+            totals = store.summarize(str(user_id), start_date, end_date)
+        income, expense, count = totals
+        return {'income': income, 'expense': expense, 'balance': income - expense, 'count': count}
+    
+    @staticmethod
+    def _with_percentages(category_stats: Dict[str, Dict[str, Any]], total_amount: Decimal) -> Dict[str, Dict[str, Any]]:
+        """为分类统计补上占总金额的百分比"""
+        result = {}
+        for category_name, stats in category_stats.items():
+            percentage = (stats['amount'] / total_amount * 100) if total_amount > 0 else 0
+            result[category_name] = {
+                'amount': stats['amount'],
+                'count': stats['count'],
+                'percentage': float(percentage)
+            }
+        return result
     
     def get_statistics_by_category(
         self,
@@ -103,16 +338,29 @@ class StatEngine:
         Returns:
             分类统计字典 {分类名称: {总金额, 次数, 百分比}}
         """
-        entries = self.database.query_entries(
-            user_id=user_id,
-            start_date=start_date,
-            end_date=end_date
-        )
-        
         # 按分类汇总
         category_stats = defaultdict(lambda: {'amount': Decimal('0'), 'count': 0})
         total_amount = Decimal('0')
         
+        days = self._rollup(user_id, start_date, end_date)
+        if days is not None:
+            categories = self._categories_of(days)
+            for _day, cells in days:
+                for category_id, (amount, count) in cells.items():
+                    category = categories.get(category_id)
+                    if category is None:
+                        continue
+                    category_stats[category.name]['amount'] += amount
+                    category_stats[category.name]['count'] += count
+                    total_amount += amount
+            entries = ()
+        else:
+            entries = self.database.iter_entries(
+                user_id=user_id,
+                start_date=start_date,
+                end_date=end_date
+            )
+        
         for entry in entries:
             category_name = entry.category.name
             category_stats[category_name]['amount'] += entry.amount
@@ -148,7 +396,7 @@ class StatEngine:
         Returns:
             标签统计字典 {标签名称: {总金额, 次数}}
         """
-        entries = self.database.query_entries(
+        entries = self.database.iter_entries(
             user_id=user_id,
             start_date=start_date,
             end_date=end_date
@@ -187,11 +435,21 @@ class StatEngine:
         start_dt = datetime.combine(start_date.date(), time.min, tzinfo=start_date.tzinfo)
         end_dt = datetime.combine(end_date.date(), time.max, tzinfo=end_date.tzinfo)
 
-        entries = self.database.query_entries(
-            user_id=user_id,
-            start_date=start_dt,
-            end_date=end_dt
-        ) or []
+        daily_totals = self._rollup_by_day(user_id, start_dt, end_dt)
+        store = self._columnar(user_id)
+        if daily_totals is not None:
+            entries = ()
+        elif store is not None:
+            validate_date_range(start_dt, end_dt)
+            daily_totals = store.sum_by_day(str(user_id), start_dt, end_dt)
+            entries = ()
+        else:
+            daily_totals = {}
+            entries = self.database.iter_entries(
+                user_id=user_id,
+                start_date=start_dt,
+                end_date=end_dt
+            )
 
         daily_stats = defaultdict(lambda: {
             'income': Decimal('0'),
@@ -214,6 +472,11 @@ class StatEngine:
                 # 未知类型：忽略（也可以改为 raise 或记录日志）
                 continue
 
+        for day, (income, expense) in daily_totals.items():
+            stats = daily_stats[date.fromordinal(day)]
+            stats['income'] += income
+            stats['expense'] += expense
+
         result: List[Dict[str, Any]] = []
         current_date = start_dt.date()
         end_date_only = end_dt.date()
@@ -248,13 +511,7 @@ class StatEngine:
             月度统计列表 [{月份, 收入, 支出, 平衡}]
         """
         start_date = datetime(year, 1, 1)
-        end_date = datetime(year, 12, 31, 23, 59, 59)
-        
-        entries = self.database.query_entries(
-            user_id=user_id,
-            start_date=start_date,
-            end_date=end_date
-        )
+        end_date = datetime.combine(date(year, 12, 31), time.max)
         
         # 按月份汇总
         monthly_stats = defaultdict(lambda: {
@@ -262,6 +519,23 @@ class StatEngine:
             'expense': Decimal('0')
         })
         
+        daily_totals = self._rollup_by_day(user_id, start_date, end_date)
+        store = self._columnar(user_id)
+        if daily_totals is None and store is not None:
+            daily_totals = store.sum_by_day(str(user_id), start_date, end_date)
+        if daily_totals is not None:
+            for day, (income, expense) in daily_totals.items():
+                stats = monthly_stats[date.fromordinal(day).month]
+                stats['income'] += income
+                stats['expense'] += expense
+            entries = ()
+        else:
+            entries = self.database.iter_entries(
+                user_id=user_id,
+                start_date=start_date,
+                end_date=end_date
+            )
+        
         for entry in entries:
             month_key = entry.timestamp.month
             if entry.category.type == CategoryType.INCOME:
@@ -301,105 +575,74 @@ class StatEngine:
         Returns:
             支出条目列表
         """
-        entries = self.database.query_entries(
+        entries = self.database.iter_entries(
             user_id=user_id,
             start_date=start_date,
             end_date=end_date
         )
         
-        # 筛选支出并排序
-        expenses = [e for e in entries if e.category.type == CategoryType.EXPENSE]
-        expenses.sort(key=lambda e: e.amount, reverse=True)
-        
-        return expenses[:limit]
+        # 筛选支出, 只保留金额最大的 limit 条(与稳定排序后截取的结果一致)
+        expenses = (e for e in entries if e.category.type == CategoryType.EXPENSE)
+        return heapq.nlargest(limit, expenses, key=lambda e: e.amount)
     
     def check_budget_status(
         self,
-        user_id: uuid.UUID
+        user_id: uuid.UUID,
+        now: Optional[datetime] = None
     ) -> List[Dict[str, any]]:
         """
         检查预算状态
         
+        所有预算一次计算: 按预算周期求出各自的时间范围, 只扫描覆盖全部范围的最宽
+        窗口一次, 每条支出累加到它所落入的每个 (周期, 分类) 桶中。
+        
         Args:
             user_id: 用户ID
+            now: 计算周期所用的当前时间(可选, 默认 datetime.now())
             
         Returns:
             预算状态列表
         """
-        budgets = self.database.get_budgets_by_user(user_id)
-        result = []
+        budgets = [budget for budget in self.database.get_budgets_by_user(user_id) if budget.is_active]
+        if not budgets:
+            return []
+        
+        now = now or datetime.now()
+        windows = {budget.period: period_range(budget.period, now) for budget in budgets}
+        wanted = {(budget.period, budget.category_id) for budget in budgets}
         
-        for budget in budgets:
-            if not budget.is_active:
+        # (周期, 分类ID) -> 支出合计; 分类ID为 None 的桶是该周期的总支出
+        totals: Dict[Tuple[Any, Optional[uuid.UUID]], Decimal] = defaultdict(lambda: Decimal('0'))
+        entries = self.database.iter_entries(
+            user_id=user_id,
+            start_date=min(start for start, _end in windows.values()),
+            end_date=max(end for _start, end in windows.values())
+        )
+        for entry in entries:
+            if entry.category.type != CategoryType.EXPENSE:
                 continue
-            
-            # 计算时间范围
-            start_date, end_date = self._get_period_range(budget.period)
-            
-            # 计算当前支出
-            current_amount = self.calculate_total_by_type(
-                user_id,
-                CategoryType.EXPENSE,
-                start_date,
-                end_date
-            )
-            
-            # 如果是分类预算,只计算该分类
-            if budget.category_id:
-                entries = self.database.query_entries(
-                    user_id=user_id,
-                    category_id=budget.category_id,
-                    start_date=start_date,
-                    end_date=end_date
-                )
-                current_amount = sum(e.amount for e in entries if e.category.type == CategoryType.EXPENSE)
-            
-            result.append({
-                'budget_id': str(budget.budget_id),
-                'period': budget.period.value,
-                'limit_amount': float(budget.limit_amount),
-                'current_amount': float(current_amount),
-                'remaining': float(budget.get_remaining_amount(current_amount)),
-                'percentage': budget.get_usage_percentage(current_amount),
-                'is_exceeded': budget.is_exceeded(current_amount),
-                'is_threshold_reached': budget.is_threshold_reached(current_amount)
-            })
+            for period, (start, end) in windows.items():
+                if start <= entry.timestamp <= end:
+                    totals[(period, None)] += entry.amount
+                    key = (period, entry.category.category_id)
+                    if key in wanted:
+                        totals[key] += entry.amount
         
-        return result
+        return [
+            budget_status(budget, totals[(budget.period, budget.category_id)])
+            for budget in budgets
+        ]
     
     @staticmethod
-    def _get_period_range(period) -> Tuple[datetime, datetime]:
+    def _get_period_range(period, now: Optional[datetime] = None) -> Tuple[datetime, datetime]:
         """
-        获取预算周期的时间范围
+        获取预算周期的时间范围(保留给旧调用方, 见 budget_periods.period_range)
         
         Args:
             period: 预算周期
+            now: 当前时间(可选, 默认 datetime.now())
             
         Returns:
             (起始时间, 结束时间)
         """
-        from ..models.budget import BudgetPeriod
-        
-        now = datetime.now()
-        
-        if period == BudgetPeriod.DAILY:
-            start = datetime(now.year, now.month, now.day, 0, 0, 0)
-            end = datetime(now.year, now.month, now.day, 23, 59, 59)
-        elif period == BudgetPeriod.WEEKLY:
-            # 本周一到周日
-            weekday = now.weekday()
-            start = now - timedelta(days=weekday)
-            start = datetime(start.year, start.month, start.day, 0, 0, 0)
-            end = start + timedelta(days=6, hours=23, minutes=59, seconds=59)
-        elif period == BudgetPeriod.MONTHLY:
-            start = datetime(now.year, now.month, 1, 0, 0, 0)
-            # 下个月的第一天减一天
-            if now.month == 12:
-                end = datetime(now.year + 1, 1, 1, 0, 0, 0) - timedelta(seconds=1)
-            else:
-                end = datetime(now.year, now.month + 1, 1, 0, 0, 0) - timedelta(seconds=1)
-        else:  # YEARLY
-            start = datetime(now.year, 1, 1, 0, 0, 0)
-            end = datetime(now.year, 12, 31, 23, 59, 59)
-        
-        return start, end
+        return period_range(period, now)
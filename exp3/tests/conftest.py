@@ -13,13 +13,24 @@ from datetime import datetime
 from decimal import Decimal
 
 from pocket_ledger.database.database import Database
+from pocket_ledger.database.sqlite_database import SqliteDatabase
 from pocket_ledger.models.category import Category, CategoryType
 from pocket_ledger.models.entry import Entry
 from pocket_ledger.models.tag import Tag
 from pocket_ledger.models.budget import Budget, BudgetPeriod
 
+@pytest.fixture(params=["json", "sqlite"])
+def db(request, tmp_path):
+    # 同一组用例同时覆盖 JSON 与 SQLite 两种存储后端
+    if request.param == "sqlite":
+        database = SqliteDatabase(str(tmp_path / "test_db.sqlite3"))
+        yield database
+        database.close()
+    else:
+        yield Database(str(tmp_path / "test_db.json"))
+
 @pytest.fixture()
-def db(tmp_path):
+def json_db(tmp_path):
     db_path = tmp_path / "test_db.json"
     return Database(str(db_path))
 
@@ -0,0 +1,91 @@
+import uuid
+from datetime import datetime
+from decimal import Decimal
+
+from pocket_ledger.app_logic import AppLogic
+from pocket_ledger.models.category import CategoryType
+
+
+def _logged_in_app(tmp_path):
+    app = AppLogic(str(tmp_path / "bulk.json"))
+    app.register(email="bulk@test.com", phone="12345678", password="abcdef", nickname="bulk")
+    app.login("bulk@test.com", "abcdef")
+    return app
+
+
+def test_add_entries_persists_valid_rows_and_reports_errors(tmp_path, monkeypatch):
+    app = _logged_in_app(tmp_path)
+    category = app.get_categories_by_type(CategoryType.EXPENSE)[0]
+    ok, _msg, tag = app.add_tag("import")
+    assert ok
+
+    lookups = []
+    original = app.database.get_category_by_id
+    monkeypatch.setattr(app.database, "get_category_by_id",
+                        lambda cid: (lookups.append(cid), original(cid))[1])
+
+    specs = [
+        {'category_id': category.category_id, 'title': "a", 'amount': Decimal("10"),
+         'timestamp': datetime(2025, 1, 1, 10, 0, 0), 'tag_ids': [tag.tag_id]},
+        {'category_id': category.category_id, 'title': "", 'amount': Decimal("10")},
+        {'category_id': category.category_id, 'title': "b", 'amount': "-3"},
+        {'category_id': uuid.uuid4(), 'title': "c", 'amount': 5},
+        {'category_id': category.category_id, 'title': "d", 'amount': "2.5", 'colour': "red"},
+        {'category_id': category.category_id, 'title': "e", 'amount': "7.25",
+         'timestamp': datetime(2025, 1, 2, 10, 0, 0)},
+    ]
+    ok, msg, entries, errors = app.add_entries(specs)
+
+    assert ok, msg
+    assert [e.title for e in entries] == ["a", "e"]
+    assert [index for index, _reason in errors] == [1, 2, 3, 4]
+    assert lookups.count(category.category_id) == 1
+    assert entries[0].tags == [tag]
+
+    reopened = AppLogic(str(tmp_path / "bulk.json"))
+    reopened.login("bulk@test.com", "abcdef")
+    assert [e.title for e in reopened.query_entries()] == ["e", "a"]
+
+
+def test_add_entries_requires_login(tmp_path):
+    app = AppLogic(str(tmp_path / "bulk.json"))
+    ok, msg, entries, errors = app.add_entries([])
+    assert not ok
+    assert entries == [] and errors == []
+
+
+def test_failed_update_leaves_stored_entry_untouched(tmp_path):
+    app = _logged_in_app(tmp_path)
+    category = app.get_categories_by_type(CategoryType.EXPENSE)[0]
+    ok, _msg, entry = app.add_entry(category.category_id, "lunch", Decimal("10"))
+    assert ok
+
+    try:
+        app.update_entry(entry.entry_id, title="HACKED", amount=Decimal("-1"))
+    except Exception:
+        pass
+    assert [e.title for e in app.query_entries()] == ["lunch"]
+    assert app.database.get_entry_by_id(entry.entry_id).amount == Decimal("10")
+
+
+def test_add_entries_reports_bad_tag_ids_per_row(tmp_path):
+    app = _logged_in_app(tmp_path)
+    category = app.get_categories_by_type(CategoryType.EXPENSE)[0]
+    specs = [
+        {'category_id': category.category_id, 'title': "a", 'amount': 1, 'tag_ids': [[1, 2]]},
+        {'category_id': category.category_id, 'title': "b", 'amount': 1, 'tag_ids': ["not-a-uuid"]},
+        {'category_id': category.category_id, 'title': "c", 'amount': 1, 'tag_ids': "abc"},
+        {'category_id': category.category_id, 'title': "d", 'amount': 1, 'tag_ids': [uuid.uuid4()]},
+    ]
+    ok, _msg, entries, errors = app.add_entries(specs)
+    assert ok
+    assert [e.title for e in entries] == ["d"]
+    assert [index for index, _reason in errors] == [0, 1, 2]
+
+
+def test_add_entries_with_nothing_added_is_not_success(tmp_path):
+    app = _logged_in_app(tmp_path)
+    ok, msg, entries, errors = app.add_entries([{'title': "no category"}])
+    assert not ok and entries == [] and len(errors) == 1
+    ok, _msg, _entries, errors = app.add_entries([])
+    assert not ok and errors == []
@@ -0,0 +1,70 @@
+# tests/test_budget_index.py
+import uuid
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from pocket_ledger.models.budget import Budget, BudgetPeriod
+from pocket_ledger.services.budget_index import BudgetIndex
+
+
+def _ids(found):
+    return {(b.budget_id, start, end) for b, start, end in found}
+
+
+def test_affected_budgets_and_windows():
+    user, other_user = uuid.uuid4(), uuid.uuid4()
+    food, travel = uuid.uuid4(), uuid.uuid4()
+    total_month = Budget(user, BudgetPeriod.MONTHLY, Decimal("1000"))
+    food_week = Budget(user, BudgetPeriod.WEEKLY, Decimal("100"), category_id=food)
+    travel_day = Budget(user, BudgetPeriod.DAILY, Decimal("50"), category_id=travel)
+    stranger = Budget(other_user, BudgetPeriod.YEARLY, Decimal("10"))
+    index = BudgetIndex()
+    for budget in (total_month, food_week, travel_day, stranger):
+        index.add(budget)
+    assert len(index) == 4
+
+    ts = datetime(2025, 3, 12, 15, 0, 0)  # 周三
+    assert _ids(index.affected(user, food, ts)) == {
+        (total_month.budget_id, datetime(2025, 3, 1), datetime(2025, 3, 31, 23, 59, 59)),
+        (food_week.budget_id, datetime(2025, 3, 10), datetime(2025, 3, 16, 23, 59, 59)),
+    }
+    assert _ids(index.affected(user, None, ts)) == {
+        (total_month.budget_id, datetime(2025, 3, 1), datetime(2025, 3, 31, 23, 59, 59)),
+    }
+
+    # 补录的历史账目落在对应的历史窗口
+    backfill = datetime(2019, 2, 28, 8, 0, 0)
+    assert _ids(index.affected(user, travel, backfill)) == {
+        (total_month.budget_id, datetime(2019, 2, 1), datetime(2019, 2, 28, 23, 59, 59)),
+        (travel_day.budget_id, datetime(2019, 2, 28), datetime(2019, 2, 28, 23, 59, 59)),
+    }
+
+    # 带时区的时间, 以及窗口最后一秒之内的时间不属于任何窗口
+    assert index.affected(user, food, ts.replace(tzinfo=timezone.utc)) == []
+    assert index.affected(user, None, datetime(2025, 3, 31, 23, 59, 59, 500000)) == []
+
+
+def test_updates_and_removal():
+    user, food = uuid.uuid4(), uuid.uuid4()
+    budget = Budget(user, BudgetPeriod.DAILY, Decimal("10"), category_id=food)
+    index = BudgetIndex()
+    index.add(budget)
+    ts = datetime(2025, 3, 12, 9, 0, 0)
+    assert [b.period for b, _, _ in index.affected(user, food, ts)] == [BudgetPeriod.DAILY]
+
+    budget.period = BudgetPeriod.YEARLY
+    index.add(budget)
+    assert len(index) == 1
+    (found, start, end), = index.affected(user, food, ts - timedelta(days=60))
+    assert (found.period, start, end) == \
+        (BudgetPeriod.YEARLY, datetime(2025, 1, 1), datetime(2025, 12, 31, 23, 59, 59))
+
+    budget.deactivate()
+    index.add(budget)
+    assert budget.budget_id not in index and index.affected(user, food, ts) == []
+
+    budget.activate()
+    index.add(budget)
+    index.remove(budget.budget_id)
+    index.remove(budget.budget_id)
+    assert len(index) == 0 and index._groups == {}
@@ -0,0 +1,202 @@
+# tests/test_budget_tracker.py
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+
+from pocket_ledger.models.budget import Budget, BudgetPeriod
+from pocket_ledger.models.category import Category, CategoryType
+from pocket_ledger.services.budget_tracker import BudgetTracker
+from pocket_ledger.services.stat_engine import StatEngine
+
+from .conftest import make_entry
+
+
+class Clock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def _by_id(status):
+    return {s['budget_id']: s for s in status}
+
+
+def test_listeners_see_committed_changes_once(db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    seen = []
+    db.add_listener(lambda table, key, value: seen.append((table, key, value)))
+    e = make_entry(u1, c_exp, "lunch", "12", datetime(2025, 1, 1))
+
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.save_entry(e)
+            raise RuntimeError("rollback")
+    assert seen == []
+
+    with db.transaction():
+        db.save_entry(e)
+        e.update_amount(Decimal("15"))
+        db.save_entry(e)
+    changes = [(t, k) for t, k, _ in seen]
+    assert changes.count(('entries', str(e.entry_id))) == 1
+    assert seen[-1][2].amount == Decimal("15")
+
+    seen.clear()
+    db.delete_entry(e.entry_id)
+    assert seen == [('entries', str(e.entry_id), None)]
+
+
+def test_running_spend_matches_full_scan(db, user_ids, categories):
+    u1, u2 = user_ids
+    c_exp, c_inc = categories
+    other = Category("交通-测试", CategoryType.EXPENSE)
+    now = datetime(2025, 3, 12, 15, 0, 0)
+    budgets = [
+        Budget(u1, period, Decimal("100"), category_id=category_id)
+        for period in BudgetPeriod
+        for category_id in (None, c_exp.category_id)
+    ]
+    for budget in budgets:
+        db.save_budget(budget)
+    db.save_entry(make_entry(u1, c_exp, "old", "30", now - timedelta(days=3)))
+
+    tracker = BudgetTracker(db, clock=Clock(now))
+    tracker.track_user(u1)
+    e1 = make_entry(u1, c_exp, "a", "10", now - timedelta(hours=1))
+    e2 = make_entry(u1, other, "b", "20", now - timedelta(days=1))
+    db.save_entries([e1, e2, make_entry(u1, c_inc, "salary", "999", now)])
+    db.save_entry(make_entry(u2, c_exp, "other user", "5", now))
+    e1.update_amount(Decimal("12"))
+    db.save_entry(e1)
+    db.delete_entry(e2.entry_id)
+    db.save_entry(make_entry(u1, c_exp, "backfill", "7", datetime(2025, 1, 2)))
+
+    expected = StatEngine(db).check_budget_status(u1, now=now)
+    assert _by_id(tracker.get_status(u1)) == _by_id(expected)
+
+    # 跟踪开始后查询状态不再扫描账目
+    db.iter_entries = lambda **kw: 1 / 0
+    assert _by_id(tracker.get_status(u1)) == _by_id(expected)
+
+
+def test_events_fire_when_flags_flip(db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    now = datetime(2025, 3, 12, 15, 0, 0)
+    budget = Budget(u1, BudgetPeriod.MONTHLY, Decimal("100"), threshold_percent=80)
+    db.save_budget(budget)
+    tracker = BudgetTracker(db, clock=Clock(now))
+    events = []
+    tracker.subscribe(lambda event: events.append((event.kind, event.current_amount)))
+    tracker.track_user(u1)
+
+    db.save_entry(make_entry(u1, c_exp, "a", "50", now))
+    assert events == []
+    big = make_entry(u1, c_exp, "b", "30", now)
+    db.save_entry(big)
+    assert events == [('threshold', Decimal("80"))]
+    db.save_entry(make_entry(u1, c_exp, "c", "1", now))
+    assert events == [('threshold', Decimal("80"))]
+
+    big.update_amount(Decimal("60"))
+    db.save_entry(big)
+    assert events[-1] == ('exceeded', Decimal("111"))
+
+    # 回落后再次越过阈值时重新提醒
+    db.delete_entry(big.entry_id)
+    db.save_entry(make_entry(u1, c_exp, "d", "70", now))
+    assert [kind for kind, _ in events] == ['threshold', 'exceeded', 'threshold', 'exceeded']
+
+    budget.update_limit(Decimal("1000"))
+    db.save_budget(budget)
+    assert tracker.get_status(u1)[0]['is_exceeded'] is False
+
+
+def test_periods_roll_over_and_budgets_follow_saves(db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    clock = Clock(datetime(2025, 3, 12, 23, 0, 0))
+    daily = Budget(u1, BudgetPeriod.DAILY, Decimal("10"))
+    db.save_budget(daily)
+    tracker = BudgetTracker(db, clock=clock)
+    tracker.track_user(u1)
+    db.save_entry(make_entry(u1, c_exp, "late", "8", clock.now))
+    assert tracker.get_status(u1)[0]['current_amount'] == 8.0
+
+    clock.now = datetime(2025, 3, 13, 9, 0, 0)
+    assert tracker.get_status(u1)[0]['current_amount'] == 0.0
+    db.save_entry(make_entry(u1, c_exp, "morning", "3", clock.now))
+    assert tracker.get_status(u1)[0]['current_amount'] == 3.0
+
+    weekly = Budget(u1, BudgetPeriod.WEEKLY, Decimal("100"))
+    db.save_budget(weekly)
+    assert set(_by_id(tracker.get_status(u1))) == {str(daily.budget_id), str(weekly.budget_id)}
+    assert _by_id(tracker.get_status(u1))[str(weekly.budget_id)]['current_amount'] == 11.0
+
+    daily.deactivate()
+    db.save_budget(daily)
+    db.delete_budget(weekly.budget_id)
+    assert tracker.get_status(u1) == []
+
+
+def test_category_type_change_is_recounted(json_db, user_ids):
+    u1, _ = user_ids
+    now = datetime(2025, 3, 12, 15, 0, 0)
+    category = Category("待定", CategoryType.EXPENSE)
+    json_db.save_budget(Budget(u1, BudgetPeriod.MONTHLY, Decimal("100")))
+    tracker = BudgetTracker(json_db, clock=Clock(now))
+    tracker.track_user(u1)
+    json_db.save_entry(make_entry(u1, category, "x", "10", now))
+    assert tracker.get_status(u1)[0]['current_amount'] == 10.0
+
+    category.type = CategoryType.INCOME
+    json_db.save_category(category)
+    assert tracker.get_status(u1)[0]['current_amount'] == 0.0
+
+
+def test_status_order_follows_store_after_resave(db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    now = datetime(2025, 3, 12, 15, 0, 0)
+    budgets = [Budget(u1, period, Decimal("100")) for period in BudgetPeriod]
+    for budget in budgets:
+        db.save_budget(budget)
+    tracker = BudgetTracker(db, clock=Clock(now))
+    tracker.track_user(u1)
+
+    budgets[0].update_limit(Decimal("50"))
+    db.save_budget(budgets[0])
+    budgets[1].deactivate()
+    db.save_budget(budgets[1])
+    budgets[1].activate()
+    db.save_budget(budgets[1])
+
+    expected = StatEngine(db).check_budget_status(u1, now=now)
+    assert tracker.get_status(u1) == expected
+
+
+def test_failing_handler_does_not_break_tracking(db, user_ids, categories, capsys):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    now = datetime(2025, 3, 12, 15, 0, 0)
+    db.save_budget(Budget(u1, BudgetPeriod.MONTHLY, Decimal("10"), threshold_percent=50))
+    db.save_budget(Budget(u1, BudgetPeriod.YEARLY, Decimal("10"), threshold_percent=50))
+    tracker = BudgetTracker(db, clock=Clock(now))
+    events = []
+
+    def broken(event):
+        raise RuntimeError("boom")
+
+    tracker.subscribe(broken)
+    tracker.subscribe(lambda event: events.append(event.kind))
+    tracker.track_user(u1)
+
+    db.save_entry(make_entry(u1, c_exp, "a", "20", now))
+    assert events == ['threshold', 'exceeded'] * 2
+    assert "预算提醒处理出错" in capsys.readouterr().out
+    assert [s['current_amount'] for s in tracker.get_status(u1)] == [20.0, 20.0]
+    assert tracker.get_status(u1) == StatEngine(db).check_budget_status(u1, now=now)
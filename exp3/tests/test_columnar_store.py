@@ -0,0 +1,96 @@
+# tests/test_columnar_store.py
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+from pocket_ledger.database.database import Database
+from pocket_ledger.models.category import CategoryType
+from pocket_ledger.services.stat_engine import StatEngine
+
+from .conftest import make_entry
+
+
+def _fill(db, u1, u2, c_exp, c_inc):
+    utc8 = timezone(timedelta(hours=8))
+    rows = [
+        (u1, c_exp, "a", "12.50", datetime(2025, 1, 1, 9, 0, 0)),
+        (u1, c_exp, "b", "7.25", datetime(2025, 1, 1, 23, 59, 59)),
+        (u1, c_inc, "c", "1000", datetime(2025, 1, 3, 8, 0, 0)),
+        (u1, c_exp, "d", "3.333", datetime(2025, 2, 10, 12, 0, 0)),
+        (u1, c_exp, "aware", "5", datetime(2025, 1, 2, 1, 0, 0, tzinfo=utc8)),
+        (u2, c_exp, "other", "99", datetime(2025, 1, 1, 10, 0, 0)),
+    ]
+    entries = [make_entry(*row) for row in rows]
+    db.save_entries(entries)
+    return entries
+
+
+def test_columnar_matches_row_path(json_db, user_ids, categories):
+    u1, u2 = user_ids
+    c_exp, c_inc = categories
+    entries = _fill(json_db, u1, u2, c_exp, c_inc)
+    json_db.delete_entry(entries[1].entry_id)
+
+    fast = StatEngine(Database(json_db.db_path, rollups=False))
+    slow = StatEngine(Database(json_db.db_path, columnar=False, rollups=False))
+    assert fast._columnar(u1) is not None
+    assert slow._columnar(u1) is None
+
+    ranges = [
+        (None, None),
+        (datetime(2025, 1, 1), datetime(2025, 1, 31, 23, 59, 59)),
+        (datetime(2025, 1, 1, tzinfo=timezone.utc), None),
+    ]
+    for start, end in ranges:
+        for ctype in CategoryType:
+            assert fast.calculate_total_by_type(u1, ctype, start, end) == \
+                slow.calculate_total_by_type(u1, ctype, start, end)
+        assert fast.calculate_balance(u1, start, end) == slow.calculate_balance(u1, start, end)
+
+    assert fast.get_daily_statistics(u1, datetime(2025, 1, 1), datetime(2025, 1, 5)) == \
+        slow.get_daily_statistics(u1, datetime(2025, 1, 1), datetime(2025, 1, 5))
+    aware_start = datetime(2025, 1, 1, tzinfo=timezone(timedelta(hours=8)))
+    assert fast.get_daily_statistics(u1, aware_start, aware_start + timedelta(days=2)) == \
+        slow.get_daily_statistics(u1, aware_start, aware_start + timedelta(days=2))
+    assert fast.get_monthly_statistics(u1, 2025) == slow.get_monthly_statistics(u1, 2025)
+
+
+def test_columnar_rescales_and_falls_back_when_inexact(json_db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    store = json_db.columnar_store
+    json_db.save_entry(make_entry(u1, c_exp, "a", "1.5", datetime(2025, 1, 1)))
+    json_db.save_entry(make_entry(u1, c_exp, "b", "0.125", datetime(2025, 1, 2)))
+    assert store.scale == 3
+    assert store.sum_by_type(str(u1)) == (Decimal("0"), Decimal("1.625"))
+
+    too_precise = make_entry(u1, c_exp, "c", "0.0000001", datetime(2025, 1, 3))
+    json_db.save_entry(too_precise)
+    assert not store.exact
+    engine = StatEngine(json_db)
+    assert engine._columnar(u1) is None
+    assert engine.calculate_total_by_type(u1, CategoryType.EXPENSE) == Decimal("1.6250001")
+
+    json_db.delete_entry(too_precise.entry_id)
+    assert store.exact
+
+
+def test_columnar_tombstones_and_compaction(json_db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    entries = [make_entry(u1, c_exp, f"e{i}", "1", datetime(2025, 1, 1, 10, i, 0)) for i in range(6)]
+    json_db.save_entries(entries)
+    part = json_db.columnar_store._parts[str(u1)]
+
+    json_db.delete_entry(entries[0].entry_id)
+    assert part.dead == 1 and len(part.valid) == 6
+
+    for e in entries[1:4]:
+        json_db.delete_entry(e.entry_id)
+    part = json_db.columnar_store._parts[str(u1)]
+    assert part.dead == 0 and len(part.valid) == 2
+    assert json_db.columnar_store.sum_by_type(str(u1)) == (Decimal("0"), Decimal("2"))
+
+    # 修改金额: 旧行作废, 新行追加
+    entries[4].update_amount(Decimal("10"))
+    json_db.save_entry(entries[4])
+    assert json_db.columnar_store.sum_by_type(str(u1)) == (Decimal("0"), Decimal("11"))
@@ -0,0 +1,84 @@
+# tests/test_database_entry_cache.py
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from pocket_ledger.database.database import Database
+
+from .conftest import make_entry
+
+
+def test_repeated_queries_reuse_decoded_fields(json_db, user_ids, categories):
+    db = json_db
+    u1, _ = user_ids
+    c_exp, _ = categories
+    e = make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1))
+    db.save_entry(e)
+
+    first = db.query_entries(user_id=u1)[0]
+    fields = db._entry_cache[str(e.entry_id)]
+    second = db.get_entry_by_id(e.entry_id)
+    assert db._entry_cache[str(e.entry_id)] is fields
+    assert second is not first and second.to_dict() == first.to_dict()
+
+
+def test_mutating_a_result_does_not_leak(json_db, user_ids, categories):
+    db = json_db
+    u1, _ = user_ids
+    c_exp, _ = categories
+    e = make_entry(u1, c_exp, "lunch", "10", datetime(2025, 1, 1))
+    db.save_entry(e)
+
+    got = db.get_entry_by_id(e.entry_id)
+    got.title = "HACKED"
+    got.amount = Decimal("999")
+    got.images.append("x.png")
+    again = db.get_entry_by_id(e.entry_id)
+    assert (again.title, again.amount, again.images) == ("lunch", Decimal("10"), [])
+    assert db.query_entries(user_id=u1)[0].title == "lunch"
+
+
+def test_save_and_delete_invalidate_cache(json_db, user_ids, categories):
+    db = json_db
+    u1, _ = user_ids
+    c_exp, _ = categories
+    e = make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1))
+    db.save_entry(e)
+    cached = db.get_entry_by_id(e.entry_id)
+
+    e.update_amount(Decimal("9"))
+    db.save_entry(e)
+    fresh = db.get_entry_by_id(e.entry_id)
+    assert fresh is not cached
+    assert fresh.amount == Decimal("9")
+
+    db.delete_entry(e.entry_id)
+    assert db.get_entry_by_id(e.entry_id) is None
+    assert str(e.entry_id) not in db._entry_cache
+
+
+def test_cache_is_bounded_with_lru_eviction(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    db = Database(str(tmp_path / "c.json"), entry_cache_size=2)
+    entries = [make_entry(u1, c_exp, f"e{i}", "1", datetime(2025, 1, i + 1)) for i in range(3)]
+    for e in entries:
+        db.save_entry(e)
+
+    db.get_entry_by_id(entries[0].entry_id)
+    db.get_entry_by_id(entries[1].entry_id)
+    db.get_entry_by_id(entries[0].entry_id)
+    db.get_entry_by_id(entries[2].entry_id)
+    assert list(db._entry_cache) == [str(entries[0].entry_id), str(entries[2].entry_id)]
+
+
+def test_cache_can_be_disabled(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    db = Database(str(tmp_path / "c.json"), entry_cache_size=0)
+    db.save_entry(make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1)))
+    assert db.query_entries(user_id=u1)[0] is not db.query_entries(user_id=u1)[0]
+
+    with pytest.raises(ValueError):
+        Database(str(tmp_path / "d.json"), entry_cache_size=-1)
@@ -0,0 +1,178 @@
+# tests/test_database_indexes.py
+from datetime import datetime, timedelta, timezone
+
+from pocket_ledger.database.database import Database
+from pocket_ledger.models.user import User
+
+from .conftest import make_entry
+
+
+def _user(email="a@test.com"):
+    return User(email=email, phone="12345678", password="abcdef", nickname="n")
+
+
+def test_user_index_maintained_on_write_and_delete(json_db, categories):
+    db = json_db
+    c_exp, _ = categories
+    u1, u2 = _user("u1@test.com"), _user("u2@test.com")
+    db.save_user(u1)
+    db.save_user(u2)
+
+    e1 = make_entry(u1.user_id, c_exp, "a", "1", datetime(2025, 1, 1))
+    e2 = make_entry(u1.user_id, c_exp, "b", "1", datetime(2025, 1, 2))
+    e3 = make_entry(u2.user_id, c_exp, "c", "1", datetime(2025, 1, 3))
+    for e in (e1, e2, e3):
+        db.save_entry(e)
+    assert db._user_entries[str(u1.user_id)] == {str(e1.entry_id), str(e2.entry_id)}
+
+    db.delete_entry(e1.entry_id)
+    assert [x.title for x in db.query_entries(user_id=u1.user_id)] == ["b"]
+
+    db.delete_user(u1.user_id)
+    assert str(u1.user_id) not in db._user_entries
+    assert db.query_entries(user_id=u1.user_id) == []
+    assert [x.title for x in db.query_entries(user_id=u2.user_id)] == ["c"]
+
+
+def test_user_index_rebuilt_on_load(json_db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    json_db.save_entry(make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1)))
+
+    reopened = Database(json_db.db_path)
+    assert [x.title for x in reopened.query_entries(user_id=u1)] == ["a"]
+
+
+def test_timeline_date_range_and_order(json_db, user_ids, categories):
+    db = json_db
+    u1, u2 = user_ids
+    c_exp, _ = categories
+    days = [5, 1, 3, 2, 4]
+    entries = [make_entry(u1, c_exp, f"d{d}", "1", datetime(2025, 1, d, 12, 0, 0)) for d in days]
+    for e in entries:
+        db.save_entry(e)
+    db.save_entry(make_entry(u2, c_exp, "other", "1", datetime(2025, 1, 3, 13, 0, 0)))
+
+    res = db.query_entries(user_id=u1, start_date=datetime(2025, 1, 2), end_date=datetime(2025, 1, 4, 12, 0, 0))
+    assert [x.title for x in res] == ["d4", "d3", "d2"]
+
+    db.delete_entry(entries[2].entry_id)
+    res = db.query_entries(user_id=u1, end_date=datetime(2025, 1, 3, 23, 0, 0))
+    assert [x.title for x in res] == ["d2", "d1"]
+
+    # 未指定用户时各用户的时间索引归并, 仍按时间倒序
+    res = db.query_entries(start_date=datetime(2025, 1, 2), end_date=datetime(2025, 1, 4))
+    assert [x.title for x in res] == ["other", "d2"]
+
+
+def test_timeline_separates_aware_and_naive(json_db, user_ids, categories):
+    db = json_db
+    u1, _ = user_ids
+    c_exp, _ = categories
+    utc8 = timezone(timedelta(hours=8))
+    db.save_entry(make_entry(u1, c_exp, "naive", "1", datetime(2025, 1, 1, 10, 0, 0)))
+    db.save_entry(make_entry(u1, c_exp, "aware", "1", datetime(2025, 1, 1, 10, 0, 0, tzinfo=utc8)))
+
+    res = db.query_entries(user_id=u1, start_date=datetime(2025, 1, 1, 2, 0, 0, tzinfo=timezone.utc))
+    assert [x.title for x in res] == ["aware"]
+    res = db.query_entries(user_id=u1, end_date=datetime(2025, 1, 1, 10, 0, 0))
+    assert [x.title for x in res] == ["naive"]
+
+
+def test_entries_with_invalid_timestamp_are_skipped(json_db, user_ids, categories):
+    db = json_db
+    u1, _ = user_ids
+    c_exp, _ = categories
+    e = make_entry(u1, c_exp, "ok", "1", datetime(2025, 1, 1))
+    db.save_entry(e)
+    bad = dict(db.data["entries"][str(e.entry_id)], entry_id="bad", ts_us="not-a-date")
+    db._put('entries', 'bad', bad)
+    db._flush()
+
+    assert [x.title for x in db.query_entries(user_id=u1)] == ["ok"]
+    db.delete_entry("bad")
+    assert "bad" not in db._user_entries[str(u1)]
+
+
+def test_get_user_by_email_case_insensitive(db):
+    u = _user("Alice@Test.com")
+    db.save_user(u)
+    assert db.get_user_by_email("alice@test.com") == u
+    assert db.get_user_by_email(" ALICE@TEST.COM ") == u
+    assert db.get_user_by_email("bob@test.com") is None
+
+
+def test_email_index_follows_profile_change_and_delete(json_db):
+    db = json_db
+    u = _user("old@test.com")
+    db.save_user(u)
+    u.update_profile(email="new@test.com")
+    db.save_user(u)
+    assert db.get_user_by_email("old@test.com") is None
+    assert db.get_user_by_email("new@test.com") == u
+
+    reopened = Database(db.db_path)
+    assert reopened.get_user_by_email("new@test.com") == u
+
+    db.delete_user(u.user_id)
+    assert db.get_user_by_email("new@test.com") is None
+    assert db._email_index == {}
+
+
+def test_planner_picks_smallest_index_and_keeps_order(json_db, user_ids, categories, tags):
+    db = json_db
+    u1, u2 = user_ids
+    c_exp, c_inc = categories
+    t1, t2 = tags
+    entries = [make_entry(u1, c_exp, f"lunch{i}", "1", datetime(2025, 1, 1, 10, i, 0)) for i in range(20)]
+    entries += [
+        make_entry(u1, c_inc, "salary", "100", datetime(2025, 1, 2)),
+        make_entry(u1, c_inc, "bonus", "50", datetime(2025, 1, 3), tags=[t1]),
+        make_entry(u2, c_inc, "salary", "100", datetime(2025, 1, 4)),
+        make_entry(u1, c_exp, "taxi", "30", datetime(2025, 1, 5), note="work trip", tags=[t1, t2]),
+    ]
+    db.save_entries(entries)
+
+    plan = db.explain_query(user_id=u1, category_id=c_inc.category_id)
+    assert plan['driver'] == "category"
+    assert plan['candidates'] == {'timeline': 23, 'category': 3}
+    assert plan['scanned'] == 2 and plan['matched'] == 2
+    assert plan['elapsed_ms'] >= 0
+    assert [e.title for e in db.query_entries(user_id=u1, category_id=c_inc.category_id)] == ["bonus", "salary"]
+
+    assert db.explain_query(user_id=u1, tag_ids=[t1.tag_id, t2.tag_id])['driver'] == "tags"
+    res = db.query_entries(user_id=u1, tag_ids=[t1.tag_id, t2.tag_id], start_date=datetime(2025, 1, 3))
+    assert [e.title for e in res] == ["taxi", "bonus"]
+
+    plan = db.explain_query(user_id=u1, keyword="trip")
+    assert plan['driver'] == "keyword" and plan['matched'] == 1
+
+    # 时间范围最窄时由时间索引驱动, 其余条件作为成员过滤
+    plan = db.explain_query(
+        user_id=u1, category_id=c_exp.category_id,
+        start_date=datetime(2025, 1, 1, 10, 5, 0), end_date=datetime(2025, 1, 1, 10, 6, 0)
+    )
+    assert plan['driver'] == "timeline"
+    assert plan['candidates']['timeline'] == 2 and plan['matched'] == 2
+
+    # 集合驱动时同样支持游标翻页
+    first = db.query_entries(user_id=u1, category_id=c_inc.category_id, limit=1)
+    rest = db.query_entries(
+        user_id=u1, category_id=c_inc.category_id, after=(first[0].timestamp, first[0].entry_id)
+    )
+    assert [e.title for e in first + rest] == ["bonus", "salary"]
+
+
+def test_category_and_tag_indexes_follow_updates(json_db, user_ids, categories, tags):
+    db = json_db
+    u1, _ = user_ids
+    c_exp, c_inc = categories
+    t1, _ = tags
+    e = make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1), tags=[t1])
+    db.save_entry(e)
+    e.update_category(c_inc)
+    e.remove_tag(t1)
+    db.save_entry(e)
+    assert db._category_entries == {str(c_inc.category_id): {str(e.entry_id)}}
+    assert db._tag_entries == {}
+    assert db.query_entries(category_id=c_exp.category_id) == []
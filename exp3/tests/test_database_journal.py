@@ -0,0 +1,156 @@
+# tests/test_database_journal.py
+import json
+import os
+from datetime import datetime
+
+from pocket_ledger.database.database import Database
+
+from .conftest import make_entry
+
+
+def _journal_lines(db):
+    with open(db.journal_path, 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def test_journal_mode_appends_instead_of_rewriting_snapshot(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    db = Database(str(tmp_path / "j.json"), journal=True, checkpoint_interval=0)
+    snapshot_mtime = os.path.getmtime(db.db_path)
+
+    db.save_category(c_exp)
+    e = make_entry(u1, c_exp, "lunch", "12.5", datetime(2025, 1, 1, 10, 0, 0))
+    db.save_entry(e)
+
+    records = _journal_lines(db)
+    assert [r['table'] for r in records] == ['categories', 'entries']
+    assert records[-1]['op'] == 'put'
+    assert records[-1]['key'] == str(e.entry_id)
+    assert os.path.getmtime(db.db_path) == snapshot_mtime
+
+
+def test_journal_replayed_on_load(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    path = str(tmp_path / "j.json")
+    db = Database(path, journal=True, checkpoint_interval=0)
+    db.save_category(c_exp)
+    keep = make_entry(u1, c_exp, "keep", "1", datetime(2025, 1, 1, 10, 0, 0))
+    gone = make_entry(u1, c_exp, "gone", "2", datetime(2025, 1, 2, 10, 0, 0))
+    db.save_entry(keep)
+    db.save_entry(gone)
+    db.delete_entry(gone.entry_id)
+
+    reopened = Database(path, journal=True)
+    assert [x.title for x in reopened.query_entries(user_id=u1)] == ["keep"]
+
+
+def test_checkpoint_rewrites_snapshot_and_truncates_journal(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    path = str(tmp_path / "j.json")
+    db = Database(path, journal=True, checkpoint_interval=0)
+    db.save_category(c_exp)
+    db.save_entry(make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1, 10, 0, 0)))
+
+    db.checkpoint()
+    assert _journal_lines(db) == []
+    with open(path, 'r', encoding='utf-8') as f:
+        assert len(json.load(f)['entries']) == 1
+
+
+def test_auto_checkpoint_after_interval(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    db = Database(str(tmp_path / "j.json"), journal=True, checkpoint_interval=3)
+    db.save_category(c_exp)
+    db.save_entry(make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1, 10, 0, 0)))
+    assert len(_journal_lines(db)) == 2
+    db.save_entry(make_entry(u1, c_exp, "b", "1", datetime(2025, 1, 1, 11, 0, 0)))
+    assert _journal_lines(db) == []
+
+
+def test_torn_last_journal_line_is_ignored(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    path = str(tmp_path / "j.json")
+    db = Database(path, journal=True, checkpoint_interval=0)
+    db.save_category(c_exp)
+    db.save_entry(make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1, 10, 0, 0)))
+    with open(db.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"op":"put","table":"entr')
+
+    reopened = Database(path, journal=True)
+    assert len(reopened.query_entries(user_id=u1)) == 1
+
+
+def test_plain_mode_merges_leftover_journal(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    path = str(tmp_path / "j.json")
+    db = Database(path, journal=True, checkpoint_interval=0)
+    db.save_category(c_exp)
+    db.save_entry(make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1, 10, 0, 0)))
+
+    plain = Database(path)
+    assert len(plain.query_entries(user_id=u1)) == 1
+    with open(path, 'r', encoding='utf-8') as f:
+        assert len(json.load(f)['entries']) == 1
+    assert os.path.getsize(plain.journal_path) == 0
+
+
+def test_appends_after_torn_tail_survive_reload(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    path = str(tmp_path / "j.json")
+    db = Database(path, journal=True, checkpoint_interval=0)
+    db.save_category(c_exp)
+    db.save_entry(make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1, 10, 0, 0)))
+    with open(db.journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"op":"put","table":"entr')
+
+    reopened = Database(path, journal=True, checkpoint_interval=0)
+    reopened.save_entry(make_entry(u1, c_exp, "b", "1", datetime(2025, 1, 2, 10, 0, 0)))
+    reopened.save_entry(make_entry(u1, c_exp, "c", "1", datetime(2025, 1, 3, 10, 0, 0)))
+
+    again = Database(path, journal=True)
+    assert sorted(e.title for e in again.query_entries(user_id=u1)) == ["a", "b", "c"]
+
+
+def test_failed_journal_write_is_retried(tmp_path, user_ids, categories, monkeypatch):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    path = str(tmp_path / "j.json")
+    db = Database(path, journal=True, checkpoint_interval=0)
+    db.save_category(c_exp)
+    original = Database._append_to_journal
+
+    def broken(self, records):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(Database, "_append_to_journal", broken)
+    assert db.save_entry(make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1, 10, 0, 0))) is False
+    monkeypatch.setattr(Database, "_append_to_journal", original)
+    db.save_entry(make_entry(u1, c_exp, "b", "1", datetime(2025, 1, 2, 10, 0, 0)))
+
+    reopened = Database(path, journal=True)
+    assert sorted(e.title for e in reopened.query_entries(user_id=u1)) == ["a", "b"]
+
+
+def test_failed_snapshot_write_keeps_previous_snapshot(tmp_path, user_ids, categories, monkeypatch):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    path = str(tmp_path / "j.json")
+    db = Database(path)
+    db.save_category(c_exp)
+    db.save_entry(make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1, 10, 0, 0)))
+
+    def crash(*args, **kwargs):
+        raise OSError("crash mid-write")
+
+    monkeypatch.setattr(json, "dump", crash)
+    assert db.save_entry(make_entry(u1, c_exp, "b", "1", datetime(2025, 1, 2, 10, 0, 0))) is False
+    monkeypatch.undo()
+    assert [e.title for e in Database(path).query_entries(user_id=u1)] == ["a"]
+    assert not os.path.exists(path + ".tmp")
@@ -0,0 +1,218 @@
+# tests/test_database_normalized_storage.py
+import copy
+import json
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from pocket_ledger.database.database import Database
+from pocket_ledger.models.category import Category, CategoryType
+from pocket_ledger.services.stat_engine import StatEngine
+
+from .conftest import make_entry
+
+
+def test_entries_store_only_reference_ids(json_db, user_ids, categories, tags):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    t1, t2 = tags
+    e = make_entry(u1, c_exp, "lunch", "12", datetime(2025, 1, 1), tags=[t1, t2])
+    json_db.save_entry(e)
+
+    record = json_db.data['entries'][str(e.entry_id)]
+    assert 'category' not in record and 'tags' not in record
+    assert record['category_id'] == str(c_exp.category_id)
+    assert record['tag_ids'] == [str(t1.tag_id), str(t2.tag_id)]
+    # 引用的分类/标签不存在时随账目一并写入共享表
+    assert str(c_exp.category_id) in json_db.data['categories']
+    assert str(t2.tag_id) in json_db.data['tags']
+
+    got = Database(json_db.db_path).get_entry_by_id(e.entry_id)
+    assert got.category == c_exp
+    assert [t.name for t in got.tags] == ["work", "fun"]
+
+
+def test_rename_reaches_existing_entries(db, user_ids, categories, tags):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    t1, _ = tags
+    e = make_entry(u1, c_exp, "lunch", "12", datetime(2025, 1, 1), tags=[t1])
+    db.save_entry(e)
+    assert db.get_entry_by_id(e.entry_id).category.name == "餐饮-测试"
+
+    c_exp.rename("餐饮")
+    t1.rename("office")
+    assert db.save_category(c_exp) and db.save_tag(t1)
+    got = db.get_entry_by_id(e.entry_id)
+    assert got.category.name == "餐饮"
+    assert [t.name for t in got.tags] == ["office"]
+
+
+def test_delete_category_refused_while_referenced(db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, c_inc = categories
+    db.save_category(c_inc)
+    e = make_entry(u1, c_exp, "lunch", "1", datetime(2025, 1, 1))
+    db.save_entry(e)
+    assert db.delete_category(c_exp.category_id) is False
+    assert db.delete_category(c_inc.category_id) is True
+
+    db.delete_entry(e.entry_id)
+    assert db.delete_category(c_exp.category_id) is True
+
+
+def test_delete_tag_strips_it_from_entries(db, user_ids, categories, tags):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    t1, t2 = tags
+    e = make_entry(u1, c_exp, "lunch", "1", datetime(2025, 1, 1), tags=[t1, t2])
+    db.save_entry(e)
+
+    assert db.delete_tag(t1.tag_id) is True
+    assert [t.name for t in db.get_entry_by_id(e.entry_id).tags] == ["fun"]
+    assert db.query_entries(user_id=u1, tag_ids=[t1.tag_id]) == []
+    reopened = type(db)(db.db_path)
+    assert [t.name for t in reopened.get_entry_by_id(e.entry_id).tags] == ["fun"]
+
+
+def test_category_type_change_updates_statistics(json_db, user_ids):
+    u1, _ = user_ids
+    category = Category("待定", CategoryType.EXPENSE)
+    json_db.save_entry(make_entry(u1, category, "x", "10", datetime(2025, 1, 1)))
+    engine = StatEngine(json_db)
+    assert engine.calculate_total_by_type(u1, CategoryType.EXPENSE) == Decimal("10")
+
+    category.type = CategoryType.INCOME
+    json_db.save_category(category)
+    assert engine.calculate_total_by_type(u1, CategoryType.EXPENSE) == Decimal("0")
+    assert engine.calculate_total_by_type(u1, CategoryType.INCOME) == Decimal("10")
+
+
+def test_legacy_file_is_migrated_once(tmp_path, user_ids, categories, tags):
+    u1, _ = user_ids
+    c_exp, c_inc = categories
+    t1, _ = tags
+    e1 = make_entry(u1, c_exp, "lunch", "12", datetime(2025, 1, 1), tags=[t1])
+    e2 = make_entry(u1, c_inc, "salary", "100", datetime(2025, 1, 2))
+    # 旧版本文件: 没有 meta, 账目内嵌分类/标签, 分类表中只有其中一个分类
+    legacy = {
+        'users': {},
+        'entries': {str(e.entry_id): e.to_dict() for e in (e1, e2)},
+        'categories': {str(c_exp.category_id): c_exp.to_dict()},
+        'tags': {},
+        'budgets': {},
+    }
+    path = tmp_path / "legacy.json"
+    path.write_text(json.dumps(legacy, ensure_ascii=False), encoding="utf-8")
+
+    db = Database(str(path))
+    on_disk = json.loads(path.read_text(encoding="utf-8"))
+    assert on_disk['meta'] == {'schema_version': Database.SCHEMA_VERSION}
+    assert all('category' not in rec for rec in on_disk['entries'].values())
+    assert set(on_disk['categories']) == {str(c_exp.category_id), str(c_inc.category_id)}
+    assert set(on_disk['tags']) == {str(t1.tag_id)}
+
+    assert [x.title for x in db.query_entries(user_id=u1, tag_ids=[t1.tag_id])] == ["lunch"]
+    assert db.get_entry_by_id(e2.entry_id).category == c_inc
+    assert db._migrate() is False
+
+
+def test_decoded_entries_share_reference_instances(db, user_ids, categories, tags):
+    u1, u2 = user_ids
+    c_exp, _ = categories
+    t1, _ = tags
+    db.save_entries([
+        make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1), tags=[t1]),
+        make_entry(u2, c_exp, "b", "2", datetime(2025, 1, 2), tags=[t1]),
+    ])
+    a, = db.query_entries(user_id=u1)
+    b, = db.query_entries(user_id=u2)
+    assert a.category is b.category
+    assert a.tags[0] is b.tags[0]
+    # 单独读取的分类归调用方所有, 不是共享实例
+    assert db.get_category_by_id(c_exp.category_id) is not a.category
+
+    c_exp.rename("改名")
+    db.save_category(c_exp)
+    a2, = db.query_entries(user_id=u1)
+    assert a2.category is not a.category
+    assert a2.category.name == "改名"
+    assert db.query_entries(user_id=u2)[0].category is a2.category
+
+
+def test_shared_references_are_read_only(db, user_ids, categories, tags):
+    u1, u2 = user_ids
+    c_exp, _ = categories
+    t1, _ = tags
+    db.save_entries([
+        make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1), tags=[t1]),
+        make_entry(u2, c_exp, "b", "2", datetime(2025, 1, 2), tags=[t1]),
+    ])
+    a, = db.query_entries(user_id=u1)
+    with pytest.raises(AttributeError):
+        a.category.rename("改名")
+    with pytest.raises(AttributeError):
+        a.tags[0].name = "改名"
+    b, = db.query_entries(user_id=u2)
+    assert (b.category.name, b.tags[0].name) == (c_exp.name, t1.name)
+
+    # 副本可以修改并保存, 不影响已经取出的共享实例
+    editable = copy.copy(a.category)
+    editable.rename("改名")
+    db.save_category(editable)
+    assert a.category.name == c_exp.name
+    assert db.query_entries(user_id=u2)[0].category.name == "改名"
+
+
+def test_v2_file_upgrades_to_integer_amounts_and_timestamps(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    utc8 = timezone(timedelta(hours=8))
+    e1 = make_entry(u1, c_exp, "aware", "12.50", datetime(2025, 1, 1, 9, 30, 0, 123, tzinfo=utc8))
+    e2 = make_entry(u1, c_exp, "naive", "3", datetime(2025, 1, 2, 8, 0, 0))
+    v2 = {
+        'meta': {'schema_version': 2},
+        'users': {},
+        'entries': {},
+        'categories': {str(c_exp.category_id): c_exp.to_dict()},
+        'tags': {},
+        'budgets': {},
+    }
+    for e in (e1, e2):
+        data = e.to_dict()
+        record = {k: v for k, v in data.items() if k not in ('category', 'tags')}
+        v2['entries'][data['entry_id']] = dict(record, category_id=data['category']['category_id'], tag_ids=[])
+    path = tmp_path / "v2.json"
+    path.write_text(json.dumps(v2, ensure_ascii=False), encoding="utf-8")
+
+    db = Database(str(path))
+    record = json.loads(path.read_text(encoding="utf-8"))['entries'][str(e1.entry_id)]
+    assert (record['amount_minor'], record['amount_exp']) == (1250, -2)
+    assert record['ts_offset'] == 8 * 3600
+    assert 'amount' not in record and 'timestamp' not in record and 'created_at' not in record
+
+    got = db.get_entry_by_id(e1.entry_id)
+    assert str(got.amount) == "12.50"
+    assert got.timestamp == e1.timestamp and got.timestamp.utcoffset() == timedelta(hours=8)
+    assert got.to_dict() == e1.to_dict()
+    assert db.get_entry_by_id(e2.entry_id).to_dict() == e2.to_dict()
+
+
+def test_amount_filters_compare_across_exponents(db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    amounts = ["1.005", "1.01", "1.1", "2", "2.000", "1E+1"]
+    db.save_entries([
+        make_entry(u1, c_exp, a, a, datetime(2025, 1, 1, 0, i, 0)) for i, a in enumerate(amounts)
+    ])
+
+    def titles(**kw):
+        return sorted(e.title for e in db.query_entries(user_id=u1, **kw))
+
+    assert titles(min_amount=Decimal("1.01")) == ["1.01", "1.1", "1E+1", "2", "2.000"]
+    assert titles(max_amount=Decimal("1.0099")) == ["1.005"]
+    assert titles(min_amount=Decimal("1.001"), max_amount=Decimal("2")) == \
+        ["1.005", "1.01", "1.1", "2", "2.000"]
+    assert titles(min_amount=Decimal("2.0001")) == ["1E+1"]
+    assert titles(max_amount=Decimal("-Infinity")) == []
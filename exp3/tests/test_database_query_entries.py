@@ -2,6 +2,8 @@
 from datetime import datetime
 from decimal import Decimal
 
+import pytest
+
 from .conftest import make_entry
 
 def test_query_entries_user_filter(db, user_ids, categories):
@@ -135,3 +137,67 @@ def test_query_entries_combined_filters(db, user_ids, categories, tags):
     )
     assert len(res) == 1
     assert res[0].title == "match"
+
+def test_query_entries_keyset_pagination(db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    db.save_category(c_exp)
+    same_ts = datetime(2025, 1, 3, 10, 0, 0)
+    entries = [make_entry(u1, c_exp, f"d{d}", str(d), datetime(2025, 1, d, 10, 0, 0)) for d in range(1, 6)]
+    entries += [make_entry(u1, c_exp, f"s{i}", "9", same_ts) for i in range(3)]
+    db.save_entries(entries)
+    expected = [e.entry_id for e in db.query_entries(user_id=u1)]
+    assert len(expected) == 8
+
+    pages, after = [], None
+    while True:
+        page = db.query_entries(user_id=u1, limit=3, after=after)
+        if not page:
+            break
+        pages.append(page)
+        after = (page[-1].timestamp, page[-1].entry_id)
+    assert [len(p) for p in pages] == [3, 3, 2]
+    assert [e.entry_id for p in pages for e in p] == expected
+
+    # 金额过滤与分页组合: 凑满一页即返回
+    res = db.query_entries(user_id=u1, min_amount=Decimal("3"), limit=2)
+    assert [e.amount for e in res] == [Decimal("5"), Decimal("4")]
+    assert db.query_entries(user_id=u1, limit=0) == []
+
+def test_query_entries_pagination_args_validated(db, user_ids):
+    u1, _ = user_ids
+    with pytest.raises(ValueError):
+        db.query_entries(user_id=u1, limit=-1)
+    with pytest.raises(TypeError):
+        db.query_entries(user_id=u1, after=datetime(2025, 1, 1))
+
+def test_iter_entries_streams_same_results(db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    db.save_category(c_exp)
+    db.save_entries([make_entry(u1, c_exp, f"e{i}", str(i + 1), datetime(2025, 1, 1, 10, i, 0)) for i in range(5)])
+
+    # 参数在调用时即校验, 不必等到开始迭代
+    with pytest.raises(ValueError):
+        db.iter_entries(start_date=datetime(2025, 2, 1), end_date=datetime(2025, 1, 1))
+
+    it = db.iter_entries(user_id=u1, min_amount=Decimal("2"))
+    assert next(it).title == "e4"
+    assert [e.title for e in it] == ["e3", "e2", "e1"]
+    assert [e.entry_id for e in db.iter_entries(user_id=u1, limit=2)] == \
+        [e.entry_id for e in db.query_entries(user_id=u1, limit=2)]
+
+def test_compiled_row_predicates_only_include_active_filters():
+    from pocket_ledger.database.database import _compile_row_predicates
+
+    assert len(_compile_row_predicates(None, None, None)) == 1
+    predicates = _compile_row_predicates(Decimal("1"), Decimal("5"), "Lunch")
+    assert len(predicates) == 2
+
+    def match(data):
+        return all(p(data) for p in predicates)
+
+    assert match({'amount_minor': 3, 'amount_exp': 0, 'title': "team LUNCH", 'note': None})
+    assert not match({'amount_minor': 6, 'amount_exp': 0, 'title': "lunch"})
+    assert not match({'amount': "3", 'title': "lunch"})
+    assert not match({'amount_minor': 3, 'amount_exp': 0, 'title': "dinner", 'note': ""})
@@ -0,0 +1,74 @@
+# tests/test_database_transaction.py
+from datetime import datetime
+
+import pytest
+
+from pocket_ledger.database.database import Database
+
+from .conftest import make_entry
+
+
+def test_transaction_persists_once_on_exit(json_db, user_ids, categories, monkeypatch):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    db = json_db
+    writes = []
+    original = db._save_to_file
+    monkeypatch.setattr(db, "_save_to_file", lambda: (writes.append(1), original()))
+
+    with db.transaction():
+        db.save_category(c_exp)
+        for i in range(10):
+            db.save_entry(make_entry(u1, c_exp, f"e{i}", "1", datetime(2025, 1, 1, 10, i, 0)))
+        assert writes == []
+
+    assert writes == [1]
+    reopened = Database(db.db_path)
+    assert len(reopened.query_entries(user_id=u1)) == 10
+
+
+def test_transaction_rolls_back_on_exception(db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    db.save_category(c_exp)
+    kept = make_entry(u1, c_exp, "kept", "1", datetime(2025, 1, 1, 10, 0, 0))
+    db.save_entry(kept)
+
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.save_entry(make_entry(u1, c_exp, "new", "1", datetime(2025, 1, 2, 10, 0, 0)))
+            db.delete_entry(kept.entry_id)
+            raise RuntimeError("boom")
+
+    assert [x.title for x in db.query_entries(user_id=u1)] == ["kept"]
+    reopened = type(db)(db.db_path)
+    assert [x.title for x in reopened.query_entries(user_id=u1)] == ["kept"]
+
+
+def test_nested_transaction_rolls_back_inner_only(db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    db.save_category(c_exp)
+
+    with db.transaction():
+        db.save_entry(make_entry(u1, c_exp, "outer", "1", datetime(2025, 1, 1, 10, 0, 0)))
+        with pytest.raises(ValueError):
+            with db.batch():
+                db.save_entry(make_entry(u1, c_exp, "inner", "1", datetime(2025, 1, 2, 10, 0, 0)))
+                raise ValueError
+
+    reopened = type(db)(db.db_path)
+    assert [x.title for x in reopened.query_entries(user_id=u1)] == ["outer"]
+
+
+def test_transaction_in_journal_mode_appends_all_records(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    db = Database(str(tmp_path / "j.json"), journal=True, checkpoint_interval=0)
+    with db.transaction():
+        db.save_category(c_exp)
+        db.save_entry(make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1, 10, 0, 0)))
+        db.save_entry(make_entry(u1, c_exp, "b", "1", datetime(2025, 1, 1, 11, 0, 0)))
+
+    reopened = Database(db.db_path, journal=True)
+    assert len(reopened.query_entries(user_id=u1)) == 2
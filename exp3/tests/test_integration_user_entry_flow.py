@@ -47,3 +47,23 @@ def test_integration_user_add_and_query_entry(tmp_path):
     assert len(entries) == 1
     assert entries[0].title == "integration lunch"
     assert entries[0].amount == Decimal("25.50")
+
+
+def test_integration_export_csv_streams_entries(tmp_path):
+    app = AppLogic(str(tmp_path / "export.json"))
+    ok, msg, _user = app.register(email="export@test.com", phone="12345678", password="123456", nickname="exp")
+    assert ok, msg
+    ok, msg, _user = app.login("export@test.com", "123456")
+    assert ok, msg
+
+    csv_path = tmp_path / "entries.csv"
+    assert app.export_to_csv(str(csv_path)) == (False, "没有数据可导出")
+
+    category = app.get_categories_by_type(CategoryType.EXPENSE)[0]
+    for i in range(3):
+        ok, msg, _entry = app.add_entry(category_id=category.category_id, title=f"item{i}", amount=Decimal("1"))
+        assert ok, msg
+
+    assert app.export_to_csv(str(csv_path)) == (True, "成功导出 3 条记录")
+    lines = csv_path.read_text(encoding="utf-8-sig").splitlines()
+    assert len(lines) == 4
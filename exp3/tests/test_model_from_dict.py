@@ -0,0 +1,39 @@
+# tests/test_model_from_dict.py
+import uuid
+import pytest
+from datetime import datetime
+from decimal import Decimal
+
+from pocket_ledger.models.category import Category, CategoryType
+from pocket_ledger.models.entry import Entry
+from pocket_ledger.models.tag import Tag
+
+def test_from_dict_roundtrip_keeps_all_fields():
+    category = Category("餐饮", CategoryType.EXPENSE, icon="🍔", description="吃饭")
+    tag = Tag("work")
+    e = Entry(user_id=uuid.uuid4(), category=category, title="lunch", amount=Decimal("12.50"),
+              note="", timestamp=datetime(2025, 1, 1, 12, 0, 0), images=["a.png"])
+    e.add_tag(tag)
+
+    got = Entry.from_dict(e.to_dict())
+    assert got.to_dict() == e.to_dict()
+    assert got.tags[0].color == "#808080"
+    assert Category.from_dict(category.to_dict()).to_dict() == category.to_dict()
+
+def test_constructors_still_enforce_contracts():
+    category = Category("餐饮", CategoryType.EXPENSE)
+    with pytest.raises(Exception):
+        Entry(user_id=uuid.uuid4(), category=category, title=" ", amount=Decimal("1"))
+    with pytest.raises(Exception):
+        Entry(user_id=uuid.uuid4(), category=category, title="x", amount=Decimal("0"))
+    with pytest.raises(Exception):
+        Tag("")
+
+def test_models_are_slotted():
+    category = Category("餐饮", CategoryType.EXPENSE)
+    e = Entry(user_id=uuid.uuid4(), category=category, title="x", amount=Decimal("1"))
+    for obj in (e, category, Tag("t")):
+        assert not hasattr(obj, "__dict__")
+    with pytest.raises(AttributeError):
+        e.colour = "red"
+    assert Entry.from_dict(e.to_dict()) == e
@@ -0,0 +1,148 @@
+# tests/test_rollup_store.py
+from datetime import datetime, time, timedelta, timezone
+from decimal import Decimal
+
+import pytest
+
+from pocket_ledger.database.database import Database
+from pocket_ledger.models.category import CategoryType
+from pocket_ledger.services.stat_engine import StatEngine
+
+from .conftest import make_entry
+
+
+def _row_engine(db):
+    return StatEngine(Database(db.db_path, columnar=False, rollups=False))
+
+
+def _no_entry_reads(db, monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("统计不应读取账目")
+    monkeypatch.setattr(db, "iter_entries", fail)
+
+
+def test_rollups_answer_day_aligned_ranges(json_db, user_ids, categories, monkeypatch):
+    u1, u2 = user_ids
+    c_exp, c_inc = categories
+    utc8 = timezone(timedelta(hours=8))
+    entries = [
+        make_entry(u1, c_exp, "a", "12.50", datetime(2025, 1, 1, 9, 0, 0)),
+        make_entry(u1, c_exp, "b", "7.25", datetime(2025, 1, 1, 23, 59, 59, 999999)),
+        make_entry(u1, c_inc, "c", "1000", datetime(2025, 1, 3, 8, 0, 0)),
+        make_entry(u1, c_exp, "d", "3.333", datetime(2025, 2, 10, 12, 0, 0)),
+        make_entry(u1, c_exp, "e", "5", datetime(2025, 12, 31, 23, 59, 59, 500000)),
+        make_entry(u1, c_exp, "aware", "5", datetime(2025, 1, 2, 1, 0, 0, tzinfo=utc8)),
+        make_entry(u2, c_exp, "other", "99", datetime(2025, 1, 1, 10, 0, 0)),
+    ]
+    json_db.save_entries(entries)
+    # 修改金额与分类: 旧值扣除、新值计入
+    entries[0].update_amount(Decimal("20"))
+    entries[3].update_category(c_inc)
+    json_db.save_entry(entries[0])
+    json_db.save_entry(entries[3])
+    json_db.delete_entry(entries[1].entry_id)
+
+    slow = _row_engine(json_db)
+    fast = StatEngine(json_db)
+    _no_entry_reads(json_db, monkeypatch)
+
+    jan_start = datetime(2025, 1, 1)
+    jan_end = datetime.combine(datetime(2025, 1, 31).date(), time.max)
+    aware_start = datetime(2025, 1, 1, tzinfo=utc8)
+    aware_end = datetime.combine(aware_start.date(), time.max, tzinfo=utc8)
+    for start, end in [(None, None), (jan_start, jan_end), (jan_start, None), (None, jan_end),
+                       (aware_start, aware_end + timedelta(days=3))]:
+        for ctype in CategoryType:
+            assert fast.calculate_total_by_type(u1, ctype, start, end) == \
+                slow.calculate_total_by_type(u1, ctype, start, end)
+        assert fast.get_statistics_by_category(u1, start, end) == \
+            slow.get_statistics_by_category(u1, start, end)
+    assert fast.get_daily_statistics(u1, jan_start, datetime(2025, 1, 5)) == \
+        slow.get_daily_statistics(u1, jan_start, datetime(2025, 1, 5))
+    assert fast.get_monthly_statistics(u1, 2025) == slow.get_monthly_statistics(u1, 2025)
+    assert fast.get_monthly_statistics(u1, 2025)[11]['expense'] == 5.0
+
+
+def test_category_type_change_is_reflected(json_db, user_ids, categories, monkeypatch):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    json_db.save_entry(make_entry(u1, c_exp, "x", "10", datetime(2025, 1, 1)))
+    assert StatEngine(json_db).calculate_balance(u1) == Decimal("-10")
+    c_exp.type = CategoryType.INCOME
+    json_db.save_category(c_exp)
+    _no_entry_reads(json_db, monkeypatch)
+    assert StatEngine(json_db).calculate_total_by_type(u1, CategoryType.INCOME) == Decimal("10")
+
+
+def test_unaligned_or_mixed_offset_ranges_fall_back(json_db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    json_db.save_entries([
+        make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1, 10, 0, 0)),
+        make_entry(u1, c_exp, "b", "2", datetime(2025, 1, 1, 10, 0, 0, tzinfo=timezone.utc)),
+        make_entry(u1, c_exp, "c", "4", datetime(2025, 1, 1, 10, 0, 0, tzinfo=timezone(timedelta(hours=8)))),
+    ])
+    store = json_db.rollup_store
+    assert store.collect(str(u1), datetime(2025, 1, 1, 9, 0, 0), None) is None
+    assert store.collect(str(u1), datetime(2025, 1, 1, tzinfo=timezone.utc), None) is None
+    assert len(store.collect(str(u1), datetime(2025, 1, 1), None)) == 1
+
+    fast = StatEngine(json_db)
+    slow = _row_engine(json_db)
+    start = datetime(2025, 1, 1, 9, 0, 0, tzinfo=timezone.utc)
+    for s in (datetime(2025, 1, 1, 9, 0, 0), start, datetime(2025, 1, 1, tzinfo=timezone.utc)):
+        assert fast.calculate_total_by_type(u1, CategoryType.EXPENSE, s) == \
+            slow.calculate_total_by_type(u1, CategoryType.EXPENSE, s)
+
+
+def test_rollup_buckets_are_dropped_when_empty(json_db, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    e = make_entry(u1, c_exp, "a", "1", datetime(2025, 1, 1))
+    json_db.save_entry(e)
+    json_db.delete_entry(e.entry_id)
+    assert json_db.rollup_store.collect(str(u1)) == []
+    assert json_db.rollup_store._users == {}
+    with pytest.raises(ValueError):
+        StatEngine(json_db).calculate_total_by_type(
+            u1, CategoryType.EXPENSE, datetime(2025, 2, 1), datetime(2025, 1, 1)
+        )
+
+
+def test_prefix_sums_follow_incremental_changes(json_db, user_ids, categories, monkeypatch):
+    u1, _ = user_ids
+    c_exp, c_inc = categories
+    base = datetime(2025, 3, 1)
+    json_db.save_entries([
+        make_entry(u1, c_exp if i % 3 else c_inc, f"e{i}", str(i + 1), base + timedelta(days=i, hours=i % 24))
+        for i in range(40)
+    ])
+    fast = StatEngine(json_db)
+
+    def check():
+        slow = _row_engine(json_db)
+        for days in (1, 7, 30):
+            for first in (base - timedelta(days=3), base + timedelta(days=10), base + timedelta(days=35)):
+                start = first
+                end = datetime.combine((first + timedelta(days=days - 1)).date(), time.max)
+                assert fast.calculate_balance(u1, start, end) == slow.calculate_balance(u1, start, end)
+                assert fast.calculate_total_by_type(u1, CategoryType.INCOME, start, end) == \
+                    slow.calculate_total_by_type(u1, CategoryType.INCOME, start, end)
+        assert fast.calculate_balance(u1) == slow.calculate_balance(u1)
+        assert fast.get_daily_statistics(u1, base, base + timedelta(days=45)) == \
+            slow.get_daily_statistics(u1, base, base + timedelta(days=45))
+
+    check()
+    series = json_db.rollup_store._series[(str(u1), None)]
+    assert series.dirty == len(series.income)
+
+    # 中间插入: 只从该日起重算
+    json_db.save_entry(make_entry(u1, c_exp, "mid", "100", base + timedelta(days=20)))
+    assert series.dirty == 20
+    check()
+    # 早于起点 / 晚于终点 / 删除
+    json_db.save_entry(make_entry(u1, c_inc, "early", "7", base - timedelta(days=2)))
+    json_db.save_entry(make_entry(u1, c_exp, "late", "9", base + timedelta(days=44)))
+    for e in json_db.query_entries(user_id=u1, keyword="e1"):
+        json_db.delete_entry(e.entry_id)
+    check()
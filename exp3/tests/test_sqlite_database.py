@@ -0,0 +1,86 @@
+# tests/test_sqlite_database.py
+from datetime import datetime, timezone
+from decimal import Decimal
+
+from pocket_ledger.app_logic import AppLogic
+from pocket_ledger.database import Database, SqliteDatabase, open_database
+from pocket_ledger.models.category import CategoryType
+
+from .conftest import make_entry
+
+
+def test_open_database_selects_backend(tmp_path):
+    assert isinstance(open_database(str(tmp_path / "a.json")), Database)
+    assert isinstance(open_database(str(tmp_path / "a.db")), SqliteDatabase)
+    assert isinstance(open_database(str(tmp_path / "a.data"), backend="sqlite"), SqliteDatabase)
+
+
+def test_indexes_created(tmp_path):
+    db = SqliteDatabase(str(tmp_path / "idx.db"))
+    names = {row[0] for row in db._conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    assert {"idx_entries_user_ts", "idx_entries_user_category", "idx_users_email"} <= names
+
+
+def test_entries_roundtrip_with_tags_and_aware_timestamps(tmp_path, user_ids, categories, tags):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    t1, t2 = tags
+    path = str(tmp_path / "roundtrip.sqlite")
+    db = SqliteDatabase(path)
+    ts = datetime(2025, 1, 1, 10, 0, 0, tzinfo=timezone.utc)
+    e = make_entry(u1, c_exp, "lunch", "12.50", ts, note="n", tags=[t2, t1])
+    db.save_entry(e)
+    db.close()
+
+    reopened = SqliteDatabase(path)
+    got = reopened.get_entry_by_id(e.entry_id)
+    assert got.amount == Decimal("12.50")
+    assert got.timestamp == ts
+    assert got.category == c_exp
+    assert [t.name for t in got.tags] == ["fun", "work"]
+
+    naive = datetime(2025, 1, 1)
+    assert reopened.query_entries(user_id=u1, start_date=naive) == []
+    assert len(reopened.query_entries(user_id=u1, start_date=datetime(2025, 1, 1, tzinfo=timezone.utc))) == 1
+
+
+def test_delete_category_in_use_is_refused(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, c_inc = categories
+    db = SqliteDatabase(str(tmp_path / "cat.db"))
+    db.save_category(c_inc)
+    db.save_entry(make_entry(u1, c_exp, "lunch", "1", datetime(2025, 1, 1)))
+    assert db.delete_category(c_exp.category_id) is False
+    assert db.delete_category(c_inc.category_id) is True
+
+
+def test_app_logic_runs_on_sqlite_backend(tmp_path):
+    app = AppLogic(str(tmp_path / "ledger.db"))
+    assert isinstance(app.database, SqliteDatabase)
+
+    ok, msg, _user = app.register(email="sql@test.com", phone="12345678", password="abcdef", nickname="sql")
+    assert ok, msg
+    ok, msg, _user = app.login("sql@test.com", "abcdef")
+    assert ok, msg
+
+    category = app.get_categories_by_type(CategoryType.EXPENSE)[0]
+    ok, msg, entry = app.add_entry(category.category_id, "coffee", Decimal("15"))
+    assert ok, msg
+    assert [e.title for e in app.query_entries(keyword="COFFEE")] == ["coffee"]
+    assert app.get_summary_statistics()['total_expense'] == 15.0
+
+    ok, msg = app.delete_current_user()
+    assert ok, msg
+    assert app.database.get_entry_by_id(entry.entry_id) is None
+
+
+def test_explain_query_reports_sqlite_plan(tmp_path, user_ids, categories):
+    u1, _ = user_ids
+    c_exp, _ = categories
+    db = SqliteDatabase(str(tmp_path / "explain.db"))
+    db.save_entries([make_entry(u1, c_exp, f"e{i}", str(i + 1), datetime(2025, 1, 1, 10, i, 0)) for i in range(5)])
+
+    plan = db.explain_query(user_id=u1, min_amount=Decimal("4"))
+    assert plan['driver'] == "sqlite"
+    assert any("idx_entries_user_ts" in step for step in plan['steps'])
+    assert plan['scanned'] == 5 and plan['matched'] == 2
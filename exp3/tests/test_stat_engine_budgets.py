@@ -0,0 +1,68 @@
+# tests/test_stat_engine_budgets.py
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from pocket_ledger.models.budget import Budget, BudgetPeriod
+from pocket_ledger.models.category import CategoryType
+from pocket_ledger.services.budget_periods import period_range
+from pocket_ledger.services.stat_engine import StatEngine
+
+from .conftest import make_entry
+
+
+def _expected(db, budget, now):
+    start, end = period_range(budget.period, now)
+    return float(sum(
+        (e.amount for e in db.iter_entries(user_id=budget.user_id, start_date=start, end_date=end)
+         if e.category.type == CategoryType.EXPENSE
+         and (budget.category_id is None or e.category.category_id == budget.category_id)),
+        Decimal("0")
+    ))
+
+
+def test_budgets_are_evaluated_in_one_scan(db, user_ids, categories, monkeypatch):
+    u1, u2 = user_ids
+    c_exp, c_inc = categories
+    other = type(c_exp)("交通-测试", CategoryType.EXPENSE)
+    now = datetime(2025, 3, 12, 15, 0, 0)  # 周三
+    rows = [
+        (c_exp, "10", now - timedelta(hours=1)),          # 今天
+        (other, "20", now - timedelta(days=1)),           # 本周
+        (c_exp, "40", now - timedelta(days=6)),           # 本月, 上周
+        (c_exp, "80", datetime(2025, 1, 5)),              # 本年
+        (c_exp, "160", datetime(2024, 12, 31, 23, 59)),   # 去年
+        (c_inc, "999", now - timedelta(hours=2)),         # 收入不计入
+    ]
+    db.save_entries([make_entry(u1, c, f"e{i}", a, ts) for i, (c, a, ts) in enumerate(rows)])
+    db.save_entry(make_entry(u2, c_exp, "other user", "5", now))
+
+    budgets = [
+        Budget(u1, period, Decimal("100"), category_id=category_id)
+        for period in BudgetPeriod
+        for category_id in (None, c_exp.category_id, other.category_id)
+    ]
+    inactive = Budget(u1, BudgetPeriod.DAILY, Decimal("1"), is_active=False)
+    for budget in budgets + [inactive]:
+        db.save_budget(budget)
+
+    engine = StatEngine(db)
+    expected = {str(b.budget_id): _expected(db, b, now) for b in budgets}
+    scans = []
+    original = db.iter_entries
+    monkeypatch.setattr(db, "iter_entries", lambda **kw: (scans.append(kw), original(**kw))[1])
+
+    status = engine.check_budget_status(u1, now=now)
+    assert len(scans) == 1
+    assert {s['budget_id']: s['current_amount'] for s in status} == expected
+    by_id = {s['budget_id']: s for s in status}
+    monthly = next(b for b in budgets if b.period == BudgetPeriod.MONTHLY and b.category_id is None)
+    assert by_id[str(monthly.budget_id)]['current_amount'] == 70.0
+    yearly = next(b for b in budgets if b.period == BudgetPeriod.YEARLY and b.category_id is None)
+    assert by_id[str(yearly.budget_id)]['is_exceeded'] is True
+    assert str(inactive.budget_id) not in by_id
+
+
+def test_no_active_budgets_skips_scan(db, user_ids, monkeypatch):
+    u1, _ = user_ids
+    monkeypatch.setattr(db, "iter_entries", lambda **kw: 1 / 0)
+    assert StatEngine(db).check_budget_status(u1) == []
@@ -0,0 +1,84 @@
+# tests/test_stat_engine_summary.py
+from datetime import datetime
+from decimal import Decimal
+
+from pocket_ledger.database.database import Database
+from pocket_ledger.models.category import CategoryType
+from pocket_ledger.services.stat_engine import StatEngine
+
+from .conftest import make_entry
+
+
+def test_compute_summary_matches_individual_statistics(db, user_ids, categories, tags, monkeypatch):
+    u1, u2 = user_ids
+    c_exp, c_inc = categories
+    t1, t2 = tags
+    db.save_entries([
+        make_entry(u1, c_exp, "a", "12.50", datetime(2025, 1, 1, 9), tags=[t1]),
+        make_entry(u1, c_exp, "b", "7.5", datetime(2025, 1, 2, 9), currency="USD", tags=[t1, t2]),
+        make_entry(u1, c_inc, "c", "100", datetime(2025, 1, 3, 9)),
+        make_entry(u2, c_exp, "other", "99", datetime(2025, 1, 1, 9)),
+    ])
+    engine = StatEngine(db)
+    scans = []
+    original = db.iter_entries
+    monkeypatch.setattr(db, "iter_entries", lambda **kw: (scans.append(kw), original(**kw))[1])
+
+    summary = engine.compute_summary(u1)
+    assert len(scans) == 1
+    assert (summary['income'], summary['expense'], summary['balance']) == \
+        (Decimal("100"), Decimal("20.00"), Decimal("80.00"))
+    assert summary['count'] == 3
+    assert summary['by_category'] == engine.get_statistics_by_category(u1)
+    assert summary['by_tag'] == engine.get_statistics_by_tag(u1)
+    assert summary['by_currency'] == {
+        'CNY': {'income': Decimal("100"), 'expense': Decimal("12.50"), 'count': 2},
+        'USD': {'income': Decimal("0"), 'expense': Decimal("7.5"), 'count': 1},
+    }
+
+    ranged = engine.compute_summary(u1, datetime(2025, 1, 2), datetime(2025, 1, 3, 23))
+    assert ranged['count'] == 2
+    assert ranged['balance'] == engine.calculate_balance(u1, datetime(2025, 1, 2), datetime(2025, 1, 3, 23))
+
+
+def test_calculate_balance_falls_back_to_single_scan(json_db, user_ids, categories, monkeypatch):
+    u1, _ = user_ids
+    c_exp, c_inc = categories
+    json_db.save_entries([
+        make_entry(u1, c_exp, "a", "3", datetime(2025, 1, 1, 9)),
+        make_entry(u1, c_inc, "b", "10", datetime(2025, 1, 1, 10)),
+    ])
+    db = Database(json_db.db_path, columnar=False, rollups=False)
+    scans = []
+    original = db.iter_entries
+    monkeypatch.setattr(db, "iter_entries", lambda **kw: (scans.append(kw), original(**kw))[1])
+    assert StatEngine(db).calculate_balance(u1, datetime(2025, 1, 1, 9, 30)) == Decimal("10")
+    assert len(scans) == 1
+    assert StatEngine(db).calculate_total_by_type(u1, CategoryType.EXPENSE) == Decimal("3")
+
+
+def test_totals_and_categories_come_from_aggregates(json_db, user_ids, categories, monkeypatch):
+    u1, u2 = user_ids
+    c_exp, c_inc = categories
+    json_db.save_entries([
+        make_entry(u1, c_exp, "a", "12.50", datetime(2025, 1, 1, 9)),
+        make_entry(u1, c_exp, "b", "7.5", datetime(2025, 1, 2, 9)),
+        make_entry(u1, c_inc, "c", "100", datetime(2025, 1, 3, 9)),
+        make_entry(u2, c_exp, "other", "99", datetime(2025, 1, 1, 9)),
+    ])
+    engine = StatEngine(json_db)
+    ranges = [
+        (None, None),
+        (datetime(2025, 1, 2), datetime(2025, 1, 3, 23, 59, 59, 999999)),  # 整天对齐: 按日汇总
+        (datetime(2025, 1, 1, 10), datetime(2025, 1, 3, 8)),               # 不对齐: 列式存储
+    ]
+    expected = {r: engine.compute_summary(u1, *r) for r in ranges}
+
+    monkeypatch.setattr(json_db, "iter_entries", lambda **kw: 1 / 0)
+    for r in ranges:
+        totals = engine.compute_summary(u1, *r, breakdowns=())
+        assert totals == {k: expected[r][k] for k in ('income', 'expense', 'balance', 'count')}
+    for r in ranges[:2]:
+        summary = engine.compute_summary(u1, *r, breakdowns=['by_category'])
+        assert summary['by_category'] == expected[r]['by_category']
+        assert summary['count'] == expected[r]['count']
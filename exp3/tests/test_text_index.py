@@ -0,0 +1,52 @@
+# tests/test_text_index.py
+from datetime import datetime
+
+from pocket_ledger.database.text_index import TextIndex
+
+from .conftest import make_entry
+
+
+def test_search_intersects_bigram_postings():
+    index = TextIndex()
+    index.add("1", ("午餐 公司食堂", None))
+    index.add("2", ("晚餐", "食堂加餐"))
+    index.add("3", ("Coffee", ""))
+
+    assert index.search("食堂") == {"1", "2"}
+    assert index.search("午餐") == {"1"}
+    assert index.search("COF") == {"3"}
+    assert index.search("餐") == {"1", "2"}
+    assert index.search("火锅") == set()
+
+
+def test_search_returns_candidates_not_exact_matches():
+    index = TextIndex()
+    index.add("1", ("abxbc",))
+    # "abc" 的二字组合 ab / bc 都出现, 但并非连续子串: 由调用方做最终校验
+    assert index.search("abc") == {"1"}
+
+
+def test_reindex_and_remove():
+    index = TextIndex()
+    index.add("1", ("apple",))
+    index.add("1", ("banana",))
+    assert index.search("apple") == set()
+    assert index.search("nan") == {"1"}
+    index.remove("1")
+    assert index.postings == {}
+
+
+def test_query_entries_keyword_uses_index_and_verifies(json_db, user_ids, categories):
+    db = json_db
+    u1, _ = user_ids
+    c_exp, _ = categories
+    db.save_entry(make_entry(u1, c_exp, "abxbc", "1", datetime(2025, 1, 1)))
+    db.save_entry(make_entry(u1, c_exp, "午饭", "1", datetime(2025, 1, 2), note="和同事吃火锅"))
+    e = make_entry(u1, c_exp, "打车", "1", datetime(2025, 1, 3))
+    db.save_entry(e)
+
+    assert db.query_entries(user_id=u1, keyword="abc") == []
+    assert [x.title for x in db.query_entries(user_id=u1, keyword="火锅")] == ["午饭"]
+
+    db.delete_entry(e.entry_id)
+    assert db.query_entries(user_id=u1, keyword="打车") == []